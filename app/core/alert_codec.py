@@ -0,0 +1,180 @@
+"""Encoding of alerts stored in Redis.
+
+Alerts are stored as ``model_dump_json()`` by default, or with ALERT_CODEC=binary
+in the fixed struct layout of BINARY_V1. Binary values start with a version byte
+and JSON values with ``{``, so either encoding stays readable. Alerts whose
+location or status has no binary code are stored as JSON.
+"""
+
+import os
+import struct
+from datetime import UTC, datetime, timedelta, timezone
+from enum import Enum
+from functools import cache
+
+from pydantic import TypeAdapter
+
+from app.models.earthquake import EarthquakeAlert
+from app.models.enums import AlertStatus, Location, SeverityLevel, TriState
+
+
+class AlertCodec(str, Enum):
+    # model_dump_json(), readable by releases without the binary encoding
+    JSON = "json"
+    # fixed struct layout, see BINARY_V1
+    BINARY = "binary"
+
+
+ALERT_CODEC = AlertCodec(os.getenv("ALERT_CODEC", AlertCodec.JSON.value))
+# decode current version binary alerts without coercion
+ALERT_TRUSTED_READS = os.getenv("ALERT_TRUSTED_READS", "true").lower() == "true"
+
+JSON_PREFIX = b"{"
+BINARY_V1 = 1
+
+# version, origin time, origin offset, processed time, processed offset,
+# location, severity, status, has damage, needs command center, duration
+_HEADER = struct.Struct("<BqhqhBbBbbq")
+_STR_LEN = struct.Struct("<H")
+
+# offsets are in minutes, these two never occur in a real one
+NAIVE_OFFSET = -0x8000
+NO_TIME = 0x7FFF
+
+# append only, the position of a member is its stored value
+LOCATIONS = (Location.TAIPEI, Location.HSINCHU, Location.TAICHUNG, Location.TAINAN)
+STATUSES = (AlertStatus.OPEN, AlertStatus.PROCESSED, AlertStatus.AUTOCLOSED)
+_LOCATION_CODES = {location: code for code, location in enumerate(LOCATIONS)}
+_STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+_SEVERITIES = {severity.value: severity for severity in SeverityLevel}
+_TRI_STATES = {state.value: state for state in TriState}
+_ALERT_ADAPTER = TypeAdapter(EarthquakeAlert)
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def _pack_time(time: datetime | None) -> tuple[int, int]:
+    if time is None:
+        return 0, NO_TIME
+    offset = time.utcoffset()
+    # wall clock time, so naive datetimes round trip as naive
+    micros = (time.replace(tzinfo=None) - _EPOCH) // _MICROSECOND
+    if offset is None:
+        return micros, NAIVE_OFFSET
+    return micros, offset // timedelta(minutes=1)
+
+
+@cache
+def _offset_timezone(offset: int) -> timezone:
+    return timezone(timedelta(minutes=offset))
+
+
+def _unpack_time(micros: int, offset: int) -> datetime | None:
+    if offset == NO_TIME:
+        return None
+    tz = None if offset == NAIVE_OFFSET else _offset_timezone(offset)
+    # several times faster than adding a timedelta of microseconds to the epoch
+    seconds, micros = divmod(micros, 1_000_000)
+    return datetime.fromtimestamp(seconds, UTC).replace(microsecond=micros, tzinfo=tz)
+
+
+def _pack_str(value: str) -> bytes:
+    raw = value.encode("utf-8")
+    return _STR_LEN.pack(len(raw)) + raw
+
+
+def encode_alert_binary(alert: EarthquakeAlert) -> bytes:
+    return b"".join(
+        (
+            _HEADER.pack(
+                BINARY_V1,
+                *_pack_time(alert.origin_time),
+                *_pack_time(alert.processed_time),
+                _LOCATION_CODES[alert.location],
+                alert.severity_level.value,
+                _STATUS_CODES[alert.status],
+                alert.has_damage.value,
+                alert.needs_command_center.value,
+                alert.processing_duration,
+            ),
+            _pack_str(alert.id),
+            _pack_str(alert.source),
+        ),
+    )
+
+
+def decode_alert_binary(raw: bytes, *, trusted: bool = False) -> EarthquakeAlert:
+    try:
+        (
+            _,
+            origin_micros,
+            origin_offset,
+            processed_micros,
+            processed_offset,
+            location,
+            severity,
+            status,
+            has_damage,
+            needs_command_center,
+            processing_duration,
+        ) = _HEADER.unpack_from(raw)
+        id_start = _HEADER.size + _STR_LEN.size
+        (id_length,) = _STR_LEN.unpack_from(raw, _HEADER.size)
+        source_start = id_start + id_length + _STR_LEN.size
+        (source_length,) = _STR_LEN.unpack_from(raw, source_start - _STR_LEN.size)
+        if source_start + source_length != len(raw):
+            raise struct.error("unexpected alert length")
+        fields = {
+            "id": raw[id_start : id_start + id_length].decode("utf-8"),
+            "source": raw[source_start : source_start + source_length].decode("utf-8"),
+            "origin_time": _unpack_time(origin_micros, origin_offset),
+            "location": LOCATIONS[location],
+            "severity_level": _SEVERITIES[severity],
+            "status": STATUSES[status],
+            "has_damage": _TRI_STATES[has_damage],
+            "needs_command_center": _TRI_STATES[needs_command_center],
+            "processed_time": _unpack_time(processed_micros, processed_offset),
+            "processing_duration": processing_duration,
+        }
+    except (struct.error, IndexError, KeyError) as e:
+        raise ValueError("Malformed binary alert") from e
+    if trusted:
+        # the fields already have their exact types and names
+        return _ALERT_ADAPTER.validate_python(
+            fields,
+            strict=True,
+            by_alias=False,
+            by_name=True,
+        )
+    return EarthquakeAlert.model_validate(fields)
+
+
+def encode_alert(alert: EarthquakeAlert, codec: AlertCodec | None = None) -> bytes:
+    """Encode an alert for storage with ``codec``, ALERT_CODEC by default."""
+    if (
+        (codec or ALERT_CODEC) == AlertCodec.JSON
+        # members added after the binary layout have no code to store
+        or alert.location not in _LOCATION_CODES
+        or alert.status not in _STATUS_CODES
+    ):
+        return alert.model_dump_json().encode("utf-8")
+    return encode_alert_binary(alert)
+
+
+def decode_alert(
+    raw: bytes | str,
+    *,
+    trusted: bool = ALERT_TRUSTED_READS,
+) -> EarthquakeAlert:
+    """Decode a stored alert of any encoding, raising ValueError when it is malformed.
+
+    With ``trusted``, values of the current binary version skip coercion.
+    """
+    if isinstance(raw, str):
+        raw = raw.encode("utf-8")
+    if raw.startswith(JSON_PREFIX):
+        return EarthquakeAlert.model_validate_json(raw)
+    if raw[:1] == bytes([BINARY_V1]):
+        return decode_alert_binary(raw, trusted=trusted)
+    raise ValueError(f"Unknown alert encoding: {raw[:1]!r}")
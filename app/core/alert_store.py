@@ -0,0 +1,317 @@
+"""Redis alert repository with secondary indexes.
+
+Every alert lives under ``alert_{source}_{location}_{id}`` and is mirrored in
+two sorted sets scored by ``origin_time``:
+
+- ``index:alerts:open`` holds every open alert, newest last. Alerts due for
+  autoclose are read from its low end.
+- ``index:alerts:latest:{source}:{location}`` holds the alerts of a single
+  (source, location) pair; its highest-scored member is the latest alert.
+- ``index:alerts:severity:{level}`` holds the open alerts of a severity level.
+
+Keys and index entries are always written and removed in the same MULTI
+transaction, so listing open alerts and looking up the latest alert of a
+location no longer need to SCAN the keyspace. Values are encoded by
+``alert_codec``.
+"""
+
+import base64
+import json
+from datetime import datetime
+
+import pytz
+from redis.asyncio.client import Pipeline
+
+from app.models.earthquake import EarthquakeAlert
+from app.models.enums import Location, SeverityLevel
+from app.utils.logger import logger
+
+from .alert_codec import decode_alert, encode_alert
+from .redis import get_data_by_prefix, redis_client, validate_batch
+
+ALERT_PREFIX = "alert"
+OPEN_ALERTS_INDEX = "index:alerts:open"
+LATEST_ALERT_INDEX_PREFIX = "index:alerts:latest"
+SEVERITY_ALERT_INDEX_PREFIX = "index:alerts:severity"
+
+# index entries read per round trip while looking for alerts matching a query
+ALERT_QUERY_SCAN_SIZE = 200
+
+# alerts without timezone info are reported in Taiwan local time
+TAIPEI_TZ = pytz.timezone("Asia/Taipei")
+
+
+def alert_key(source: str, location: Location, alert_id: str) -> str:
+    return f"{ALERT_PREFIX}_{source}_{location.value}_{alert_id}"
+
+
+def latest_alert_index(source: str, location: str) -> str:
+    return f"{LATEST_ALERT_INDEX_PREFIX}:{source}:{location}"
+
+
+def severity_alert_index(severity: SeverityLevel) -> str:
+    return f"{SEVERITY_ALERT_INDEX_PREFIX}:{severity.value}"
+
+
+def parse_alert_key(key: str) -> tuple[str, str, str]:
+    """Split an alert key into its (source, location, id) parts."""
+    # source may contain underscores, location and id never do
+    source_location_id = key.removeprefix(f"{ALERT_PREFIX}_")
+    source, location, alert_id = source_location_id.rsplit("_", 2)
+    return source, location, alert_id
+
+
+def to_score(time: datetime) -> float:
+    if time.tzinfo is None:
+        time = TAIPEI_TZ.localize(time)
+    return time.timestamp()
+
+
+def _decode(key: bytes | str) -> str:
+    return key.decode("utf-8") if isinstance(key, bytes) else key
+
+
+def _index_alert(pipe: Pipeline, key: str, alert: EarthquakeAlert) -> None:
+    score = to_score(alert.origin_time)
+    pipe.zadd(OPEN_ALERTS_INDEX, {key: score})
+    pipe.zadd(latest_alert_index(alert.source, alert.location.value), {key: score})
+    pipe.zadd(severity_alert_index(alert.severity_level), {key: score})
+
+
+async def save_alerts(alerts: list[EarthquakeAlert]) -> None:
+    """Store alerts and add them to the indexes in a single transaction."""
+    if not alerts:
+        return
+
+    async with redis_client.pipeline(transaction=True) as pipe:
+        for alert in alerts:
+            key = alert_key(alert.source, alert.location, alert.id)
+            pipe.set(key, encode_alert(alert))
+            _index_alert(pipe, key, alert)
+        await pipe.execute()
+
+
+async def remove_alerts(keys: list[str]) -> list[str]:
+    """Delete alerts and drop them from the indexes in a single transaction.
+
+    Returns the keys that were still in the open index, i.e. the alerts this
+    call closed. When callers race on the same alert only one of them gets it.
+    """
+    if not keys:
+        return []
+
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.delete(*keys)
+        for key in keys:
+            pipe.zrem(OPEN_ALERTS_INDEX, key)
+        for key in keys:
+            source, location, _ = parse_alert_key(key)
+            pipe.zrem(latest_alert_index(source, location), key)
+        # the severity is not part of the key
+        for severity in SeverityLevel:
+            pipe.zrem(severity_alert_index(severity), *keys)
+        results = await pipe.execute()
+
+    # results start with the DEL count, followed by the open index ZREM per key
+    open_removed = results[1 : len(keys) + 1]
+    return [key for key, removed in zip(keys, open_removed, strict=False) if removed]
+
+
+async def get_alerts_by_keys(keys: list[str]) -> list[EarthquakeAlert]:
+    """Fetch alerts with one MGET, pruning index entries whose key is gone."""
+    if not keys:
+        return []
+
+    raws = await redis_client.mget(keys)
+    stale_keys = [key for key, raw in zip(keys, raws, strict=True) if raw is None]
+    if stale_keys:
+        # the alert key was removed outside of this module, e.g. by a flush
+        await remove_alerts(stale_keys)
+    return validate_batch(raws, EarthquakeAlert, decode_alert)
+
+
+async def get_open_alerts() -> list[EarthquakeAlert]:
+    """Return open alerts, newest first."""
+    keys = await redis_client.zrevrange(OPEN_ALERTS_INDEX, 0, -1)
+    return await get_alerts_by_keys([_decode(key) for key in keys])
+
+
+async def get_open_alert_keys_before(
+    time: datetime,
+    limit: int,
+) -> list[str]:
+    """Return up to ``limit`` open alert keys with an origin time before ``time``, oldest first."""
+    keys = await redis_client.zrangebyscore(
+        OPEN_ALERTS_INDEX,
+        "-inf",
+        f"({to_score(time)}",
+        start=0,
+        num=limit,
+    )
+    return [_decode(key) for key in keys]
+
+
+async def get_oldest_open_alert_time() -> float | None:
+    """Return the origin time of the oldest open alert as a timestamp."""
+    oldest = await redis_client.zrange(OPEN_ALERTS_INDEX, 0, 0, withscores=True)
+    return oldest[0][1] if oldest else None
+
+
+def _tie_order(key: str) -> tuple[str, str, str]:
+    # alerts of the same origin time, by location and then source
+    source, location, _ = parse_alert_key(key)
+    return location, source, key
+
+
+def encode_cursor(score: float, key: str) -> str:
+    raw = json.dumps([score, key], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> tuple[float, str]:
+    """Decode a cursor from ``encode_cursor``, raising ValueError when it is invalid."""
+    try:
+        score, key = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return float(score), str(key)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+async def query_open_alerts(
+    *,
+    source: str | None = None,
+    location: Location | None = None,
+    severity: SeverityLevel | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    limit: int | None = None,
+    cursor: str | None = None,
+) -> tuple[list[EarthquakeAlert], str | None]:
+    """Return a page of open alerts, newest first, and the cursor of the next page.
+
+    Alerts are selected by walking the most selective index; source and
+    location are matched on the index members, so only the alerts of the
+    returned page are fetched. Alerts with the same origin time are ordered by
+    location and then source; the cursor holds the score and key of the last
+    alert, which together give its position in that order.
+    """
+    if severity is not None:
+        index = severity_alert_index(severity)
+    elif source is not None and location is not None:
+        index = latest_alert_index(source, location.value)
+    else:
+        index = OPEN_ALERTS_INDEX
+
+    max_score = to_score(until) if until else float("inf")
+    min_score = to_score(since) if since else float("-inf")
+    after = decode_cursor(cursor) if cursor else None
+    if after:
+        max_score = min(max_score, after[0])
+        after_order = _tie_order(after[1])
+
+    def matches(key: str, score: float) -> bool:
+        if after and score == after[0] and _tie_order(key) <= after_order:
+            # returned on a previous page
+            return False
+        key_source, key_location, _ = parse_alert_key(key)
+        return (source is None or key_source == source) and (
+            location is None or key_location == location.value
+        )
+
+    # one extra match tells whether there is a next page
+    wanted = None if limit is None else limit + 1
+    matched: list[tuple[str, float]] = []
+
+    def page_complete(score: float) -> bool:
+        # alerts tied with the last wanted one may still sort before it
+        return (
+            wanted is not None
+            and len(matched) >= wanted
+            and score < matched[wanted - 1][1]
+        )
+
+    offset = 0
+    complete = False
+    while not complete:
+        if wanted is None:
+            entries = await redis_client.zrevrangebyscore(
+                index,
+                max_score,
+                min_score,
+                withscores=True,
+            )
+        else:
+            entries = await redis_client.zrevrangebyscore(
+                index,
+                max_score,
+                min_score,
+                start=offset,
+                num=ALERT_QUERY_SCAN_SIZE,
+                withscores=True,
+            )
+        for member, score in entries:
+            if page_complete(score):
+                complete = True
+                break
+            key = _decode(member)
+            if matches(key, score):
+                matched.append((key, score))
+        if wanted is None or len(entries) < ALERT_QUERY_SCAN_SIZE:
+            break
+        offset += ALERT_QUERY_SCAN_SIZE
+
+    # redis orders ties by descending member instead
+    matched.sort(key=lambda entry: (-entry[1], _tie_order(entry[0])))
+    next_cursor = None
+    if wanted is not None and len(matched) >= wanted:
+        matched = matched[:limit]
+        next_cursor = encode_cursor(matched[-1][1], matched[-1][0])
+
+    alerts = await get_alerts_by_keys([key for key, _ in matched])
+    return alerts, next_cursor
+
+
+async def get_latest_alerts(
+    pairs: list[tuple[str, Location]],
+) -> list[EarthquakeAlert | None]:
+    """Return the latest alert of every (source, location) pair, in order.
+
+    All index lookups share one pipelined round trip and the alerts are then
+    fetched with a single MGET, whatever the number of pairs.
+    """
+    if not pairs:
+        return []
+
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for source, location in pairs:
+            pipe.zrevrange(latest_alert_index(source, location.value), 0, 0)
+        index_results = await pipe.execute()
+
+    keys = [_decode(keys[0]) for keys in index_results if keys]
+    alerts = {
+        alert_key(alert.source, alert.location, alert.id): alert
+        for alert in await get_alerts_by_keys(keys)
+    }
+    return [alerts.get(_decode(keys[0])) if keys else None for keys in index_results]
+
+
+async def rebuild_alert_index() -> int:
+    """Index alerts that were stored before the indexes existed.
+
+    Runs a single keyspace SCAN, so it is meant for startup only.
+    """
+    alerts = await get_data_by_prefix(
+        ALERT_PREFIX,
+        EarthquakeAlert,
+        decode=decode_alert,
+    )
+    if not alerts:
+        return 0
+
+    async with redis_client.pipeline(transaction=True) as pipe:
+        for alert in alerts:
+            _index_alert(pipe, alert_key(alert.source, alert.location, alert.id), alert)
+        await pipe.execute()
+
+    logger.info(f"Indexed {len(alerts)} existing alerts.")
+    return len(alerts)
@@ -1,10 +1,27 @@
 import json
 import os
-from typing import TypeVar
+import time
+from collections.abc import AsyncIterator, Callable
+from typing import Any, TypeVar
 
 from dotenv import load_dotenv
 from pydantic import BaseModel, ValidationError
-from redis.asyncio import Redis
+from redis.asyncio import BlockingConnectionPool, Redis
+from redis.asyncio.retry import Retry
+from redis.backoff import ExponentialBackoff
+from redis.exceptions import ConnectionError as RedisConnectionError
+from redis.exceptions import TimeoutError as RedisTimeoutError
+from redis.utils import HIREDIS_AVAILABLE
+
+from app.services.metrics import observe_redis_pool, observe_redis_pool_wait
+from app.utils.cached_setting import CachedSetting
+from app.utils.logger import logger
+
+try:
+    # private in redis-py, the only way to opt out of hiredis once installed
+    from redis._parsers import _AsyncRESP2Parser
+except ImportError:  # pragma: no cover - depends on the redis-py version
+    _AsyncRESP2Parser = None
 
 T = TypeVar("T", bound=BaseModel)
 
@@ -13,10 +30,120 @@ load_dotenv()
 REDIS_HOST = os.getenv("REDIS_HOST", "redis")
 REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
 ALERT_SUPPRESS_TIME = int(os.getenv("ALERT_SUPPRESS_TIME", "600"))
+# longest a replica serves a cached setting without reading it from redis
+SETTINGS_CACHE_TTL = float(os.getenv("SETTINGS_CACHE_TTL", "30"))
+# connection pool shared by every request, task and replica process
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+# how long a command waits for a free pooled connection before failing
+REDIS_POOL_TIMEOUT = float(os.getenv("REDIS_POOL_TIMEOUT", "5"))
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "5"))
+REDIS_SOCKET_CONNECT_TIMEOUT = float(os.getenv("REDIS_SOCKET_CONNECT_TIMEOUT", "2"))
+# idle connections are pinged before reuse after this many seconds
+REDIS_HEALTH_CHECK_INTERVAL = int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", "30"))
+REDIS_RETRY_ATTEMPTS = int(os.getenv("REDIS_RETRY_ATTEMPTS", "3"))
+REDIS_RETRY_BACKOFF_BASE = float(os.getenv("REDIS_RETRY_BACKOFF_BASE", "0.05"))
+REDIS_RETRY_BACKOFF_CAP = float(os.getenv("REDIS_RETRY_BACKOFF_CAP", "1"))
+# parse replies with hiredis when it is installed (the `hiredis` extra)
+REDIS_USE_HIREDIS = os.getenv("REDIS_USE_HIREDIS", "true").lower() == "true"
+
+
+class InstrumentedConnectionPool(BlockingConnectionPool):
+    """Blocking connection pool that records how long commands wait for a connection."""
+
+    def __init__(self, name: str, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.name = name
+        observe_redis_pool(self)
+
+    @property
+    def in_use_connections(self) -> int:
+        return len(self._in_use_connections)
+
+    @property
+    def idle_connections(self) -> int:
+        return len(self._available_connections)
+
+    async def get_connection(self, *args: Any, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            return await super().get_connection(*args, **kwargs)
+        finally:
+            observe_redis_pool_wait(self.name, time.perf_counter() - start)
+
+
+def create_redis_client(
+    name: str = "default",
+    *,
+    max_connections: int = REDIS_MAX_CONNECTIONS,
+    socket_timeout: float | None = REDIS_SOCKET_TIMEOUT,
+) -> Redis:
+    """Create a redis client on a bounded, instrumented connection pool.
+
+    Commands wait up to REDIS_POOL_TIMEOUT for a free connection instead of
+    opening one per caller, and connection errors or timeouts are retried
+    with exponential backoff.
+    """
+    connection_kwargs: dict[str, Any] = {}
+    if not REDIS_USE_HIREDIS and _AsyncRESP2Parser is not None:
+        # redis-py picks hiredis by default whenever it is importable
+        connection_kwargs["parser_class"] = _AsyncRESP2Parser
+
+    pool = InstrumentedConnectionPool(
+        name,
+        host=REDIS_HOST,
+        port=REDIS_PORT,
+        db=0,
+        max_connections=max_connections,
+        timeout=REDIS_POOL_TIMEOUT,
+        socket_timeout=socket_timeout,
+        socket_connect_timeout=REDIS_SOCKET_CONNECT_TIMEOUT,
+        socket_keepalive=True,
+        health_check_interval=REDIS_HEALTH_CHECK_INTERVAL,
+        retry=Retry(
+            ExponentialBackoff(
+                cap=REDIS_RETRY_BACKOFF_CAP,
+                base=REDIS_RETRY_BACKOFF_BASE,
+            ),
+            REDIS_RETRY_ATTEMPTS,
+        ),
+        retry_on_error=[RedisConnectionError, RedisTimeoutError],
+        **connection_kwargs,
+    )
+    return Redis(connection_pool=pool)
 
 
 # initialize redis connection
-redis_client = Redis(host=REDIS_HOST, port=REDIS_PORT, db=0)
+redis_client = create_redis_client()
+# subscriptions block on reads until a message arrives, so they use their own
+# client without a read timeout; health checks still ping idle connections
+pubsub_client = create_redis_client("pubsub", max_connections=4, socket_timeout=None)
+
+# settings, cached in memory and invalidated through pub/sub
+alert_suppress_time = CachedSetting(
+    redis_client,
+    "ALERT_SUPPRESS_TIME",
+    int,
+    ALERT_SUPPRESS_TIME,
+    SETTINGS_CACHE_TTL,
+)
+
+
+async def start_redis_client() -> None:
+    python_parser = not REDIS_USE_HIREDIS and _AsyncRESP2Parser is not None
+    parser = "hiredis" if HIREDIS_AVAILABLE and not python_parser else "python"
+    logger.info(
+        f"Connecting to redis at {REDIS_HOST}:{REDIS_PORT} "
+        f"(max {REDIS_MAX_CONNECTIONS} connections, {parser} parser).",
+    )
+    # fail fast on a misconfigured host instead of on the first request
+    if not await check_redis_connection():
+        logger.warning("Redis is not reachable yet, commands will keep retrying.")
+
+
+async def close_redis_client() -> None:
+    for client in (pubsub_client, redis_client):
+        # an injected pool is not closed along with its client by default
+        await client.aclose(close_connection_pool=True)
 
 
 async def check_redis_connection() -> bool:
@@ -29,28 +156,100 @@ async def check_redis_connection() -> bool:
 async def get_alert_suppress_time() -> int:
     # get alert suppress time from cache
     # return default time from env if not found in cache
-    time = await redis_client.get("ALERT_SUPPRESS_TIME")
-    return int(time) if time else ALERT_SUPPRESS_TIME
+    return await alert_suppress_time.get()
+
 
+async def set_alert_suppress_time(time: int) -> None:
+    await alert_suppress_time.set(time)
+
+
+async def get_data_by_prefix(
+    prefix: str,
+    model: type[T],
+    batch_size: int = 100,
+    *,
+    bulk: bool = True,
+    decode: Callable[[bytes], T] | None = None,
+) -> list[T]:
+    """Load every value stored under ``{prefix}_*`` as ``model`` instances.
+
+    Each SCAN page is fetched with a single MGET when ``bulk`` is set; the
+    per-key GET path is kept as a fallback for servers or proxies that do not
+    allow multi-key commands. ``batch_size`` is used as the SCAN COUNT hint.
+    Values are parsed as JSON unless a ``decode`` function is given.
+    """
+    if bulk:
+        return [
+            item
+            async for batch in iter_data_by_prefix(prefix, model, batch_size, decode)
+            for item in batch
+        ]
 
-async def get_data_by_prefix(prefix: str, model: type[T]) -> list[T]:
     cursor = 0
     results: list[T] = []
 
     pattern = f"{prefix}_*"
 
     while True:
-        cursor, keys = await redis_client.scan(cursor=cursor, match=pattern, count=100)
-        for key in keys:
-            raw = await redis_client.get(key)
-            if raw:
-                try:
-                    # decode bytes to string if necessary
-                    raw_str = raw.decode("utf-8") if isinstance(raw, bytes) else raw
-                    results.append(model.model_validate_json(raw_str))
-                except (ValidationError, json.JSONDecodeError):
-                    continue
+        cursor, keys = await redis_client.scan(
+            cursor=cursor,
+            match=pattern,
+            count=batch_size,
+        )
+        if keys:
+            raws = [await redis_client.get(key) for key in keys]
+            results.extend(validate_batch(raws, model, decode))
         if cursor == 0:
             break
 
     return results
+
+
+async def iter_data_by_prefix(
+    prefix: str,
+    model: type[T],
+    batch_size: int = 100,
+    decode: Callable[[bytes], T] | None = None,
+) -> AsyncIterator[list[T]]:
+    """Yield the values stored under ``{prefix}_*`` one SCAN page at a time.
+
+    Each page is fetched with a single MGET and handed out before the next
+    SCAN call, so callers only ever hold about ``batch_size`` values.
+    """
+    cursor = 0
+    pattern = f"{prefix}_*"
+
+    while True:
+        cursor, keys = await redis_client.scan(
+            cursor=cursor,
+            match=pattern,
+            count=batch_size,
+        )
+        if keys:
+            batch = validate_batch(await redis_client.mget(keys), model, decode)
+            if batch:
+                yield batch
+        if cursor == 0:
+            break
+
+
+def validate_batch(
+    raws: list[bytes | str | None],
+    model: type[T],
+    decode: Callable[[bytes], T] | None = None,
+) -> list[T]:
+    """Validate a batch of raw values, skipping missing or malformed ones.
+
+    ``decode`` must raise ValueError for a malformed value.
+    """
+    # pydantic parses bytes directly, no need to decode first
+    decode = decode or model.model_validate_json
+    results: list[T] = []
+    for raw in raws:
+        if not raw:
+            continue
+        try:
+            results.append(decode(raw))
+        except (ValidationError, json.JSONDecodeError, ValueError):
+            continue
+    return results
@@ -1,15 +1,58 @@
-import json
+from datetime import datetime
 
-from app.websockets.manager import manager
+from app.utils.cached_setting import SETTINGS_CHANNEL, invalidate_setting
+from app.utils.json_backend import dumps, loads
+from app.utils.stage_timer import time_stage
+from app.websockets.manager import AlertTiming, manager
 
-from .redis import redis_client
+from .redis import pubsub_client
 
 
 async def listen_to_alerts() -> None:
-    pubsub = redis_client.pubsub()
+    pubsub = pubsub_client.pubsub()
     await pubsub.subscribe("alerts")
 
     async for msg in pubsub.listen():
         if msg["type"] == "message":
-            data = json.loads(msg["data"])
-            await manager.broadcast(data)
+            # decoded once here, not per client
+            message, timing = split_alert_timing(msg["data"])
+            # only queues the frames, their sends are timed as delivery
+            with time_stage("enqueue"):
+                await manager.broadcast_alert(message, timing)
+
+
+def split_alert_timing(message: bytes | str) -> tuple[bytes | str, AlertTiming | None]:
+    """Removes ``ingestedAt`` from a published alert notification.
+
+    v1 clients keep receiving the frames they did before the ingest time was
+    published. Only messages carrying ``ingestedAt`` are timed; other
+    notifications, e.g. autoclosed alerts, refer to earthquakes from long ago
+    and are forwarded as is.
+    """
+    try:
+        published = loads(message)
+        ingested_at = float(published.pop("ingestedAt"))
+    except (ValueError, TypeError, KeyError, AttributeError):
+        return message, None
+
+    origin_at = None
+    try:
+        alert = loads(published["alert"])
+        origin_time = datetime.fromisoformat(alert["originTime"])
+    except (ValueError, TypeError, KeyError):
+        pass
+    else:
+        # a naive origin time has no known offset to compare against
+        if origin_time.tzinfo is not None:
+            origin_at = origin_time.timestamp()
+    return dumps(published), AlertTiming(ingested_at, origin_at)
+
+
+async def listen_to_settings() -> None:
+    pubsub = pubsub_client.pubsub()
+    await pubsub.subscribe(SETTINGS_CHANNEL)
+
+    async for msg in pubsub.listen():
+        if msg["type"] == "message":
+            # the message is the key of the changed setting
+            invalidate_setting(msg["data"])
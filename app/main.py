@@ -1,16 +1,61 @@
 import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from prometheus_fastapi_instrumentator import Instrumentator
 
-from app.core.redis import check_redis_connection
-from app.core.redis_listener import listen_to_alerts
+from app.core.alert_store import rebuild_alert_index
+from app.core.redis import (
+    check_redis_connection,
+    close_redis_client,
+    start_redis_client,
+)
+from app.core.redis_listener import listen_to_alerts, listen_to_settings
 from app.models.response import Response
 from app.routers import earthquake, redis, settings
+from app.services.autoclose import run_autoclose_scheduler
+from app.services.ingest import EARTHQUAKE_INGEST_MODE, IngestMode, ingest_queue
+from app.services.realtime import run_realtime_poller
+from app.utils.logger import logger
+from app.utils.loop_monitor import run_loop_lag_monitor
+from app.utils.realtime_data_handler import close_http_client, start_http_client
 from app.websockets import alerts_ws
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    await start_redis_client()
+    await start_http_client()
+    tasks = [
+        asyncio.create_task(listen_to_alerts()),
+        asyncio.create_task(listen_to_settings()),
+        asyncio.create_task(run_realtime_poller()),
+        asyncio.create_task(run_autoclose_scheduler()),
+        asyncio.create_task(run_loop_lag_monitor()),
+    ]
+    if EARTHQUAKE_INGEST_MODE == IngestMode.QUEUE:
+        ingest_queue.start()
+
+    # index alerts written before the alert indexes were introduced
+    try:
+        await rebuild_alert_index()
+    except Exception:
+        logger.exception("Failed to rebuild alert indexes on startup.")
+
+    yield
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await ingest_queue.stop()
+    await close_http_client()
+    # last, so that stopping tasks can still reach redis
+    await close_redis_client()
+
+
+app = FastAPI(lifespan=lifespan)
 Instrumentator().instrument(app).expose(app)
 
 # enable CORS related config
@@ -27,14 +72,6 @@ app.include_router(settings.router)
 app.include_router(redis.router)
 app.include_router(alerts_ws.router)
 
-alert_listener_task = None
-
-
-@app.on_event("startup")
-async def startup_event() -> None:
-    global alert_listener_task
-    alert_listener_task = asyncio.create_task(listen_to_alerts())
-
 
 @app.get("/")
 def root() -> Response:
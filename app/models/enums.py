@@ -24,3 +24,10 @@ class AlertStatus(str, Enum):
     OPEN = "OPEN"
     PROCESSED = "PROCESSED"
     AUTOCLOSED = "AUTOCLOSED"
+
+
+class ExportFormat(str, Enum):
+    # one alert object per line
+    NDJSON = "ndjson"
+    # a single JSON array, sent in chunks
+    JSON = "json"
@@ -8,3 +8,8 @@ T = TypeVar("T")
 class Response(BaseModel, Generic[T]):
     message: str
     data: T | None = None
+
+
+class PaginatedResponse(Response[T], Generic[T]):
+    # pass as ``cursor`` to get the next page, None on the last page
+    next_cursor: str | None = None
@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.core.redis import get_alert_suppress_time, redis_client
+from app.core.redis import get_alert_suppress_time, set_alert_suppress_time
 from app.models.response import Response
 from app.models.settings import Settings
 
@@ -9,7 +9,7 @@ router = APIRouter(prefix="/api/settings", tags=["settings"])
 
 @router.put("/alert-suppress-time")
 async def set_suppress_time(data: Settings) -> Response[str]:
-    await redis_client.set("ALERT_SUPPRESS_TIME", str(data.alert_suppress_time))
+    await set_alert_suppress_time(data.alert_suppress_time)
     return {
         "message": f"Updated to {data.alert_suppress_time} seconds successfully",
         "data": f"{data.alert_suppress_time}",
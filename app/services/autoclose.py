@@ -0,0 +1,151 @@
+"""Autoclose open alerts that were not responded to in time.
+
+Due alerts are read from the low end of the open alert index, which is scored
+by ``origin_time``, so a sweep only touches alerts that are actually expired.
+The scheduler sleeps until the oldest open alert is due, capped so alerts
+opened by other replicas are picked up too.
+
+Every replica runs the scheduler, but only the holder of a Redis lease sweeps.
+Alerts are additionally claimed by removing them from the open index, so even
+overlapping sweeps publish each autoclose notification once.
+"""
+
+import asyncio
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from redis.exceptions import WatchError
+
+from app.core.alert_store import (
+    TAIPEI_TZ,
+    alert_key,
+    get_alerts_by_keys,
+    get_oldest_open_alert_time,
+    get_open_alert_keys_before,
+    remove_alerts,
+)
+from app.core.redis import redis_client
+from app.models.earthquake import EarthquakeAlert
+from app.models.enums import AlertStatus
+from app.services.earthquake import update_alert_autoclose_metrics
+from app.utils.json_backend import dumps
+from app.utils.logger import logger
+
+# open alerts are autoclosed when not responded within this many seconds
+ALERT_AUTOCLOSE_AFTER = int(os.getenv("ALERT_AUTOCLOSE_AFTER", "3600"))
+ALERT_AUTOCLOSE_BATCH_SIZE = int(os.getenv("ALERT_AUTOCLOSE_BATCH_SIZE", "500"))
+# longest the scheduler sleeps before looking for due alerts again
+ALERT_AUTOCLOSE_MAX_WAIT = float(os.getenv("ALERT_AUTOCLOSE_MAX_WAIT", "60"))
+ALERT_AUTOCLOSE_LEASE_TTL = float(os.getenv("ALERT_AUTOCLOSE_LEASE_TTL", "120"))
+
+AUTOCLOSE_LEASE_KEY = "lease:alerts:autoclose"
+
+# identifies this replica as the lease holder
+lease_token = uuid.uuid4().hex
+
+
+async def close_expired_alerts(now: datetime | None = None) -> list[EarthquakeAlert]:
+    """Close every open alert older than ALERT_AUTOCLOSE_AFTER and publish them.
+
+    Due alerts are closed in batches of ALERT_AUTOCLOSE_BATCH_SIZE, each costing
+    one index read, one MGET, one transaction and one pipelined publish.
+    """
+    now = datetime.now(TAIPEI_TZ) if now is None else now
+    cutoff = now - timedelta(seconds=ALERT_AUTOCLOSE_AFTER)
+    closed_alerts = []
+
+    while True:
+        keys = await get_open_alert_keys_before(cutoff, ALERT_AUTOCLOSE_BATCH_SIZE)
+        if not keys:
+            break
+
+        alerts = await get_alerts_by_keys(keys)
+        # removing every due key also drops entries whose value is unreadable
+        claimed = set(await remove_alerts(keys))
+        closed = [
+            alert
+            for alert in alerts
+            if alert_key(alert.source, alert.location, alert.id) in claimed
+        ]
+        await publish_autoclosed_alerts(closed)
+        closed_alerts.extend(closed)
+
+        if len(keys) < ALERT_AUTOCLOSE_BATCH_SIZE:
+            break
+
+    return closed_alerts
+
+
+async def publish_autoclosed_alerts(alerts: list[EarthquakeAlert]) -> None:
+    if not alerts:
+        return
+
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for alert in alerts:
+            # set alert status as autoclosed
+            alert.status = AlertStatus.AUTOCLOSED
+
+            # update alert metrics
+            update_alert_autoclose_metrics(alert)
+
+            # log autoclosed alert
+            logger.info(
+                f"Auto-closed alert ID {alert.id} from source {alert.source} at {alert.location.value}.",
+            )
+
+            # publish alert to redis channel
+            pipe.publish(
+                "alerts",
+                dumps(
+                    {"type": AlertStatus.AUTOCLOSED, "alert": alert.model_dump_json()},
+                ),
+            )
+        await pipe.execute()
+
+
+async def acquire_autoclose_lease() -> bool:
+    """Take or renew the sweep lease, returning whether this replica holds it."""
+    ttl_ms = int(ALERT_AUTOCLOSE_LEASE_TTL * 1000)
+    if await redis_client.set(AUTOCLOSE_LEASE_KEY, lease_token, nx=True, px=ttl_ms):
+        return True
+
+    # only extend the lease while it is still ours: the transaction is aborted
+    # when another replica takes the lease between the check and the renewal
+    async with redis_client.pipeline(transaction=True) as pipe:
+        try:
+            await pipe.watch(AUTOCLOSE_LEASE_KEY)
+            holder = await pipe.get(AUTOCLOSE_LEASE_KEY)
+            if holder not in (lease_token, lease_token.encode("utf-8")):
+                return False
+            pipe.multi()
+            pipe.set(AUTOCLOSE_LEASE_KEY, lease_token, px=ttl_ms)
+            await pipe.execute()
+        except WatchError:
+            return False
+    return True
+
+
+async def next_autoclose_delay() -> float:
+    """Seconds until the oldest open alert is due, at most ALERT_AUTOCLOSE_MAX_WAIT."""
+    oldest = await get_oldest_open_alert_time()
+    if oldest is None:
+        return ALERT_AUTOCLOSE_MAX_WAIT
+
+    due_in = oldest + ALERT_AUTOCLOSE_AFTER - time.time()
+    # sweep at most once a second, also when removing due alerts keeps failing
+    return min(max(due_in, 1), ALERT_AUTOCLOSE_MAX_WAIT)
+
+
+async def run_autoclose_scheduler() -> None:
+    """Sweeps due alerts whenever the oldest open alert expires, until cancelled."""
+    while True:
+        delay = ALERT_AUTOCLOSE_MAX_WAIT
+        try:
+            if await acquire_autoclose_lease():
+                await close_expired_alerts()
+                delay = await next_autoclose_delay()
+        except Exception:
+            logger.exception("Failed to autoclose expired alerts.")
+        await asyncio.sleep(delay)
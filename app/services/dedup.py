@@ -0,0 +1,85 @@
+"""Drop earthquake data that was already ingested.
+
+Sources retry and the realtime poller re-reports an unchanged shaking state
+every tick. Data is identified by a hash of every field but its id, so a
+retried report and an unchanged report with a fresh id are both recognized,
+while a revised magnitude, depth or epicenter is processed again. A local
+TTL set answers repeats on this replica without a round trip, and
+``SET NX EX`` in Redis catches repeats across replicas.
+
+Data is marked seen before it is processed, so concurrent repeats are
+dropped too. When processing fails, ``forget`` removes the mark again so the
+upstream retry is processed instead of being dropped as a duplicate.
+"""
+
+import hashlib
+import os
+
+from app.core.redis import redis_client
+from app.models.earthquake import EarthquakeData
+from app.services.metrics import observe_ingest_dedup_hit, observe_ingest_dedup_miss
+from app.utils.logger import logger
+from app.utils.ttl_cache import TTLSet
+
+EARTHQUAKE_DEDUP_TTL = int(os.getenv("EARTHQUAKE_DEDUP_TTL", "60"))
+EARTHQUAKE_DEDUP_MAX_ENTRIES = int(os.getenv("EARTHQUAKE_DEDUP_MAX_ENTRIES", "10000"))
+
+DEDUP_KEY_PREFIX = "dedup:earthquake"
+
+seen_data = TTLSet(EARTHQUAKE_DEDUP_TTL, EARTHQUAKE_DEDUP_MAX_ENTRIES)
+
+
+def dedup_key(data: EarthquakeData) -> str:
+    areas = sorted(
+        (area.county_name.value, area.area_intensity) for area in data.shaking_area
+    )
+    content = repr(
+        (
+            data.source,
+            data.origin_time.isoformat(),
+            data.epicenter_location,
+            data.magnitude_value,
+            data.focal_depth,
+            areas,
+        ),
+    )
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+async def is_duplicate(data: EarthquakeData) -> bool:
+    """Return whether the data was seen within EARTHQUAKE_DEDUP_TTL, and mark it seen."""
+    key = dedup_key(data)
+    if key in seen_data:
+        observe_ingest_dedup_hit("local")
+        return True
+
+    seen_data.add(key)
+    try:
+        first_seen = await redis_client.set(
+            f"{DEDUP_KEY_PREFIX}:{key}",
+            1,
+            nx=True,
+            ex=EARTHQUAKE_DEDUP_TTL,
+        )
+    except Exception:
+        # still deduplicated on this replica
+        logger.warning("Failed to check earthquake data dedup key in redis.")
+        first_seen = True
+
+    if not first_seen:
+        observe_ingest_dedup_hit("redis")
+        return True
+
+    observe_ingest_dedup_miss()
+    return False
+
+
+async def forget(data: EarthquakeData) -> None:
+    """Unmark data whose processing failed, so a retry is not a duplicate."""
+    key = dedup_key(data)
+    seen_data.discard(key)
+    try:
+        await redis_client.delete(f"{DEDUP_KEY_PREFIX}:{key}")
+    except Exception:
+        # the retry is dropped until the key expires after EARTHQUAKE_DEDUP_TTL
+        logger.warning("Failed to remove earthquake data dedup key from redis.")
@@ -1,8 +1,11 @@
+import asyncio
 from datetime import timedelta
 
-from app.core.redis import get_alert_suppress_time, get_data_by_prefix, redis_client
+from app.core.alert_store import get_latest_alerts, save_alerts, to_score
+from app.core.redis import get_alert_suppress_time
 from app.models.earthquake import EarthquakeAlert, EarthquakeData, EarthquakeEvent
 from app.models.enums import AlertStatus, Location, SeverityLevel, TriState
+from app.services.dedup import forget, is_duplicate
 from app.services.metrics import (
     observe_earthquake_alert_report,
     observe_earthquake_alert_suppress,
@@ -11,8 +14,10 @@ from app.services.metrics import (
     observe_earthquake_data,
     observe_earthquake_events,
 )
+from app.utils.stage_timer import time_stage, timed_stage
 
 
+@timed_stage("generate_events")
 def generate_events(data: EarthquakeData) -> list[EarthquakeEvent]:
     events = []
     magnitude = data.magnitude_value
@@ -41,13 +46,14 @@ def generate_events(data: EarthquakeData) -> list[EarthquakeEvent]:
 
 async def generate_alerts(events: list[EarthquakeEvent]) -> list[EarthquakeAlert]:
     alerts = []
-    alert_suppress_time = await get_alert_suppress_time()
-
-    for event in events:
-        redis_key = f"alert_{event.source}_{event.location.value}"
-        cached_alerts = await get_data_by_prefix(redis_key, EarthquakeAlert)
-        cached_alert = max(cached_alerts, key=lambda a: a.origin_time, default=None)
+    # fetch suppression state of all locations in a constant number of round trips
+    with time_stage("suppression_lookup"):
+        alert_suppress_time, cached_alerts = await asyncio.gather(
+            get_alert_suppress_time(),
+            get_latest_alerts([(event.source, event.location) for event in events]),
+        )
 
+    for event, cached_alert in zip(events, cached_alerts, strict=True):
         # found an existing alert with the same location as current event
         if cached_alert:
             cached_severity_level = cached_alert.severity_level
@@ -74,8 +80,9 @@ async def generate_alerts(events: list[EarthquakeEvent]) -> list[EarthquakeAlert
                 processing_duration=0,  # Add real logic later
             )
             alerts.append(alert)
-            await redis_client.set(f"{redis_key}_{event.id}", alert.model_dump_json())
 
+    with time_stage("save_alerts"):
+        await save_alerts(alerts)
     return alerts
 
 
@@ -88,19 +95,86 @@ def classify_severity(magnitude: float, intensity: float) -> SeverityLevel:
 
 
 async def process_earthquake_data(data: EarthquakeData) -> list[EarthquakeAlert]:
-    # update metrics for earthquake data
-    observe_earthquake_data(data)
+    # drop retried or unchanged reports before any other work
+    with time_stage("dedup"):
+        duplicate = await is_duplicate(data)
+    if duplicate:
+        return []
+
+    try:
+        # update metrics for earthquake data
+        with time_stage("observe_data"):
+            observe_earthquake_data(data)
+
+        events = generate_events(data)
+        observe_earthquake_events(events)
+
+        # obtain alerts by filtering events
+        alerts = await generate_alerts(events)
+    except BaseException:
+        # the data was not stored, let the upstream retry through, also when
+        # cancelled, e.g. by a worker stopping on shutdown
+        await forget(data)
+        raise
+    observe_earthquake_alerts(alerts)
+
+    return alerts
 
-    events = generate_events(data)
-    observe_earthquake_events(events)
 
-    # obtain alerts by filtering events
-    alerts = await generate_alerts(events)
+async def process_earthquake_batch(
+    batch: list[EarthquakeData],
+) -> list[EarthquakeAlert]:
+    """Process several earthquake data at once, e.g. a burst of reports.
+
+    Events of the same (source, location) are merged first, so the whole
+    batch goes through suppression and storage in one pass.
+    """
+    events = []
+    claimed = []
+    try:
+        for data in batch:
+            with time_stage("dedup"):
+                duplicate = await is_duplicate(data)
+            if duplicate:
+                continue
+            claimed.append(data)
+
+            with time_stage("observe_data"):
+                observe_earthquake_data(data)
+            data_events = generate_events(data)
+            observe_earthquake_events(data_events)
+            events.extend(data_events)
+
+        if not events:
+            return []
+
+        alerts = await generate_alerts(merge_events(events))
+    except BaseException:
+        # nothing of the batch was stored, let the upstream retries through,
+        # also when cancelled, e.g. by a worker stopping on shutdown
+        for data in claimed:
+            await forget(data)
+        raise
     observe_earthquake_alerts(alerts)
 
     return alerts
 
 
+def merge_events(events: list[EarthquakeEvent]) -> list[EarthquakeEvent]:
+    """Keep one event per (source, location), the most severe and then the latest."""
+    merged: dict[tuple[str, Location], EarthquakeEvent] = {}
+    for event in events:
+        key = (event.source, event.location)
+        current = merged.get(key)
+        # reports may mix naive and timezone aware origin times
+        if current is None or (event.severity_level, to_score(event.origin_time)) > (
+            current.severity_level,
+            to_score(current.origin_time),
+        ):
+            merged[key] = event
+    return list(merged.values())
+
+
 def update_alert_metrics(alert: EarthquakeAlert) -> None:
     observe_earthquake_alert_report(alert)
 
@@ -0,0 +1,131 @@
+import asyncio
+import contextlib
+import os
+import time
+from enum import Enum
+
+from app.models.earthquake import EarthquakeData
+from app.services.earthquake import process_earthquake_batch
+from app.services.metrics import (
+    earthquake_ingest_queue_depth,
+    observe_ingest_batch,
+    observe_ingest_rejected,
+)
+from app.utils.logger import logger
+
+
+class IngestMode(str, Enum):
+    # POST /api/earthquake/ processes the data before responding
+    INLINE = "inline"
+    # POST /api/earthquake/ queues the data and responds 202 Accepted
+    QUEUE = "queue"
+
+
+EARTHQUAKE_INGEST_MODE = IngestMode(
+    os.getenv("EARTHQUAKE_INGEST_MODE", IngestMode.INLINE.value),
+)
+EARTHQUAKE_INGEST_QUEUE_SIZE = int(os.getenv("EARTHQUAKE_INGEST_QUEUE_SIZE", "1000"))
+EARTHQUAKE_INGEST_WORKERS = int(os.getenv("EARTHQUAKE_INGEST_WORKERS", "2"))
+EARTHQUAKE_INGEST_BATCH_SIZE = int(os.getenv("EARTHQUAKE_INGEST_BATCH_SIZE", "50"))
+# how long a worker keeps collecting a batch after its first item
+EARTHQUAKE_INGEST_WINDOW_MS = int(os.getenv("EARTHQUAKE_INGEST_WINDOW_MS", "50"))
+# how long shutdown waits for the workers to process the queued data
+EARTHQUAKE_INGEST_DRAIN_TIMEOUT = float(
+    os.getenv("EARTHQUAKE_INGEST_DRAIN_TIMEOUT", "10"),
+)
+
+
+class IngestQueue:
+    """Bounded queue of earthquake data drained in micro-batches by a worker pool.
+
+    A worker takes the first waiting item, keeps collecting for ``window_ms``
+    or until ``batch_size`` items, and processes them together so reports of
+    the same (source, location) are merged before hitting Redis.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = EARTHQUAKE_INGEST_QUEUE_SIZE,
+        workers: int = EARTHQUAKE_INGEST_WORKERS,
+        batch_size: int = EARTHQUAKE_INGEST_BATCH_SIZE,
+        window_ms: int = EARTHQUAKE_INGEST_WINDOW_MS,
+    ) -> None:
+        self.queue: asyncio.Queue[tuple[EarthquakeData, float]] = asyncio.Queue(
+            maxsize=maxsize,
+        )
+        self.workers = workers
+        self.batch_size = batch_size
+        self.window = window_ms / 1000
+        self.tasks: list[asyncio.Task] = []
+
+    def __len__(self) -> int:
+        return self.queue.qsize()
+
+    def submit(self, data: EarthquakeData) -> bool:
+        """Queue earthquake data, returning False when the queue is full."""
+        try:
+            self.queue.put_nowait((data, time.monotonic()))
+        except asyncio.QueueFull:
+            observe_ingest_rejected()
+            return False
+        return True
+
+    def start(self) -> None:
+        if not self.tasks:
+            self.tasks = [
+                asyncio.create_task(self._work()) for _ in range(self.workers)
+            ]
+
+    async def stop(self, seconds: float = EARTHQUAKE_INGEST_DRAIN_TIMEOUT) -> None:
+        """Process the queued data for up to ``seconds``, then stop the workers.
+
+        The data was already answered with 202, so it is drained rather than
+        dropped on shutdown.
+        """
+        if self.tasks:
+            try:
+                await asyncio.wait_for(self.queue.join(), seconds)
+            except TimeoutError:
+                logger.warning(
+                    f"Dropping {len(self)} queued earthquake data on shutdown.",
+                )
+        for task in self.tasks:
+            task.cancel()
+        for task in self.tasks:
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        self.tasks = []
+
+    async def _work(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            now = time.monotonic()
+            observe_ingest_batch([now - enqueued_at for _, enqueued_at in batch])
+            try:
+                await process_earthquake_batch([data for data, _ in batch])
+            except Exception:
+                logger.exception(f"Failed to process {len(batch)} earthquake data.")
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def _next_batch(self) -> list[tuple[EarthquakeData, float]]:
+        batch = [await self.queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.batch_size:
+            if not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+                continue
+
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except TimeoutError:
+                break
+        return batch
+
+
+ingest_queue = IngestQueue()
+earthquake_ingest_queue_depth.set_function(lambda: len(ingest_queue))
@@ -1,37 +1,55 @@
-import threading
-import time
+from functools import partial
+from typing import TYPE_CHECKING
 
-from prometheus_client import Counter, Gauge
+from prometheus_client import Counter, Gauge, Histogram
 
 from app.models.earthquake import EarthquakeAlert, EarthquakeData, EarthquakeEvent
+from app.utils.expiry_scheduler import ExpiryScheduler
+from app.utils.managed_gauge import ManagedGauge
+
+if TYPE_CHECKING:
+    from app.core.redis import InstrumentedConnectionPool
 
 # --- Earthquake data metrics ---
+# gauges labeled per earthquake, event or alert id are managed gauges so that
+# stale label sets are evicted instead of piling up in the registry
 earthquake_occurrences_total = Counter(
     "earthquake_occurrences_total",
     "Total number of earthquake data",
     ["source"],
 )
-earthquake_magnitude = Gauge(
+earthquake_magnitude = ManagedGauge(
     "earthquake_magnitude",
     "Magnitude value of earthquake data",
     ["source", "id", "epicenter"],
 )
-earthquake_depth = Gauge(
+earthquake_depth = ManagedGauge(
     "earthquake_depth",
     "Focal depth of earthquake data",
     ["source", "id", "epicenter"],
 )
-earthquake_intensity = Gauge(
+earthquake_intensity = ManagedGauge(
     "earthquake_intensity",
     "Area intensity of earthquake data",
     ["source", "id", "area"],
 )
-earthquake_origin_time = Gauge(
+earthquake_origin_time = ManagedGauge(
     "earthquake_origin_time",
     "Origin time of earthquake data",
     ["source", "id", "epicenter"],
 )
 
+# area intensity is only meaningful while shaking, reset it to NaN afterwards
+INTENSITY_RESET_DELAY = 5
+intensity_reset_scheduler = ExpiryScheduler()
+earthquake_intensity_resets_pending = Gauge(
+    "earthquake_intensity_resets_pending",
+    "Number of area intensity gauges waiting to be reset to NaN",
+)
+earthquake_intensity_resets_pending.set_function(
+    lambda: len(intensity_reset_scheduler),
+)
+
 
 def observe_earthquake_data(data: EarthquakeData) -> None:
     # increment occurrence counter
@@ -54,7 +72,7 @@ def observe_earthquake_data(data: EarthquakeData) -> None:
         epicenter=data.epicenter_location,
     ).set(data.origin_time.timestamp())
 
-    # set intensity for each area and start thread to set to NaN after 5 seconds
+    # set intensity for each area and schedule a reset to NaN after 5 seconds
     for area in data.shaking_area:
         labels = {
             "id": str(data.id),
@@ -63,18 +81,15 @@ def observe_earthquake_data(data: EarthquakeData) -> None:
         }
         earthquake_intensity.labels(**labels).set(area.area_intensity)
 
-        # Start thread to set intensity to NaN after 5 seconds
-        thread = threading.Thread(
-            target=_set_intensity_to_nan_after_delay,
-            args=(labels, 5),
-            daemon=True,
+        intensity_reset_scheduler.schedule(
+            tuple(labels.values()),
+            INTENSITY_RESET_DELAY,
+            partial(_set_intensity_to_nan, labels),
         )
-        thread.start()
 
 
-def _set_intensity_to_nan_after_delay(labels: dict, delay_seconds: int) -> None:
-    """Set earthquake intensity to NaN after specified delay."""
-    time.sleep(delay_seconds)
+def _set_intensity_to_nan(labels: dict) -> None:
+    """Set earthquake intensity to NaN."""
     earthquake_intensity.labels(**labels).set(float("nan"))
 
 
@@ -84,7 +99,7 @@ earthquake_events_total = Counter(
     "Total number of earthquake events",
     ["source"],
 )
-earthquake_events_severity = Gauge(
+earthquake_events_severity = ManagedGauge(
     "earthquake_events_severity",
     "Severity level of earthquake events",
     ["source", "id", "location"],
@@ -124,17 +139,17 @@ earthquake_alerts_autoclosed_total = Counter(
     "Total number of autoclosed earthquake alerts",
     ["source"],
 )
-earthquake_alerts_damage = Gauge(
+earthquake_alerts_damage = ManagedGauge(
     "earthquake_alerts_damage",
     "Flag of whether there is damage in earthquake alerts",
     ["source", "id", "earthquake_id", "location", "origin_time"],
 )
-earthquake_alerts_command_center = Gauge(
+earthquake_alerts_command_center = ManagedGauge(
     "earthquake_alerts_command_center",
     "Flag of whether command center is needed in earthquake alerts",
     ["source", "id", "earthquake_id", "location", "origin_time"],
 )
-earthquake_alerts_processing_duration = Gauge(
+earthquake_alerts_processing_duration = ManagedGauge(
     "earthquake_alerts_processing_duration",
     "Processing duration of earthquake alerts",
     ["source", "id", "location", "origin_time"],
@@ -202,3 +217,174 @@ def observe_earthquake_alert_report(alert: EarthquakeAlert) -> None:
 
 def observe_earthquake_alerts_autoclose(alert: EarthquakeAlert) -> None:
     earthquake_alerts_autoclosed_total.labels(source=alert.source).inc()
+
+
+# --- Websocket metrics ---
+websocket_slow_consumer_total = Counter(
+    "websocket_slow_consumer_total",
+    "Total number of messages that found a websocket client send queue full",
+    ["policy"],
+)
+
+
+def observe_websocket_slow_consumer(policy: str) -> None:
+    websocket_slow_consumer_total.labels(policy=policy).inc()
+
+
+# --- Ingest queue metrics ---
+earthquake_ingest_queue_depth = Gauge(
+    "earthquake_ingest_queue_depth",
+    "Number of earthquake data waiting in the ingest queue",
+)
+earthquake_ingest_wait_seconds = Histogram(
+    "earthquake_ingest_wait_seconds",
+    "Time earthquake data spent in the ingest queue before being processed",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+earthquake_ingest_batch_size = Histogram(
+    "earthquake_ingest_batch_size",
+    "Number of earthquake data processed together by an ingest worker",
+    buckets=(1, 2, 5, 10, 20, 50, 100),
+)
+earthquake_ingest_rejected_total = Counter(
+    "earthquake_ingest_rejected_total",
+    "Total number of earthquake data rejected because the ingest queue was full",
+)
+
+earthquake_ingest_dedup_hits_total = Counter(
+    "earthquake_ingest_dedup_hits_total",
+    "Total number of duplicate earthquake data dropped before processing",
+    ["layer"],
+)
+earthquake_ingest_dedup_misses_total = Counter(
+    "earthquake_ingest_dedup_misses_total",
+    "Total number of earthquake data seen for the first time",
+)
+
+
+def observe_ingest_batch(wait_seconds: list[float]) -> None:
+    earthquake_ingest_batch_size.observe(len(wait_seconds))
+    for wait in wait_seconds:
+        earthquake_ingest_wait_seconds.observe(wait)
+
+
+def observe_ingest_rejected() -> None:
+    earthquake_ingest_rejected_total.inc()
+
+
+def observe_ingest_dedup_hit(layer: str) -> None:
+    earthquake_ingest_dedup_hits_total.labels(layer=layer).inc()
+
+
+def observe_ingest_dedup_miss() -> None:
+    earthquake_ingest_dedup_misses_total.inc()
+
+
+# --- Realtime metrics ---
+realtime_noop_ticks_total = Counter(
+    "realtime_noop_ticks_total",
+    "Total number of realtime polls skipped because no area changed",
+)
+
+
+def observe_realtime_noop_tick() -> None:
+    realtime_noop_ticks_total.inc()
+
+
+# --- Pipeline metrics ---
+earthquake_pipeline_stage_seconds = Histogram(
+    "earthquake_pipeline_stage_seconds",
+    "Time spent in each stage of processing earthquake data and delivering its alerts",
+    ["stage"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+alert_delivery_seconds = Histogram(
+    "alert_delivery_seconds",
+    "Time from ingesting earthquake data to sending its alert to a websocket client",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+alert_origin_delivery_seconds = Histogram(
+    "alert_origin_delivery_seconds",
+    "Time from the origin time of an earthquake to sending its alert to a websocket client",
+    buckets=(0.5, 1, 2, 3, 5, 7.5, 10, 15, 20, 30, 60),
+)
+
+
+def observe_pipeline_stage(stage: str, seconds: float) -> None:
+    earthquake_pipeline_stage_seconds.labels(stage=stage).observe(seconds)
+
+
+def observe_alert_delivery(seconds: float) -> None:
+    alert_delivery_seconds.observe(seconds)
+
+
+def observe_alert_origin_delivery(seconds: float) -> None:
+    alert_origin_delivery_seconds.observe(seconds)
+
+
+# --- Event loop metrics ---
+event_loop_lag_seconds = Histogram(
+    "event_loop_lag_seconds",
+    "Delay between when a sleeping task was due and when the event loop resumed it",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+
+
+def observe_event_loop_lag(seconds: float) -> None:
+    event_loop_lag_seconds.observe(seconds)
+
+
+# --- Upstream metrics ---
+upstream_request_seconds = Histogram(
+    "upstream_request_seconds",
+    "Latency of requests to the TREM servers per host",
+    ["host", "outcome"],
+    buckets=(0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 2, 3.5, 5),
+)
+upstream_hedged_requests_total = Counter(
+    "upstream_hedged_requests_total",
+    "Total number of requests hedged to another host because a host was slow",
+    ["host"],
+)
+
+
+def observe_upstream_request(host: str, seconds: float, *, ok: bool) -> None:
+    outcome = "success" if ok else "error"
+    upstream_request_seconds.labels(host=host, outcome=outcome).observe(seconds)
+
+
+def observe_upstream_hedge(host: str) -> None:
+    upstream_hedged_requests_total.labels(host=host).inc()
+
+
+# --- Redis metrics ---
+redis_pool_connections = Gauge(
+    "redis_pool_connections",
+    "Number of connections held by a redis connection pool",
+    ["pool", "state"],
+)
+redis_pool_max_connections = Gauge(
+    "redis_pool_max_connections",
+    "Maximum number of connections of a redis connection pool",
+    ["pool"],
+)
+redis_pool_wait_seconds = Histogram(
+    "redis_pool_wait_seconds",
+    "Time a redis command waited to get a connection from the pool",
+    ["pool"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1, 5),
+)
+
+
+def observe_redis_pool(pool: "InstrumentedConnectionPool") -> None:
+    redis_pool_connections.labels(pool=pool.name, state="in_use").set_function(
+        lambda: pool.in_use_connections,
+    )
+    redis_pool_connections.labels(pool=pool.name, state="idle").set_function(
+        lambda: pool.idle_connections,
+    )
+    redis_pool_max_connections.labels(pool=pool.name).set(pool.max_connections)
+
+
+def observe_redis_pool_wait(pool: str, seconds: float) -> None:
+    redis_pool_wait_seconds.labels(pool=pool).observe(seconds)
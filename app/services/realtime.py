@@ -0,0 +1,198 @@
+import asyncio
+import os
+import random
+import time
+from datetime import UTC, datetime
+from typing import Any
+
+import pytz
+
+from app.core.redis import redis_client
+from app.models.earthquake import EarthquakeData, ShakingArea
+from app.models.enums import AlertStatus, Location
+from app.services.earthquake import classify_severity, process_earthquake_data
+from app.services.metrics import observe_realtime_noop_tick
+from app.utils.json_backend import dumps
+from app.utils.logger import logger
+from app.utils.realtime_data_handler import CONFIG, fetch_realtime_data
+from app.utils.stage_timer import time_stage
+
+# +/- fraction of the poll interval added at random to every wait
+REALTIME_POLL_JITTER = float(os.getenv("REALTIME_POLL_JITTER", "0.1"))
+# smallest intensity change of an area that is processed again
+REALTIME_INTENSITY_EPSILON = float(os.getenv("REALTIME_INTENSITY_EPSILON", "0.5"))
+
+NO_REALTIME_DATA = {"message": "No realtime earthquake data available at the moment."}
+
+# response body of GET /api/earthquake/realtime, replaced by the poller on every tick
+realtime_snapshot: dict[str, Any] = NO_REALTIME_DATA
+
+# (intensity, intensity level) per area as last sent to process_earthquake_data
+emitted_area_states: dict[Location, tuple[float, int]] = {}
+
+
+def get_realtime_snapshot() -> dict[str, Any]:
+    return realtime_snapshot
+
+
+def build_realtime_data(area_statuses: list[dict[str, Any]]) -> EarthquakeData | None:
+    """Builds the realtime earthquake, or None when no target area is shaking."""
+    # Determine origin_time from the most recent lastUpdate, default to now
+    latest_update_time = None
+    for status_item in area_statuses:
+        current_item_update_time = status_item.get("lastUpdate")
+        if current_item_update_time and (
+            latest_update_time is None or current_item_update_time > latest_update_time
+        ):
+            latest_update_time = current_item_update_time
+
+    taipei_tz = pytz.timezone("Asia/Taipei")
+    if latest_update_time:
+        # Ensure datetime is timezone-aware (assume UTC if naive, then convert to Taipei)
+        if latest_update_time.tzinfo is None:
+            latest_update_time = latest_update_time.replace(tzinfo=UTC)
+        origin_time_str = latest_update_time.astimezone(taipei_tz).isoformat()
+    else:
+        # If no specific update time, use current time in Taipei timezone
+        origin_time_str = datetime.now(taipei_tz).isoformat()
+
+    shaking_area_list = []
+    earthquake_flag = False
+    for area_data in area_statuses:
+        area_name = area_data.get("name")
+
+        if area_name is not None:
+            intensity = float(area_data.get("intensity_float", 0.0))
+            if intensity > 0:
+                earthquake_flag = True
+            shaking_area_list.append(
+                ShakingArea(county_name=area_name, area_intensity=intensity),
+            )
+
+    if not earthquake_flag:
+        return None
+
+    return EarthquakeData(
+        source="TREM-Lite",
+        origin_time=origin_time_str,
+        epicenter_location="",
+        magnitude_value=0,
+        focal_depth=0,
+        shaking_area=shaking_area_list,
+    )
+
+
+def area_state_changed(
+    previous: tuple[float, int] | None,
+    current: tuple[float, int],
+) -> bool:
+    """Whether an area moved enough since it was last processed to process it again."""
+    if previous is None:
+        return True
+    previous_intensity, previous_level = previous
+    intensity, level = current
+    return (
+        level != previous_level
+        or classify_severity(0, intensity) != classify_severity(0, previous_intensity)
+        or abs(intensity - previous_intensity) > REALTIME_INTENSITY_EPSILON
+    )
+
+
+def get_changed_area_states(
+    area_statuses: list[dict[str, Any]],
+) -> dict[Location, tuple[float, int]]:
+    """Returns the state of the areas that changed since they were last processed."""
+    changed = {}
+    for area_data in area_statuses:
+        area_name = area_data.get("name")
+        if area_name is None:
+            continue
+        state = (
+            float(area_data.get("intensity_float", 0.0)),
+            int(area_data.get("intensity", 0)),
+        )
+        if area_state_changed(emitted_area_states.get(area_name), state):
+            changed[area_name] = state
+    return changed
+
+
+async def poll_realtime_data() -> dict[str, Any]:
+    """Fetches RTS once, generates and publishes its alerts and updates the snapshot.
+
+    Only the areas whose state changed since they were last processed are
+    sent to process_earthquake_data; a tick without changes is skipped.
+    """
+    global realtime_snapshot
+
+    area_statuses = await fetch_realtime_data()
+    # wall clock, so replicas receiving the alert can compute its delivery latency
+    ingested_at = time.time()
+    formatted_data = build_realtime_data(area_statuses) if area_statuses else None
+    if formatted_data is None:
+        # the next shake is processed from scratch
+        emitted_area_states.clear()
+        realtime_snapshot = NO_REALTIME_DATA
+        return realtime_snapshot
+
+    realtime_snapshot = {
+        "message": "Realtime earthquake data fetched successfully",
+        "data": formatted_data,
+    }
+
+    changed = get_changed_area_states(area_statuses)
+    if not changed:
+        observe_realtime_noop_tick()
+        return realtime_snapshot
+
+    # An earthquake is currently happening, generate corresponding events and alerts
+    alerts = await process_earthquake_data(
+        formatted_data.model_copy(
+            update={
+                "shaking_area": [
+                    area
+                    for area in formatted_data.shaking_area
+                    if area.county_name in changed
+                ],
+            },
+        ),
+    )
+    emitted_area_states.update(changed)
+
+    with time_stage("publish"):
+        for alert in alerts:
+            # log realtime alert
+            logger.info(
+                f"Received realtime alert ID {alert.id} from source {alert.source} at {alert.location.value}.",
+            )
+
+            # Publish alert to redis channel
+            await redis_client.publish(
+                "alerts",
+                dumps(
+                    {
+                        "type": AlertStatus.OPEN,
+                        "alert": alert.model_dump_json(by_alias=True),
+                        "ingestedAt": ingested_at,
+                    },
+                ),
+            )
+
+    return realtime_snapshot
+
+
+def next_poll_delay(elapsed: float) -> float:
+    """Seconds to wait before the next poll, keeping the interval with jitter."""
+    interval = CONFIG["interval"] / 1000
+    jitter = random.uniform(-REALTIME_POLL_JITTER, REALTIME_POLL_JITTER) * interval
+    return max(interval - elapsed + jitter, 0)
+
+
+async def run_realtime_poller() -> None:
+    """Polls RTS every CONFIG["interval"] until cancelled."""
+    while True:
+        start = time.monotonic()
+        try:
+            await poll_realtime_data()
+        except Exception:
+            logger.exception("Failed to poll realtime earthquake data.")
+        await asyncio.sleep(next_poll_delay(time.monotonic() - start))
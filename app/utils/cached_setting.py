@@ -0,0 +1,78 @@
+import time
+from collections.abc import Callable
+from typing import Generic, TypeVar
+
+from redis.asyncio import Redis
+
+T = TypeVar("T")
+
+# carries the redis key of a setting whenever its value changes
+SETTINGS_CHANNEL = "settings"
+
+
+class CachedSetting(Generic[T]):
+    """Setting stored in Redis and cached in memory.
+
+    ``set`` publishes the key on ``SETTINGS_CHANNEL`` so every replica drops
+    its cached value; ``ttl_seconds`` bounds staleness when a message is
+    missed, e.g. while the subscription reconnects.
+    """
+
+    def __init__(
+        self,
+        client: Redis,
+        key: str,
+        parse: Callable[[str], T],
+        default: T,
+        ttl_seconds: float,
+    ) -> None:
+        self.client = client
+        self.key = key
+        self.parse = parse
+        self.default = default
+        self.ttl_seconds = ttl_seconds
+        self._value: T | None = None
+        self._expires_at = 0.0
+        # bumped by invalidate, so a read racing with it is not cached
+        self._generation = 0
+        cached_settings[key] = self
+
+    async def get(self) -> T:
+        if self._value is not None and time.monotonic() < self._expires_at:
+            return self._value
+
+        generation = self._generation
+        raw = await self.client.get(self.key)
+        if raw:
+            value = self.parse(raw.decode() if isinstance(raw, bytes) else raw)
+        else:
+            # fall back to the default if the setting was never stored
+            value = self.default
+        if generation == self._generation:
+            self._value = value
+            self._expires_at = time.monotonic() + self.ttl_seconds
+        return value
+
+    async def set(self, value: T) -> None:
+        await self.client.set(self.key, str(value))
+        self.invalidate()
+        await self.client.publish(SETTINGS_CHANNEL, self.key)
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        self._value = None
+        self._expires_at = 0.0
+
+
+cached_settings: dict[str, CachedSetting] = {}
+
+
+def invalidate_setting(key: bytes | str) -> None:
+    setting = cached_settings.get(key.decode() if isinstance(key, bytes) else key)
+    if setting:
+        setting.invalidate()
+
+
+def invalidate_all_settings() -> None:
+    for setting in cached_settings.values():
+        setting.invalidate()
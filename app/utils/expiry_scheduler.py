@@ -0,0 +1,93 @@
+import asyncio
+import heapq
+import itertools
+import time
+from collections.abc import Callable, Hashable
+
+from app.utils.logger import logger
+
+
+class ExpiryScheduler:
+    """Run a callback when its key expires, driven by a single event-loop timer.
+
+    Scheduling a key that is still pending moves its deadline instead of
+    queuing a second callback, so repeated expiries of the same key coalesce.
+    Outside a running event loop, due callbacks run on the next ``schedule``
+    or ``run_expired`` call.
+    """
+
+    def __init__(self) -> None:
+        self._pending: dict[Hashable, tuple[float, Callable[[], None]]] = {}
+        self._heap: list[tuple[float, int, Hashable]] = []
+        self._counter = itertools.count()
+        self._timer: asyncio.TimerHandle | None = None
+        self._timer_deadline: float | None = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def schedule(
+        self,
+        key: Hashable,
+        delay_seconds: float,
+        callback: Callable[[], None],
+    ) -> None:
+        deadline = time.monotonic() + delay_seconds
+        self._pending[key] = (deadline, callback)
+        heapq.heappush(self._heap, (deadline, next(self._counter), key))
+
+        # drop heap entries superseded by reschedules once they dominate
+        if len(self._heap) > 2 * len(self._pending) + 64:
+            self._heap = [
+                (deadline, next(self._counter), key)
+                for key, (deadline, _) in self._pending.items()
+            ]
+            heapq.heapify(self._heap)
+
+        self.run_expired()
+        self._arm()
+
+    def run_expired(self, now: float | None = None) -> int:
+        """Run callbacks of every expired key and return how many ran."""
+        now = time.monotonic() if now is None else now
+        expired = 0
+        while self._heap and self._heap[0][0] <= now:
+            deadline, _, key = heapq.heappop(self._heap)
+            entry = self._pending.get(key)
+            if entry is None or entry[0] != deadline:
+                # the key was rescheduled after this entry was pushed
+                continue
+
+            del self._pending[key]
+            expired += 1
+            try:
+                entry[1]()
+            except Exception:
+                logger.exception(f"Expiry callback for {key} failed.")
+        return expired
+
+    def _arm(self) -> None:
+        if not self._heap:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+
+        deadline = self._heap[0][0]
+        if self._timer is not None:
+            if self._timer_deadline is not None and self._timer_deadline <= deadline:
+                return
+            self._timer.cancel()
+
+        self._timer_deadline = deadline
+        self._timer = loop.call_later(
+            max(deadline - time.monotonic(), 0),
+            self._on_timer,
+        )
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._timer_deadline = None
+        self.run_expired()
+        self._arm()
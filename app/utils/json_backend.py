@@ -0,0 +1,89 @@
+"""JSON encoding and decoding with the fastest installed library.
+
+orjson (the ``orjson`` extra) or msgspec is used when installed, the standard
+library otherwise. Every backend encodes compactly and without escaping
+non-ASCII text, like ``WebSocket.send_json``, and raises ValueError on
+malformed input, so callers do not depend on the backend in use.
+"""
+
+import json
+import os
+from collections.abc import Callable
+from enum import Enum
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the installed extras
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - depends on the installed extras
+    msgspec = None
+
+
+class JsonBackend(str, Enum):
+    # the first installed of orjson, msgspec and stdlib
+    AUTO = "auto"
+    ORJSON = "orjson"
+    MSGSPEC = "msgspec"
+    STDLIB = "stdlib"
+
+
+JSON_BACKEND = JsonBackend(os.getenv("JSON_BACKEND", JsonBackend.AUTO.value))
+
+
+def _stdlib_loads(data: bytes | str) -> Any:
+    return json.loads(data)
+
+
+def _stdlib_dumps(obj: Any) -> str:
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+
+def _orjson_dumps(obj: Any) -> str:
+    return orjson.dumps(obj).decode("utf-8")
+
+
+def _msgspec_loads(data: bytes | str) -> Any:
+    try:
+        return msgspec.json.decode(data)
+    except msgspec.DecodeError as e:
+        raise ValueError(str(e)) from e
+
+
+def _msgspec_dumps(obj: Any) -> str:
+    return msgspec.json.encode(obj).decode("utf-8")
+
+
+def resolve_backend(backend: JsonBackend) -> JsonBackend:
+    """The backend actually used for ``backend``, falling back to stdlib."""
+    if backend == JsonBackend.AUTO:
+        if orjson is not None:
+            return JsonBackend.ORJSON
+        if msgspec is not None:
+            return JsonBackend.MSGSPEC
+        return JsonBackend.STDLIB
+    if (backend == JsonBackend.ORJSON and orjson is None) or (
+        backend == JsonBackend.MSGSPEC and msgspec is None
+    ):
+        return JsonBackend.STDLIB
+    return backend
+
+
+def get_codec(
+    backend: JsonBackend,
+) -> tuple[Callable[[bytes | str], Any], Callable[[Any], str]]:
+    """The ``(loads, dumps)`` pair of ``backend``."""
+    backend = resolve_backend(backend)
+    if backend == JsonBackend.ORJSON:
+        # orjson.JSONDecodeError is a ValueError already
+        return orjson.loads, _orjson_dumps
+    if backend == JsonBackend.MSGSPEC:
+        return _msgspec_loads, _msgspec_dumps
+    return _stdlib_loads, _stdlib_dumps
+
+
+active_backend = resolve_backend(JSON_BACKEND)
+loads, dumps = get_codec(active_backend)
@@ -0,0 +1,20 @@
+import asyncio
+import os
+import time
+
+from app.services.metrics import observe_event_loop_lag
+
+# seconds between two event loop lag samples
+EVENT_LOOP_LAG_INTERVAL = float(os.getenv("EVENT_LOOP_LAG_INTERVAL", "0.1"))
+
+
+async def run_loop_lag_monitor(interval: float = EVENT_LOOP_LAG_INTERVAL) -> None:
+    """Records how late the event loop wakes up a sleeping task, until cancelled.
+
+    Anything that holds the loop, e.g. decoding a large JSON payload on it,
+    delays the wake up and shows up as lag.
+    """
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        observe_event_loop_lag(max(time.perf_counter() - start - interval, 0))
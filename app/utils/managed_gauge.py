@@ -0,0 +1,90 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterable, Sequence
+
+from prometheus_client import REGISTRY, Counter, Gauge
+from prometheus_client.registry import Collector
+
+METRICS_LABEL_TTL = float(os.getenv("METRICS_LABEL_TTL", "3600"))
+METRICS_LABEL_MAX_SERIES = int(os.getenv("METRICS_LABEL_MAX_SERIES", "1000"))
+
+metric_label_evictions_total = Counter(
+    "metric_label_evictions_total",
+    "Total number of label sets evicted from managed gauges",
+    ["metric"],
+)
+
+
+class ManagedGauge:
+    """Gauge that forgets label sets it has not seen for a while.
+
+    Per-event labels such as ``id`` make the registry grow with every ingest.
+    A label set is removed once it has not been updated for ``ttl_seconds``,
+    or, least recently updated first, once the gauge holds more than
+    ``max_series`` label sets. Prometheus keeps the history of removed series,
+    they only stop being exported.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str],
+        *,
+        ttl_seconds: float = METRICS_LABEL_TTL,
+        max_series: int = METRICS_LABEL_MAX_SERIES,
+    ) -> None:
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.max_series = max_series
+        self._gauge = Gauge(name, documentation, labelnames)
+        self._labelnames = tuple(labelnames)
+        self._last_used: OrderedDict[tuple[str, ...], float] = OrderedDict()
+        self._lock = threading.Lock()
+        _managed_gauges.append(self)
+
+    def __len__(self) -> int:
+        return len(self._last_used)
+
+    def labels(self, **labelkwargs: object) -> Gauge:
+        labelvalues = tuple(str(labelkwargs[name]) for name in self._labelnames)
+        now = time.monotonic()
+        with self._lock:
+            self._last_used[labelvalues] = now
+            self._last_used.move_to_end(labelvalues)
+            self._evict(now)
+        return self._gauge.labels(*labelvalues)
+
+    def evict_expired(self) -> None:
+        with self._lock:
+            self._evict(time.monotonic())
+
+    def _evict(self, now: float) -> None:
+        while self._last_used:
+            labelvalues, last_used = next(iter(self._last_used.items()))
+            if (
+                len(self._last_used) <= self.max_series
+                and now - last_used < self.ttl_seconds
+            ):
+                return
+
+            del self._last_used[labelvalues]
+            self._gauge.remove(*labelvalues)
+            metric_label_evictions_total.labels(metric=self.name).inc()
+
+
+_managed_gauges: list[ManagedGauge] = []
+
+
+class _ManagedGaugeSweeper(Collector):
+    """Evict expired label sets of idle gauges whenever metrics are scraped."""
+
+    def collect(self) -> Iterable:
+        for gauge in _managed_gauges:
+            gauge.evict_expired()
+        return []
+
+
+REGISTRY.register(_ManagedGaugeSweeper())
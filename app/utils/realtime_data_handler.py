@@ -1,11 +1,20 @@
+import asyncio
 import datetime
-import random
+import hashlib
+import importlib.util
+import os
 import time
+from enum import Enum
+from pathlib import Path
 from typing import Any
 
 import httpx
 
 from app.models.enums import Location
+from app.utils import json_backend
+from app.utils.logger import logger
+from app.utils.server_selector import ServerSelector
+from app.utils.station_aggregates import AreaStations
 
 # Configuration parameters (translated from JS CONFIG)
 CONFIG: dict[str, Any] = {
@@ -43,15 +52,59 @@ CONFIG: dict[str, Any] = {
 # Intensity scale text representation (from JS INTENSITY_LIST) - REMOVED as unused
 # INTENSITY_LIST: list[str] = ["0", "1", "2", "3", "4", "5⁻", "5⁺", "6⁻", "6⁺", "7"]
 
+# Connection pool of the shared HTTP client
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "10"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+# httpx only speaks HTTP/2 when h2 is installed (the `http2` extra)
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+class AreaAggregation(str, Enum):
+    # every target station overwrites its area, the last one wins
+    LAST_STATION = "last_station"
+    # the stations of an area are aggregated with NumPy, see AreaStations
+    VECTORIZED = "vectorized"
+
+
+REALTIME_AREA_AGGREGATION = AreaAggregation(
+    os.getenv("REALTIME_AREA_AGGREGATION", AreaAggregation.VECTORIZED.value),
+)
+# area intensity is this percentile of its station intensities when vectorized
+REALTIME_AREA_INTENSITY_PERCENTILE = float(
+    os.getenv("REALTIME_AREA_INTENSITY_PERCENTILE", "90"),
+)
+
+# last station info, loaded on a cold start instead of waiting for the API
+STATION_INFO_CACHE_FILE = Path(
+    os.getenv("STATION_INFO_CACHE_FILE", "data/station_info.json"),
+)
+
 # Global state variables
+http_client: httpx.AsyncClient | None = None
 request_counter: int = 0
 is_offline: bool = False
 area_status: dict[int, dict[str, Any]] = {}
 station_info: dict[str, Any] | None = None
+# station_id -> (target area config, latest station info), only target area stations
+station_area_index: dict[str, tuple[dict[str, Any], dict[str, Any]]] = {}
+# the same stations as arrays, for the vectorized aggregation
+area_stations = AreaStations({}, [area["code"] for area in CONFIG["targetAreas"]])
 last_station_info_fetch: float = 0.0
+# validators of the station info document, for conditional requests
+station_info_etag: str | None = None
+station_info_last_modified: str | None = None
+station_info_hash: str | None = None
+station_info_refresh: asyncio.Task | None = None
 STATION_INFO_INTERVAL: int = 5 * 60 * 1000  # 5 minutes in milliseconds
 # unified_magnitude: float = 0.0 - REMOVED as unused
 
+# health of every API and load balancer host, to pick and hedge between them
+server_selectors = {
+    server_type: ServerSelector(servers)
+    for server_type, servers in CONFIG["servers"].items()
+}
+
 # Initialize status for each target area
 for area in CONFIG["targetAreas"]:
     area_status[area["code"]] = {
@@ -64,66 +117,212 @@ for area in CONFIG["targetAreas"]:
     }
 
 
-async def fetch_data(url: str, timeout_ms: int = 1000) -> httpx.Response | None:
+def create_http_client() -> httpx.AsyncClient:
+    """Creates a keep-alive HTTP client, negotiating HTTP/2 where h2 is installed."""
+    return httpx.AsyncClient(
+        http2=HTTP2_AVAILABLE,
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+    )
+
+
+async def start_http_client() -> None:
+    """Opens the shared HTTP client, called on app startup."""
+    global http_client
+    if http_client is None:
+        http_client = create_http_client()
+
+
+async def close_http_client() -> None:
+    """Closes the shared HTTP client and its pooled connections, called on app shutdown."""
+    global http_client
+    if http_client is not None:
+        await http_client.aclose()
+        http_client = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Returns the shared HTTP client, opening it if the app did not."""
+    global http_client
+    if http_client is None:
+        http_client = create_http_client()
+    return http_client
+
+
+async def fetch_data(
+    url: str,
+    timeout_ms: int = 1000,
+    headers: dict[str, str] | None = None,
+) -> httpx.Response | None:
     """Custom fetch function with timeout and error handling using httpx."""
     global is_offline
     timeout_seconds = timeout_ms / 1000.0
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(
-                url,
-                timeout=timeout_seconds,
-                headers={"Cache-Control": "no-cache"},
-            )
+    try:
+        response = await get_http_client().get(
+            url,
+            timeout=timeout_seconds,
+            headers={"Cache-Control": "no-cache", **(headers or {})},
+        )
+        # a 304 answers a conditional request, httpx would raise on it
+        if response.status_code != httpx.codes.NOT_MODIFIED:
             response.raise_for_status()  # Raise an exception for HTTP errors (4xx or 5xx)
 
-            if is_offline:
-                # Consider using logging instead of print for library/module code
-                # print(f"[realtime_data_handler.py] -> Network connection restored")
-                is_offline = False
-            return response
-        except httpx.TimeoutException:
-            if not is_offline:
-                # print(f"[realtime_data_handler.py] -> Request timed out | {url}")
-                is_offline = True
-            return None
-        except httpx.RequestError:
-            if not is_offline:
-                # print(f"[realtime_data_handler.py] -> Request failed: {url} | {error}")
-                is_offline = True
-            return None
-
-
-def get_random_server(server_type: str) -> str:
-    """Gets a random server from the CONFIG."""
-    servers = CONFIG["servers"].get(server_type, CONFIG["servers"]["lb"])
-    return random.choice(servers)
+        if is_offline:
+            # Consider using logging instead of print for library/module code
+            # print(f"[realtime_data_handler.py] -> Network connection restored")
+            is_offline = False
+        return response
+    except httpx.TimeoutException:
+        if not is_offline:
+            # print(f"[realtime_data_handler.py] -> Request timed out | {url}")
+            is_offline = True
+        return None
+    except httpx.RequestError:
+        if not is_offline:
+            # print(f"[realtime_data_handler.py] -> Request failed: {url} | {error}")
+            is_offline = True
+        return None
 
 
-async def get_station_info() -> dict[str, Any] | None:
-    """Fetches station information."""
-    global station_info, last_station_info_fetch
-    now = time.time() * 1000
+def build_station_area_index(
+    info: dict[str, Any],
+) -> dict[str, tuple[dict[str, Any], dict[str, Any]]]:
+    """Maps the stations located in a target area to that area and their latest info."""
+    areas_by_code = {area["code"]: area for area in CONFIG["targetAreas"]}
+    index = {}
+    for station_id, station_details in info.items():
+        if not isinstance(station_details, dict) or not station_details.get("info"):
+            continue
+
+        latest_info = station_details["info"][-1]
+        target_area_config = areas_by_code.get(latest_info.get("code"))
+        if target_area_config:
+            index[station_id] = (target_area_config, latest_info)
+    return index
+
+
+def get_server_selector(server_type: str) -> ServerSelector:
+    """Gets the selector of the servers of a type, falling back to the load balancers."""
+    return server_selectors.get(server_type, server_selectors["lb"])
+
+
+def set_station_info(
+    new_station_info: dict[str, Any],
+    content_hash: str | None,
+) -> None:
+    """Replaces the station info and rebuilds the lookups derived from it."""
+    global station_info, station_area_index, area_stations, station_info_hash
+    station_area_index = build_station_area_index(new_station_info)
+    area_stations = AreaStations(
+        station_area_index,
+        [area["code"] for area in CONFIG["targetAreas"]],
+    )
+    station_info = new_station_info
+    station_info_hash = content_hash
+
+
+def save_station_info_cache(body: bytes) -> None:
+    """Persists the station info document together with its validators."""
+    envelope = json_backend.dumps(
+        {
+            "etag": station_info_etag,
+            "lastModified": station_info_last_modified,
+            "hash": station_info_hash,
+        },
+    ).encode("utf-8")
+    STATION_INFO_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    temp_file = STATION_INFO_CACHE_FILE.with_suffix(".tmp")
+    # splice the body in as is instead of serializing the parsed stations again
+    temp_file.write_bytes(envelope[:-1] + b',"stations":' + body + b"}")
+    temp_file.replace(STATION_INFO_CACHE_FILE)
+
+
+async def load_station_info_cache() -> bool:
+    """Loads the station info persisted by a previous run, returns whether it did."""
+    global station_info_etag, station_info_last_modified
+    try:
+        cached = await asyncio.to_thread(
+            lambda: json_backend.loads(STATION_INFO_CACHE_FILE.read_bytes()),
+        )
+        stations = cached["stations"]
+    except (OSError, ValueError, KeyError, TypeError):
+        return False
+
+    set_station_info(stations, cached.get("hash"))
+    station_info_etag = cached.get("etag")
+    station_info_last_modified = cached.get("lastModified")
+    logger.info(f"Loaded {len(stations)} stations from {STATION_INFO_CACHE_FILE}.")
+    return True
+
+
+async def refresh_station_info() -> dict[str, Any] | None:
+    """Revalidates the station info against the API.
+
+    The document is only parsed when the API returns new content, and the
+    derived lookups are only rebuilt when its hash changed.
+    """
+    global last_station_info_fetch, station_info_etag, station_info_last_modified
+    headers = {}
+    if station_info is not None:
+        if station_info_etag:
+            headers["If-None-Match"] = station_info_etag
+        if station_info_last_modified:
+            headers["If-Modified-Since"] = station_info_last_modified
+
+    response = await get_server_selector("api").request(
+        lambda server: fetch_data(
+            f"https://{server}/api/v1/trem/station",
+            CONFIG["timeout"]["STATION"],
+            headers,
+        ),
+    )
+    if response is None:
+        # print(f"[realtime_data_handler.py] -> Failed to fetch station information")
+        return None
+
+    last_station_info_fetch = time.time() * 1000
+    if response.status_code == httpx.codes.NOT_MODIFIED:
+        return station_info
 
-    if station_info and (now - last_station_info_fetch < STATION_INFO_INTERVAL):
+    station_info_etag = response.headers.get("ETag")
+    station_info_last_modified = response.headers.get("Last-Modified")
+    body = response.content
+    content_hash = hashlib.sha256(body).hexdigest()
+    if content_hash == station_info_hash:
         return station_info
 
-    server = get_random_server("api")
-    url = f"https://{server}/api/v1/trem/station"
-    response = await fetch_data(url, CONFIG["timeout"]["STATION"])
+    try:
+        new_station_info = json_backend.loads(body)
+    except ValueError:  # Includes JSONDecodeError
+        # print(f"[realtime_data_handler.py] -> Failed to decode JSON from station info")
+        return None
+    set_station_info(new_station_info, content_hash)
+
+    try:
+        await asyncio.to_thread(save_station_info_cache, body)
+    except OSError:
+        logger.warning(f"Failed to save station info to {STATION_INFO_CACHE_FILE}.")
+    return station_info
+
+
+async def get_station_info() -> dict[str, Any] | None:
+    """Returns the station information, refreshed every STATION_INFO_INTERVAL.
 
-    if response:
-        try:
-            station_info = response.json()
-            last_station_info_fetch = now
-            # print(f"[realtime_data_handler.py] -> Station information updated successfully")
-            return station_info
-        except ValueError:  # Includes JSONDecodeError
-            # print(f"[realtime_data_handler.py] -> Failed to decode JSON from station info: {url}")
-            return None
+    Only a cold start without a cache file waits for the API; otherwise the
+    current stations are returned while a refresh runs in the background.
+    """
+    global station_info_refresh
+    if station_info is None and not await load_station_info_cache():
+        return await refresh_station_info()
 
-    # print(f"[realtime_data_handler.py] -> Failed to fetch station information")
-    return None
+    now = time.time() * 1000
+    stale = now - last_station_info_fetch >= STATION_INFO_INTERVAL
+    if stale and (station_info_refresh is None or station_info_refresh.done()):
+        station_info_refresh = asyncio.create_task(refresh_station_info())
+    return station_info
 
 
 async def process_target_area_data(data: dict[str, Any]) -> dict[str, Any] | None:
@@ -142,27 +341,21 @@ async def process_target_area_data(data: dict[str, Any]) -> dict[str, Any] | Non
         "updatedAreas": [],
     }
 
+    if REALTIME_AREA_AGGREGATION == AreaAggregation.VECTORIZED:
+        update_area_aggregates(data["station"], result)
+        return result
+
     # total_intensity_float_sum: float = 0.0 - REMOVED as unused
     # counted_stations: int = 0 - REMOVED as unused
 
-    for station_id, station_data in data["station"].items():
-        station_details = current_station_info.get(station_id)
-        if (
-            not station_details
-            or not station_details.get("info")
-            or not station_details["info"]
-        ):
+    # only look up the target area stations, the rest of the feed is skipped
+    rts_stations = data["station"]
+    for station_id, (target_area_config, latest_info) in station_area_index.items():
+        station_data = rts_stations.get(station_id)
+        if not station_data:
             continue
 
-        latest_info = station_details["info"][-1]
-        area_code = latest_info.get("code")
-
-        target_area_config = next(
-            (area for area in CONFIG["targetAreas"] if area["code"] == area_code),
-            None,
-        )
-        if not target_area_config:
-            continue
+        area_code = target_area_config["code"]
 
         pga = float(station_data.get("pga", 0.0))
         # Assuming station_data['i'] is a float or string convertible to float for detailed intensity
@@ -201,18 +394,54 @@ async def process_target_area_data(data: dict[str, Any]) -> dict[str, Any] | Non
     return result
 
 
+def update_area_aggregates(
+    rts_stations: dict[str, dict[str, Any]],
+    result: dict[str, Any],
+) -> None:
+    """Updates area_status from the aggregated readings of each area's stations."""
+    areas_by_code = {area["code"]: area for area in CONFIG["targetAreas"]}
+    aggregates = area_stations.aggregate(
+        rts_stations,
+        REALTIME_AREA_INTENSITY_PERCENTILE,
+    )
+    now = datetime.datetime.now()
+    for area_code, aggregate in aggregates.items():
+        current_area_stat = area_status[area_code]
+        current_area_stat.update(aggregate)
+        current_area_stat["intensity_text"] = str(aggregate["intensity_float"])
+        current_area_stat["magnitude"] = "0.0"
+        current_area_stat["lastUpdate"] = now
+        result["updatedAreas"].append(
+            {
+                "code": area_code,
+                "name": areas_by_code[area_code]["name"],
+                "pga": aggregate["pga"],
+                "intensityFloat": f"{aggregate['intensity_float']:.2f}",
+                "intensity": aggregate["intensity"],
+                "intensityMax": f"{aggregate['intensity_max']:.2f}",
+                "intensityMean": f"{aggregate['intensity_mean']:.2f}",
+                "stationCount": aggregate["station_count"],
+                "magnitude": "0.0",
+            },
+        )
+
+
 async def fetch_realtime_data() -> list[dict[str, Any]]:
     """Fetches real-time data and returns a list of area statuses."""
     global area_status
 
-    server = get_random_server("lb")
-    url = f"https://{server}/api/v2/trem/rts"
-
     try:
-        rts_response = await fetch_data(url, CONFIG["timeout"]["RTS"])
+        # fails over and hedges to the next healthiest load balancer
+        rts_response = await get_server_selector("lb").request(
+            lambda server: fetch_data(
+                f"https://{server}/api/v2/trem/rts",
+                CONFIG["timeout"]["RTS"],
+            ),
+        )
+
         if rts_response:
             try:
-                rts_data = rts_response.json()
+                rts_data = json_backend.loads(rts_response.content)
             except ValueError:  # Includes JSONDecodeError
                 # print(f"[realtime_data_handler.py] -> Failed to decode JSON from RTS: {url}")
                 rts_data = None
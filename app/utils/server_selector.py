@@ -0,0 +1,155 @@
+import asyncio
+import contextlib
+import os
+import random
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from typing import TypeVar
+
+from app.services.metrics import observe_upstream_hedge, observe_upstream_request
+
+T = TypeVar("T")
+
+# weight of the latest request in the latency and error rate averages
+UPSTREAM_EWMA_ALPHA = float(os.getenv("UPSTREAM_EWMA_ALPHA", "0.3"))
+# a second host is asked once the first is slower than this latency quantile
+UPSTREAM_HEDGE_QUANTILE = float(os.getenv("UPSTREAM_HEDGE_QUANTILE", "0.95"))
+# hedge delay used until a host has this many latency samples
+UPSTREAM_HEDGE_MIN_SAMPLES = int(os.getenv("UPSTREAM_HEDGE_MIN_SAMPLES", "20"))
+UPSTREAM_HEDGE_DEFAULT_DELAY_MS = int(
+    os.getenv("UPSTREAM_HEDGE_DEFAULT_DELAY_MS", "500"),
+)
+# host stats older than this are dropped, so an unhealthy host is tried again
+UPSTREAM_STATS_TTL = float(os.getenv("UPSTREAM_STATS_TTL", "60"))
+
+# latency samples kept per host for the hedge quantile
+LATENCY_WINDOW = 100
+# an error counts as this many seconds of latency when ranking hosts
+ERROR_PENALTY = 2
+
+
+class HostStats:
+    def __init__(self) -> None:
+        self.latency: float | None = None
+        self.error_rate = 0.0
+        self.latencies: deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self.updated_at = time.monotonic()
+
+    def score(self) -> float:
+        """Lower is better; hosts without samples come first to get some."""
+        return (self.latency or 0.0) + ERROR_PENALTY * self.error_rate
+
+
+class ServerSelector:
+    """Sends requests to the healthiest of a set of interchangeable hosts.
+
+    Hosts are ranked by an EWMA of their latency, penalized by an EWMA of
+    their error rate. A failed request fails over to the next host, and when
+    a host has not answered by its p95 latency the request is hedged: the next
+    host is asked too and whichever answers first wins.
+    """
+
+    def __init__(self, hosts: list[str]) -> None:
+        self.hosts = hosts
+        self.stats = {host: HostStats() for host in hosts}
+
+    def get_stats(self, host: str) -> HostStats:
+        stats = self.stats[host]
+        if time.monotonic() - stats.updated_at > UPSTREAM_STATS_TTL:
+            stats = self.stats[host] = HostStats()
+        return stats
+
+    def ranked(self) -> list[str]:
+        """Hosts from healthiest to least healthy, ties in random order."""
+        return sorted(
+            self.hosts,
+            key=lambda host: (self.get_stats(host).score(), random.random()),
+        )
+
+    def record(self, host: str, latency: float, *, ok: bool) -> None:
+        stats = self.get_stats(host)
+        alpha = UPSTREAM_EWMA_ALPHA
+        stats.error_rate = alpha * (not ok) + (1 - alpha) * stats.error_rate
+        if ok:
+            stats.latencies.append(latency)
+            stats.latency = (
+                latency
+                if stats.latency is None
+                else alpha * latency + (1 - alpha) * stats.latency
+            )
+        stats.updated_at = time.monotonic()
+        observe_upstream_request(host, latency, ok=ok)
+
+    def hedge_delay(self, host: str) -> float:
+        """Seconds to wait for ``host`` before asking the next host as well."""
+        latencies = self.get_stats(host).latencies
+        if len(latencies) < UPSTREAM_HEDGE_MIN_SAMPLES:
+            return UPSTREAM_HEDGE_DEFAULT_DELAY_MS / 1000
+        ordered = sorted(latencies)
+        return ordered[
+            min(int(len(ordered) * UPSTREAM_HEDGE_QUANTILE), len(ordered) - 1)
+        ]
+
+    async def request(self, send: Callable[[str], Awaitable[T | None]]) -> T | None:
+        """Returns the first result of ``send(host)`` that is not None, or None.
+
+        At most two requests are in flight at a time; the other one is
+        cancelled once one succeeds.
+        """
+        hosts = deque(self.ranked())
+        pending: set[asyncio.Task] = set()
+        last_host = hosts[0]
+
+        def launch() -> None:
+            nonlocal last_host
+            last_host = hosts.popleft()
+            pending.add(asyncio.create_task(self._attempt(last_host, send)))
+
+        launch()
+        try:
+            while pending:
+                can_hedge = hosts and len(pending) < 2
+                done, _ = await asyncio.wait(
+                    pending,
+                    timeout=self.hedge_delay(last_host) if can_hedge else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    # slower than usual, ask the next host too
+                    observe_upstream_hedge(last_host)
+                    launch()
+                    continue
+
+                for task in done:
+                    pending.discard(task)
+                    result = task.result()
+                    if result is not None:
+                        return result
+                # failed, fail over to the next host
+                if hosts and len(pending) < 2:
+                    launch()
+            return None
+        finally:
+            for task in pending:
+                task.cancel()
+            for task in pending:
+                with contextlib.suppress(asyncio.CancelledError):
+                    await task
+
+    async def _attempt(
+        self,
+        host: str,
+        send: Callable[[str], Awaitable[T | None]],
+    ) -> T | None:
+        start = time.perf_counter()
+        try:
+            result = await send(host)
+        except asyncio.CancelledError:
+            # lost to a hedged request, count it against the slow host
+            self.record(host, time.perf_counter() - start, ok=False)
+            raise
+        except Exception:
+            result = None
+        self.record(host, time.perf_counter() - start, ok=result is not None)
+        return result
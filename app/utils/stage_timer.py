@@ -0,0 +1,47 @@
+import functools
+import inspect
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from typing import Any, TypeVar
+
+from app.services.metrics import observe_pipeline_stage
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+@contextmanager
+def time_stage(stage: str) -> Iterator[None]:
+    """Records the duration of the block in the pipeline stage histogram.
+
+    The duration is recorded when the block raises too, so a failing stage
+    still shows where the time went.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_pipeline_stage(stage, time.perf_counter() - start)
+
+
+def timed_stage(stage: str) -> Callable[[F], F]:
+    """Decorator form of ``time_stage``, for both plain and async functions."""
+
+    def decorate(func: F) -> F:
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                with time_stage(stage):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with time_stage(stage):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
@@ -0,0 +1,46 @@
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+
+
+class TTLSet:
+    """Bounded set whose members expire ``ttl_seconds`` after being added.
+
+    Once more than ``max_entries`` members are held, the oldest ones are
+    dropped first. Expired members are dropped lazily on access.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._expires_at: OrderedDict[Hashable, float] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._expires_at)
+
+    def __contains__(self, key: Hashable) -> bool:
+        expires_at = self._expires_at.get(key)
+        if expires_at is None:
+            return False
+        if expires_at <= time.monotonic():
+            del self._expires_at[key]
+            return False
+        return True
+
+    def add(self, key: Hashable) -> None:
+        now = time.monotonic()
+        self._expires_at[key] = now + self.ttl_seconds
+        self._expires_at.move_to_end(key)
+
+        # members are ordered by insertion, so the oldest expire first
+        while self._expires_at:
+            oldest, expires_at = next(iter(self._expires_at.items()))
+            if len(self._expires_at) <= self.max_entries and expires_at > now:
+                break
+            del self._expires_at[oldest]
+
+    def discard(self, key: Hashable) -> None:
+        self._expires_at.pop(key, None)
+
+    def clear(self) -> None:
+        self._expires_at.clear()
@@ -1,9 +1,9 @@
-import asyncio
 import os
+from typing import Annotated
 
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect
 
-from .manager import manager
+from .manager import WireFormat, manager
 
 router = APIRouter()
 
@@ -13,11 +13,17 @@ def get_ping_interval() -> int:
 
 
 @router.websocket("/ws/alerts")
-async def alerts_websocket(websocket: WebSocket) -> None:
-    await manager.connect(websocket)
+async def alerts_websocket(
+    websocket: WebSocket,
+    wire_format: Annotated[WireFormat, Query(alias="format")] = WireFormat.V1,
+) -> None:
+    client = await manager.connect(websocket, wire_format)
     try:
         while True:
             await websocket.send_text("ping")
-            await asyncio.sleep(get_ping_interval())
-    except WebSocketDisconnect:
+            # the manager closes slow or failed clients, stop pinging them
+            if await client.wait_closed(get_ping_interval()):
+                return
+    except (WebSocketDisconnect, RuntimeError):
+        # RuntimeError: starlette refuses to send on a socket that is already closed
         manager.disconnect(websocket)
@@ -1,21 +1,200 @@
+import asyncio
+import contextlib
+import os
+import time
+from enum import Enum
+from typing import NamedTuple
+
 from fastapi import WebSocket
 
+from app.services.metrics import (
+    observe_alert_delivery,
+    observe_alert_origin_delivery,
+    observe_websocket_slow_consumer,
+)
+from app.utils.json_backend import dumps, loads
+from app.utils.logger import logger
+
+
+class SlowConsumerPolicy(str, Enum):
+    # discard the oldest queued message to make room for the new one
+    DROP_OLDEST = "drop_oldest"
+    # discard the whole backlog, the client only receives the newest message
+    COALESCE = "coalesce"
+    # close the connection, the client is expected to reconnect
+    DISCONNECT = "disconnect"
+
+
+class WireFormat(str, Enum):
+    # alert embedded as a JSON encoded string, {"type": ..., "alert": "{...}"}
+    V1 = "v1"
+    # alert embedded as a nested object, {"type": ..., "alert": {...}}
+    V2 = "v2"
+
+
+class AlertTiming(NamedTuple):
+    """Wall clock times the delivery latencies of an alert are measured from."""
+
+    ingested_at: float
+    # None when the origin time has no known offset
+    origin_at: float | None
+
+
+WEBSOCKET_SEND_QUEUE_SIZE = int(os.getenv("WEBSOCKET_SEND_QUEUE_SIZE", "100"))
+WEBSOCKET_SLOW_CONSUMER_POLICY = SlowConsumerPolicy(
+    os.getenv("WEBSOCKET_SLOW_CONSUMER_POLICY", SlowConsumerPolicy.DROP_OLDEST.value),
+)
+
+
+class WebSocketClient:
+    """Bounded outbound queue of a connection, drained by its own writer task."""
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        manager: "WebSocketManager",
+        wire_format: WireFormat,
+    ) -> None:
+        self.websocket = websocket
+        self.wire_format = wire_format
+        self.queue: asyncio.Queue[tuple[str, AlertTiming | None]] = asyncio.Queue(
+            maxsize=manager.queue_size,
+        )
+        self.writer = asyncio.create_task(self._write(manager))
+        self.closer: asyncio.Task | None = None
+        self.closed = asyncio.Event()
+
+    async def _write(self, manager: "WebSocketManager") -> None:
+        while True:
+            message, timing = await self.queue.get()
+            try:
+                await self.websocket.send_text(message)
+            except Exception:
+                logger.warning("Failed to send message, dropping websocket client.")
+                manager.disconnect(self.websocket)
+                return
+            finally:
+                self.queue.task_done()
+            if timing is not None:
+                observe_delivery(timing, time.time())
+
+    def close(self) -> None:
+        self.writer.cancel()
+        self.closed.set()
+
+    async def wait_closed(self, seconds: float) -> bool:
+        """Wait up to ``seconds`` for the client to be closed, returning whether it was."""
+        with contextlib.suppress(TimeoutError):
+            await asyncio.wait_for(self.closed.wait(), seconds)
+        return self.closed.is_set()
+
+    def force_close(self) -> None:
+        self.close()
+        self.closer = asyncio.create_task(self._close_websocket())
+
+    async def _close_websocket(self) -> None:
+        with contextlib.suppress(Exception):
+            # 1013: try again later
+            await self.websocket.close(code=1013)
+
 
 class WebSocketManager:
-    def __init__(self) -> None:
-        self.connections: list[WebSocket] = []
+    def __init__(
+        self,
+        queue_size: int = WEBSOCKET_SEND_QUEUE_SIZE,
+        policy: SlowConsumerPolicy = WEBSOCKET_SLOW_CONSUMER_POLICY,
+    ) -> None:
+        self.queue_size = queue_size
+        self.policy = policy
+        self.connections: dict[WebSocket, WebSocketClient] = {}
 
-    async def connect(self, websocket: WebSocket) -> None:
+    async def connect(
+        self,
+        websocket: WebSocket,
+        wire_format: WireFormat = WireFormat.V1,
+    ) -> WebSocketClient:
         await websocket.accept()
-        self.connections.append(websocket)
+        client = WebSocketClient(websocket, self, wire_format)
+        self.connections[websocket] = client
+        return client
 
     def disconnect(self, websocket: WebSocket) -> None:
-        if websocket in self.connections:
-            self.connections.remove(websocket)
+        client = self.connections.pop(websocket, None)
+        if client:
+            client.close()
+
+    async def broadcast(self, message: dict | str) -> None:
+        """Queue a message for every client without waiting for the sends.
+
+        The message is encoded once and the same text is sent to all clients.
+        """
+        frame = message if isinstance(message, str) else encode_frame(message)
+        for client in list(self.connections.values()):
+            self._enqueue(client, frame)
+
+    async def broadcast_alert(
+        self,
+        message: bytes | str,
+        timing: AlertTiming | None = None,
+    ) -> None:
+        """Fan out an alert notification published in the v1 wire format.
+
+        v1 clients receive the published text as is. The v2 frame is encoded
+        once, and only when a v2 client is connected. With ``timing``, the
+        delivery latency is recorded as each client is sent the alert.
+        """
+        v1_frame = message.decode("utf-8") if isinstance(message, bytes) else message
+        v2_frame = None
+        for client in list(self.connections.values()):
+            if client.wire_format == WireFormat.V1:
+                self._enqueue(client, v1_frame, timing)
+                continue
+            if v2_frame is None:
+                v2_frame = to_v2_frame(v1_frame)
+            self._enqueue(client, v2_frame, timing)
+
+    def _enqueue(
+        self,
+        client: WebSocketClient,
+        message: str,
+        timing: AlertTiming | None = None,
+    ) -> None:
+        if not client.queue.full():
+            client.queue.put_nowait((message, timing))
+            return
+
+        observe_websocket_slow_consumer(self.policy.value)
+        if self.policy == SlowConsumerPolicy.DISCONNECT:
+            self.connections.pop(client.websocket, None)
+            client.force_close()
+            return
+
+        dropped = (
+            1 if self.policy == SlowConsumerPolicy.DROP_OLDEST else client.queue.qsize()
+        )
+        for _ in range(dropped):
+            client.queue.get_nowait()
+            client.queue.task_done()
+        client.queue.put_nowait((message, timing))
+
+
+def observe_delivery(timing: AlertTiming, sent_at: float) -> None:
+    """Records the latencies of an alert that was just sent to a client."""
+    observe_alert_delivery(sent_at - timing.ingested_at)
+    if timing.origin_at is not None:
+        observe_alert_origin_delivery(sent_at - timing.origin_at)
+
+
+def encode_frame(message: dict) -> str:
+    # same encoding as WebSocket.send_json
+    return dumps(message)
+
 
-    async def broadcast(self, message: dict) -> None:
-        for connection in self.connections:
-            await connection.send_json(message)
+def to_v2_frame(v1_frame: str) -> str:
+    message = loads(v1_frame)
+    if isinstance(message.get("alert"), str):
+        message["alert"] = loads(message["alert"])
+    return encode_frame(message)
 
 
 manager = WebSocketManager()
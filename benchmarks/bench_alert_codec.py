@@ -0,0 +1,71 @@
+"""Compare the JSON and binary encodings of stored alerts.
+
+Reports the bytes per alert and how long decoding a batch takes through
+``validate_batch``, which is what ``get_data_by_prefix`` and the alert store
+run on every MGET page. Binary alerts are decoded both with full validation
+and through the trusted path.
+
+Usage: ``uv run python -m benchmarks.bench_alert_codec [alert_count]``
+"""
+
+import asyncio
+import sys
+from collections.abc import Callable
+from datetime import datetime, timedelta
+from functools import partial
+
+from app.core.alert_codec import AlertCodec, decode_alert, encode_alert
+from app.core.redis import validate_batch
+from app.models.earthquake import EarthquakeAlert
+from app.models.enums import AlertStatus, Location, SeverityLevel, TriState
+from benchmarks.common import format_stats, time_async
+
+
+def make_alerts(count: int) -> list[EarthquakeAlert]:
+    locations = list(Location)
+    origin_time = datetime(2024, 5, 22, 10, 0, 0)
+    return [
+        EarthquakeAlert(
+            id=f"{i}-{locations[i % len(locations)].value}",
+            source="TREM-Lite",
+            origin_time=origin_time + timedelta(seconds=i),
+            location=locations[i % len(locations)],
+            severity_level=SeverityLevel.L2,
+            status=AlertStatus.OPEN,
+            has_damage=TriState.UNKNOWN,
+            needs_command_center=TriState.UNKNOWN,
+            processing_duration=0,
+        )
+        for i in range(count)
+    ]
+
+
+async def main(alert_count: int) -> None:
+    alerts = make_alerts(alert_count)
+    print(f"{alert_count} alerts")
+
+    for label, codec, trusted in (
+        ("json", AlertCodec.JSON, False),
+        ("binary (validated)", AlertCodec.BINARY, False),
+        ("binary (trusted)", AlertCodec.BINARY, True),
+    ):
+        raws = [encode_alert(alert, codec) for alert in alerts]
+        size = sum(len(raw) for raw in raws) / alert_count
+        decode = partial(decode_alert, trusted=trusted)
+
+        async def decode_batch(
+            raws: list[bytes] = raws,
+            decode: Callable = decode,
+        ) -> None:
+            validate_batch(raws, EarthquakeAlert, decode)
+
+        stats = await time_async(decode_batch)
+        rate = alert_count / stats["median"] * 1000
+        print(
+            f"{format_stats(label, stats)} | "
+            f"{size:6.1f} B/alert | {rate:10,.0f} alerts/s",
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000))
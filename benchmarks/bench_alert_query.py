@@ -0,0 +1,89 @@
+"""Measure GET /api/earthquake/alerts for a dashboard showing the latest 50 alerts.
+
+For growing backlogs of open alerts, compares loading and sorting every open
+alert (the previous behaviour) with a ``limit=50`` page read from the index,
+and reports the JSON response size of both.
+
+Usage: ``uv run python -m benchmarks.bench_alert_query [max_alerts]``
+"""
+
+import asyncio
+import sys
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from app.core import alert_store
+from app.core import redis as redis_module
+from app.models.earthquake import EarthquakeAlert
+from app.models.enums import AlertStatus, Location, SeverityLevel, TriState
+from app.models.response import PaginatedResponse
+from benchmarks.common import format_stats, make_redis, time_async
+
+PAGE_SIZE = 50
+
+
+def make_alerts(start: int, count: int) -> list[EarthquakeAlert]:
+    locations = list(Location)
+    origin_time = datetime(2024, 5, 22, 10, 0, 0)
+    return [
+        EarthquakeAlert(
+            id=f"{i}-{locations[i % len(locations)].value}",
+            source="Benchmark",
+            origin_time=origin_time + timedelta(seconds=i),
+            location=locations[i % len(locations)],
+            severity_level=SeverityLevel.L2,
+            status=AlertStatus.OPEN,
+            has_damage=TriState.UNKNOWN,
+            needs_command_center=TriState.UNKNOWN,
+            processing_duration=0,
+        )
+        for i in range(start, start + count)
+    ]
+
+
+async def list_all() -> int:
+    alerts = await alert_store.get_open_alerts()
+    alerts.sort(
+        key=lambda alert: (
+            -alert.origin_time.timestamp(),
+            alert.location.value,
+            alert.source,
+        ),
+    )
+    response = PaginatedResponse(message="", data=alerts)
+    return len(response.model_dump_json())
+
+
+async def latest_page() -> int:
+    alerts, next_cursor = await alert_store.query_open_alerts(limit=PAGE_SIZE)
+    response = PaginatedResponse(message="", data=alerts, next_cursor=next_cursor)
+    return len(response.model_dump_json())
+
+
+async def main(max_alerts: int) -> None:
+    client = make_redis()
+    await client.flushdb()
+
+    with (
+        patch.object(redis_module, "redis_client", client),
+        patch.object(alert_store, "redis_client", client),
+    ):
+        loaded = 0
+        backlog = 1_000
+        while backlog <= max_alerts:
+            await alert_store.save_alerts(make_alerts(loaded, backlog - loaded))
+            loaded = backlog
+
+            print(f"{backlog} open alerts")
+            for label, query in (("all alerts", list_all), ("latest 50", latest_page)):
+                size = await query()
+                stats = await time_async(query)
+                print(f"{format_stats(label, stats)} | {size / 1024:8.1f} KiB")
+            backlog *= 10
+
+    await client.flushdb()
+    await client.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000))
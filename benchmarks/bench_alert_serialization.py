@@ -0,0 +1,90 @@
+"""Compare per-alert serialization CPU of the websocket fan-out paths.
+
+``per-client send_json`` reproduces the previous listener: decode the pub/sub
+message once, then let every ``send_json`` encode it again. ``broadcast_alert``
+forwards the published text and encodes the v2 frame at most once.
+
+Usage: ``uv run python -m benchmarks.bench_alert_serialization``
+"""
+
+import asyncio
+import json
+import time
+from datetime import datetime
+
+from app.models.earthquake import EarthquakeAlert
+from app.models.enums import AlertStatus, Location, SeverityLevel, TriState
+from app.websockets.manager import WebSocketManager, WireFormat
+
+ALERTS = 200
+
+
+class NullWebSocket:
+    async def accept(self) -> None:
+        pass
+
+    async def send_text(self, message: str) -> None:
+        pass
+
+    async def send_json(self, message: dict) -> None:
+        # what starlette does before sending
+        await self.send_text(json.dumps(message, separators=(",", ":")))
+
+
+def make_message() -> str:
+    alert = EarthquakeAlert(
+        id="8afe3df4-10b8-4031-acdc-3477dac40e98-Taipei",
+        source="TREM-Lite",
+        origin_time=datetime.now(),
+        location=Location.TAIPEI,
+        severity_level=SeverityLevel.L2,
+        status=AlertStatus.OPEN,
+        has_damage=TriState.UNKNOWN,
+        needs_command_center=TriState.UNKNOWN,
+        processing_duration=0,
+    )
+    return json.dumps(
+        {"type": AlertStatus.OPEN, "alert": alert.model_dump_json(by_alias=True)},
+    )
+
+
+async def per_client_send_json(clients: list[NullWebSocket], message: str) -> None:
+    data = json.loads(message)
+    for client in clients:
+        await client.send_json(data)
+
+
+async def main() -> None:
+    message = make_message()
+    for client_count in (10, 100, 500):
+        sockets = [NullWebSocket() for _ in range(client_count)]
+
+        start = time.process_time()
+        for _ in range(ALERTS):
+            await per_client_send_json(sockets, message)
+        baseline = (time.process_time() - start) / ALERTS * 1e6
+
+        results = []
+        for wire_format in (WireFormat.V1, WireFormat.V2):
+            manager = WebSocketManager(queue_size=ALERTS)
+            for websocket in sockets:
+                await manager.connect(websocket, wire_format)
+            start = time.process_time()
+            for _ in range(ALERTS):
+                await manager.broadcast_alert(message)
+            enqueue = time.process_time() - start
+            for client in manager.connections.values():
+                await client.queue.join()
+            results.append(enqueue / ALERTS * 1e6)
+            for websocket in sockets:
+                manager.disconnect(websocket)
+
+        print(
+            f"{client_count:>4} clients | per-client send_json {baseline:8.1f} us/alert"
+            f" | broadcast_alert v1 {results[0]:7.1f} us/alert"
+            f" | v2 {results[1]:7.1f} us/alert",
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
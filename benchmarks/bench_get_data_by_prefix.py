@@ -0,0 +1,64 @@
+"""Compare per-key GET and pipelined MGET reads in ``get_data_by_prefix``.
+
+Usage: ``uv run python -m benchmarks.bench_get_data_by_prefix [alert_count]``
+"""
+
+import asyncio
+import sys
+from datetime import datetime
+from unittest.mock import patch
+
+from app.core import redis as redis_module
+from app.models.earthquake import EarthquakeAlert
+from app.models.enums import AlertStatus, Location, SeverityLevel, TriState
+from benchmarks.common import format_stats, make_redis, time_async
+
+
+async def main(alert_count: int) -> None:
+    client = make_redis()
+    await client.flushdb()
+
+    locations = list(Location)
+    async with client.pipeline(transaction=False) as pipe:
+        for i in range(alert_count):
+            location = locations[i % len(locations)]
+            alert = EarthquakeAlert(
+                id=f"{i}-{location.value}",
+                source="Benchmark",
+                origin_time=datetime.now(),
+                location=location,
+                severity_level=SeverityLevel.L2,
+                status=AlertStatus.OPEN,
+                has_damage=TriState.UNKNOWN,
+                needs_command_center=TriState.UNKNOWN,
+                processing_duration=0,
+            )
+            pipe.set(
+                f"alert_{alert.source}_{location.value}_{alert.id}",
+                alert.model_dump_json(),
+            )
+        await pipe.execute()
+
+    print(f"{alert_count} alert keys loaded")
+    with patch.object(redis_module, "redis_client", client):
+        for batch_size in (100, 1000):
+            for bulk in (False, True):
+                label = f"{'mget' if bulk else 'per-key get'} (batch={batch_size})"
+                stats = await time_async(
+                    lambda bulk=bulk, batch_size=batch_size: (
+                        redis_module.get_data_by_prefix(
+                            "alert",
+                            EarthquakeAlert,
+                            batch_size,
+                            bulk=bulk,
+                        )
+                    ),
+                )
+                print(format_stats(label, stats))
+
+    await client.flushdb()
+    await client.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000))
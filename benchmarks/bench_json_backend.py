@@ -0,0 +1,93 @@
+"""Compare the JSON backends on an RTS tick, and the event loop lag it causes.
+
+The tick is the shape of ``/api/v2/trem/rts`` at 2k and 20k stations. Lag is
+the longest a 1 ms heartbeat task was kept waiting while the tick was
+decoded on the loop.
+
+Usage: ``uv run python -m benchmarks.bench_json_backend``
+"""
+
+import asyncio
+import contextlib
+import json
+import random
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from app.utils.json_backend import JsonBackend, get_codec, resolve_backend
+from benchmarks.common import format_stats, time_async
+
+STATION_COUNTS = (2_000, 20_000)
+
+
+def make_tick(station_count: int) -> bytes:
+    rts = {
+        "time": 0,
+        "station": {
+            str(n): {
+                "pga": random.uniform(0, 50),
+                "pgv": random.uniform(0, 5),
+                "i": random.uniform(0, 4),
+                "I": random.randint(0, 4),
+                "alert": False,
+            }
+            for n in range(station_count)
+        },
+        "box": {},
+    }
+    return json.dumps(rts).encode("utf-8")
+
+
+async def max_loop_lag(
+    decode: Callable[[], Awaitable[Any]],
+    repeat: int = 10,
+) -> float:
+    """Longest heartbeat delay in milliseconds while ``decode`` runs ``repeat`` times."""
+    lags = [0.0]
+
+    async def heartbeat() -> None:
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lags.append(time.perf_counter() - start - 0.001)
+
+    task = asyncio.create_task(heartbeat())
+    await asyncio.sleep(0.01)
+    for _ in range(repeat):
+        await decode()
+        await asyncio.sleep(0.002)
+    task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await task
+    return max(lags) * 1000
+
+
+async def main() -> None:
+    random.seed(0)
+    backends = [
+        backend
+        for backend in (JsonBackend.ORJSON, JsonBackend.MSGSPEC, JsonBackend.STDLIB)
+        if resolve_backend(backend) == backend
+    ]
+    for station_count in STATION_COUNTS:
+        body = make_tick(station_count)
+        print(f"{station_count} stations per tick ({len(body) / 1024:.0f} KiB)")
+        for backend in backends:
+            loads, _ = get_codec(backend)
+
+            async def on_loop(
+                loads: Callable[[bytes], Any] = loads,
+                body: bytes = body,
+            ) -> Any:
+                return loads(body)
+
+            stats = await time_async(on_loop, repeat=20)
+            print(format_stats(backend.value, stats))
+
+            lag = await max_loop_lag(on_loop)
+            print(f"{'':<32} max loop lag {lag:6.2f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,63 @@
+"""Soak test for metric cardinality: RSS and ``/metrics`` render time vs ingests.
+
+Every ingest uses a fresh earthquake id, like TREM polling does. With managed
+gauges both numbers should flatten once ``METRICS_LABEL_MAX_SERIES`` is hit.
+
+Usage: ``uv run python -m benchmarks.bench_metrics_soak [ingests]``
+"""
+
+import os
+import resource
+import sys
+import time
+from datetime import datetime
+from uuid import uuid4
+
+from prometheus_client import REGISTRY, generate_latest
+
+from app.models.earthquake import EarthquakeData, ShakingArea
+from app.models.enums import Location
+from app.services.earthquake import generate_events
+from app.services.metrics import observe_earthquake_data, observe_earthquake_events
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        # peak rather than current RSS, reported in KiB on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main(ingests: int) -> None:
+    template = EarthquakeData(
+        source="Soak",
+        origin_time=datetime.now(),
+        epicenter_location="Hualien",
+        magnitude_value=4.0,
+        focal_depth=10.0,
+        shaking_area=[
+            ShakingArea(county_name=location, area_intensity=2) for location in Location
+        ],
+    )
+
+    checkpoint = max(ingests // 10, 1)
+    print(f"{'ingests':>10} | {'rss MB':>8} | {'render ms':>9} | {'payload KB':>10}")
+    for i in range(1, ingests + 1):
+        data = template.model_copy(update={"id": uuid4()})
+        observe_earthquake_data(data)
+        observe_earthquake_events(generate_events(data))
+
+        if i % checkpoint == 0:
+            start = time.perf_counter()
+            payload = generate_latest(REGISTRY)
+            render_ms = (time.perf_counter() - start) * 1000
+            print(
+                f"{i:>10} | {rss_mb():>8.1f} | {render_ms:>9.1f} | "
+                f"{len(payload) / 1024:>10.0f}",
+            )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
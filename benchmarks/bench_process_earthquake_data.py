@@ -0,0 +1,100 @@
+"""Measure ingest latency and Redis round trips of ``process_earthquake_data``.
+
+Runs once with the real four locations and once with 100 synthetic ones. The
+synthetic locations are added by extending the ``Location`` enum before the
+app models are imported, so each run happens in its own interpreter.
+
+Usage: ``uv run python -m benchmarks.bench_process_earthquake_data [locations]``
+Set ``BENCH_RTT_MS`` to change the simulated network round trip (default 1 ms).
+"""
+
+import asyncio
+import os
+import subprocess
+import sys
+from datetime import datetime
+from enum import Enum
+from unittest.mock import patch
+
+import app.models.enums as enums
+
+
+def extend_locations(count: int) -> None:
+    members = {location.name: location.value for location in enums.Location}
+    for i in range(len(members), count):
+        members[f"SYNTHETIC_{i}"] = f"Synthetic{i}"
+    enums.Location = Enum("Location", members, type=str)
+
+
+async def run(location_count: int) -> None:
+    from app.core import alert_store
+    from app.core import redis as redis_module
+    from app.models.earthquake import EarthquakeData, ShakingArea
+    from app.services import dedup
+    from app.services.earthquake import process_earthquake_data
+    from benchmarks.common import format_stats, make_redis, simulate_network, time_async
+
+    client = make_redis()
+    await client.flushdb()
+    stats = simulate_network(client, float(os.getenv("BENCH_RTT_MS", "1")))
+
+    def make_data() -> EarthquakeData:
+        return EarthquakeData(
+            source="Benchmark",
+            origin_time=datetime.now(),
+            epicenter_location="Hualien",
+            magnitude_value=4.0,
+            focal_depth=10.0,
+            shaking_area=[
+                ShakingArea(county_name=location, area_intensity=3)
+                for location in enums.Location
+            ],
+        )
+
+    with (
+        patch.object(alert_store, "redis_client", client),
+        patch.object(redis_module, "redis_client", client),
+        patch.object(dedup, "redis_client", client),
+        # the cached setting keeps the client it was created with
+        patch.object(redis_module.alert_suppress_time, "client", client),
+    ):
+        # first ingest creates alerts, the following ones are suppressed
+        stats["round_trips"] = 0
+        first = await time_async(lambda: process_earthquake_data(make_data()), 1)
+        first_round_trips = stats["round_trips"]
+
+        stats["round_trips"] = 0
+        repeat = 20
+        suppressed = await time_async(
+            lambda: process_earthquake_data(make_data()),
+            repeat,
+        )
+        suppressed_round_trips = stats["round_trips"] / repeat
+
+    print(f"{location_count} locations")
+    print(format_stats("  alerting ingest", first), f"| {first_round_trips} RTs")
+    print(
+        format_stats("  suppressed ingest", suppressed),
+        f"| {suppressed_round_trips:.0f} RTs",
+    )
+
+    await client.flushdb()
+    await client.aclose()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        count = int(sys.argv[1])
+        extend_locations(count)
+        asyncio.run(run(count))
+    else:
+        for count in (4, 100):
+            subprocess.run(  # noqa: S603
+                [
+                    sys.executable,
+                    "-m",
+                    "benchmarks.bench_process_earthquake_data",
+                    str(count),
+                ],
+                check=True,
+            )
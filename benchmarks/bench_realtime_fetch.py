@@ -0,0 +1,135 @@
+"""Measure per-poll latency of ``fetch_data`` against a local HTTPS stand-in.
+
+Starts a uvicorn server with a self-signed certificate that serves a canned
+RTS payload, then polls it with a new ``httpx.AsyncClient`` per request (the
+previous behaviour) and with the shared pooled client. Loopback has no network
+latency, so the gap only shows the TCP and TLS handshake cost; against the
+real servers every saved handshake also saves its round trips.
+
+Requires the ``openssl`` CLI to create the certificate.
+
+Usage: ``uv run python -m benchmarks.bench_realtime_fetch [polls]``
+"""
+
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+
+from app.utils import realtime_data_handler as rdh
+from benchmarks.common import format_stats, time_async
+
+RTS_PAYLOAD = {
+    "time": 0,
+    "station": {str(1000 + i): {"pga": 0.1, "pgv": 0.01, "i": 0.5} for i in range(800)},
+}
+
+
+def create_certificate(directory: Path) -> tuple[str, str]:
+    certfile = directory / "cert.pem"
+    keyfile = directory / "key.pem"
+    subprocess.run(  # noqa: S603
+        [  # noqa: S607
+            "openssl",
+            "req",
+            "-x509",
+            "-newkey",
+            "rsa:2048",
+            "-nodes",
+            "-days",
+            "1",
+            "-subj",
+            "/CN=localhost",
+            "-addext",
+            "subjectAltName=DNS:localhost,IP:127.0.0.1",
+            "-keyout",
+            str(keyfile),
+            "-out",
+            str(certfile),
+        ],
+        check=True,
+        capture_output=True,
+    )
+    return str(certfile), str(keyfile)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(certfile: str, keyfile: str, port: int) -> uvicorn.Server:
+    app = FastAPI()
+
+    @app.get("/api/v1/trem/rts")
+    async def rts() -> dict:
+        return RTS_PAYLOAD
+
+    server = uvicorn.Server(
+        uvicorn.Config(
+            app,
+            host="127.0.0.1",
+            port=port,
+            ssl_certfile=certfile,
+            ssl_keyfile=keyfile,
+            log_level="warning",
+        ),
+    )
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+
+async def fetch_with_new_client(url: str, timeout_ms: int = 1000) -> None:
+    async with httpx.AsyncClient() as client:
+        response = await client.get(
+            url,
+            timeout=timeout_ms / 1000.0,
+            headers={"Cache-Control": "no-cache"},
+        )
+        response.raise_for_status()
+
+
+async def fetch_with_shared_client(url: str) -> None:
+    response = await rdh.fetch_data(url)
+    assert response is not None
+
+
+async def main(polls: int) -> None:
+    port = free_port()
+    url = f"https://localhost:{port}/api/v1/trem/rts"
+
+    with tempfile.TemporaryDirectory() as directory:
+        certfile, keyfile = create_certificate(Path(directory))
+        # httpx trusts the certificate through SSL_CERT_FILE
+        os.environ["SSL_CERT_FILE"] = certfile
+        server = start_server(certfile, keyfile, port)
+
+        new_client = await time_async(lambda: fetch_with_new_client(url), polls)
+
+        await rdh.start_http_client()
+        # warm up, the first poll opens the pooled connection
+        await fetch_with_shared_client(url)
+        shared_client = await time_async(lambda: fetch_with_shared_client(url), polls)
+        await rdh.close_http_client()
+
+        server.should_exit = True
+
+    print(f"{polls} polls of {url}")
+    print(format_stats("new client per poll", new_client))
+    print(format_stats("shared pooled client", shared_client))
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 100))
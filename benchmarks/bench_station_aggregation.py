@@ -0,0 +1,67 @@
+"""Compare per-station and vectorized area aggregation of an RTS tick.
+
+Every station is placed in a target area, the worst case for
+``process_target_area_data``, at 2k and 20k stations per tick.
+
+Usage: ``uv run python -m benchmarks.bench_station_aggregation``
+"""
+
+import asyncio
+import random
+import time
+from unittest.mock import patch
+
+from app.utils import realtime_data_handler as rdh
+from app.utils.station_aggregates import AreaStations
+from benchmarks.common import format_stats, time_async
+
+STATION_COUNTS = (2_000, 20_000)
+
+
+def make_tick(station_count: int) -> tuple[dict, dict]:
+    area_codes = [area["code"] for area in rdh.CONFIG["targetAreas"]]
+    station_info = {
+        str(n): {
+            "info": [{"code": area_codes[n % len(area_codes)], "lat": 0, "lon": 0}],
+        }
+        for n in range(station_count)
+    }
+    intensities = [random.uniform(0, 4) for _ in range(station_count)]
+    rts = {
+        "time": 0,
+        "station": {
+            str(n): {
+                "pga": random.uniform(0, 50),
+                "i": intensity,
+                "I": round(intensity),
+            }
+            for n, intensity in enumerate(intensities)
+        },
+    }
+    return station_info, rts
+
+
+async def main() -> None:
+    random.seed(0)
+    for station_count in STATION_COUNTS:
+        station_info, rts = make_tick(station_count)
+        rdh.station_info = station_info
+        rdh.station_area_index = rdh.build_station_area_index(station_info)
+        rdh.area_stations = AreaStations(
+            rdh.station_area_index,
+            [area["code"] for area in rdh.CONFIG["targetAreas"]],
+        )
+        rdh.last_station_info_fetch = time.time() * 1000
+
+        print(f"{station_count} stations per tick")
+        for aggregation in rdh.AreaAggregation:
+            with patch.object(rdh, "REALTIME_AREA_AGGREGATION", aggregation):
+                stats = await time_async(
+                    lambda rts=rts: rdh.process_target_area_data(rts),
+                    repeat=20,
+                )
+            print(format_stats(aggregation.value, stats))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,77 @@
+"""Measure alert delivery latency of ``WebSocketManager.broadcast``.
+
+Simulates 1000 clients of which 1% stall for 200 ms on every send, then
+reports how long ``broadcast`` blocks the caller and the p50/p99 time from
+broadcast to delivery for the healthy clients.
+
+Usage: ``uv run python -m benchmarks.bench_websocket_broadcast [clients]``
+"""
+
+import asyncio
+import json
+import statistics
+import sys
+import time
+
+from app.websockets.manager import WebSocketManager
+
+SLOW_SEND_SECONDS = 0.2
+MESSAGES = 20
+
+
+class FakeWebSocket:
+    def __init__(self, delay: float, latencies: list[float] | None) -> None:
+        self.delay = delay
+        self.latencies = latencies
+
+    async def accept(self) -> None:
+        pass
+
+    async def close(self, code: int = 1000) -> None:
+        pass
+
+    async def send_text(self, message: str) -> None:
+        # yield like a real socket write would
+        await asyncio.sleep(self.delay)
+        if self.latencies is not None:
+            sent_at = json.loads(message)["sent_at"]
+            self.latencies.append(time.perf_counter() - sent_at)
+
+
+def percentile(samples: list[float], pct: int) -> float:
+    return statistics.quantiles(samples, n=100)[pct - 1] * 1000
+
+
+async def main(client_count: int) -> None:
+    manager = WebSocketManager()
+    latencies: list[float] = []
+    slow_count = max(client_count // 100, 1)
+    for i in range(client_count):
+        if i % (client_count // slow_count) == 0:
+            await manager.connect(FakeWebSocket(SLOW_SEND_SECONDS, None))
+        else:
+            await manager.connect(FakeWebSocket(0, latencies))
+
+    broadcast_times = []
+    for _ in range(MESSAGES):
+        start = time.perf_counter()
+        await manager.broadcast({"type": "OPEN", "sent_at": start})
+        broadcast_times.append(time.perf_counter() - start)
+        await asyncio.sleep(0.05)
+
+    print(f"{client_count} clients, {slow_count} slow, {MESSAGES} messages")
+    print(
+        f"broadcast call   p50 {percentile(broadcast_times, 50):8.2f} ms | "
+        f"p99 {percentile(broadcast_times, 99):8.2f} ms",
+    )
+    print(
+        f"healthy delivery p50 {percentile(latencies, 50):8.2f} ms | "
+        f"p99 {percentile(latencies, 99):8.2f} ms",
+    )
+
+    for websocket in list(manager.connections):
+        manager.disconnect(websocket)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000))
@@ -0,0 +1,81 @@
+"""Shared helpers for the benchmark scripts.
+
+Benchmarks run against an in-process fakeredis by default. Set
+``BENCH_REDIS_URL`` (e.g. ``redis://localhost:6379/15``) to run them against a
+real Redis server instead, which is where round-trip savings actually show.
+"""
+
+import asyncio
+import os
+import statistics
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from fakeredis import FakeAsyncRedis
+from redis.asyncio import Redis
+
+
+def make_redis() -> Redis:
+    url = os.getenv("BENCH_REDIS_URL")
+    if url:
+        return Redis.from_url(url)
+    return FakeAsyncRedis()
+
+
+def simulate_network(client: Redis, rtt_ms: float) -> dict[str, int]:
+    """Delay every command or pipeline by ``rtt_ms`` and count round trips.
+
+    Returns a dict whose ``round_trips`` entry is updated in place.
+    """
+    stats = {"round_trips": 0}
+    delay = rtt_ms / 1000
+
+    async def round_trip(send: Awaitable[Any]) -> Any:
+        stats["round_trips"] += 1
+        await asyncio.sleep(delay)
+        return await send
+
+    execute_command = client.execute_command
+    pipeline = client.pipeline
+
+    async def delayed_execute_command(*args: Any, **options: Any) -> Any:
+        return await round_trip(execute_command(*args, **options))
+
+    def delayed_pipeline(*args: Any, **kwargs: Any) -> Any:
+        pipe = pipeline(*args, **kwargs)
+        execute = pipe.execute
+
+        async def delayed_execute(*execute_args: Any, **execute_kwargs: Any) -> Any:
+            return await round_trip(execute(*execute_args, **execute_kwargs))
+
+        pipe.execute = delayed_execute
+        return pipe
+
+    client.execute_command = delayed_execute_command
+    client.pipeline = delayed_pipeline
+    return stats
+
+
+async def time_async(
+    func: Callable[[], Awaitable[object]],
+    repeat: int = 5,
+) -> dict[str, float]:
+    """Run ``func`` ``repeat`` times and return timing stats in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "max": max(samples),
+    }
+
+
+def format_stats(label: str, stats: dict[str, float]) -> str:
+    return (
+        f"{label:<32} min {stats['min']:9.2f} ms | "
+        f"median {stats['median']:9.2f} ms | max {stats['max']:9.2f} ms"
+    )
@@ -1,10 +1,13 @@
-from collections.abc import Generator
-from unittest.mock import AsyncMock, patch
+from collections.abc import AsyncGenerator, Generator
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
+from fakeredis import FakeAsyncRedis
 from fastapi.testclient import TestClient
 
 from app.main import app
+from app.services.dedup import seen_data
+from app.utils.cached_setting import invalidate_all_settings
 
 
 @pytest.fixture
@@ -17,6 +20,7 @@ def mock_redis_methods() -> Generator[dict[str, AsyncMock]]:
     with (
         patch("app.core.redis.redis_client.set", new_callable=AsyncMock) as mock_set,
         patch("app.core.redis.redis_client.get", new_callable=AsyncMock) as mock_get,
+        patch("app.core.redis.redis_client.mget", new_callable=AsyncMock) as mock_mget,
         patch("app.core.redis.redis_client.scan", new_callable=AsyncMock) as mock_scan,
         patch(
             "app.core.redis.redis_client.delete",
@@ -26,14 +30,54 @@ def mock_redis_methods() -> Generator[dict[str, AsyncMock]]:
             "app.core.redis.redis_client.publish",
             new_callable=AsyncMock,
         ) as mock_publish,
+        patch(
+            "app.core.redis.redis_client.zrevrange",
+            new_callable=AsyncMock,
+        ) as mock_zrevrange,
+        patch("app.core.redis.redis_client.pipeline") as mock_pipeline,
     ):
+        # commands queued on a pipeline are only sent on execute()
+        pipe = MagicMock()
+        pipe.__aenter__.return_value = pipe
+        pipe.execute = AsyncMock(return_value=[])
+        mock_pipeline.return_value = pipe
+
         mock_get.return_value = None
+        mock_mget.return_value = []
         mock_scan.return_value = (0, [])
+        mock_zrevrange.return_value = []
 
         yield {
             "set": mock_set,
             "get": mock_get,
+            "mget": mock_mget,
             "scan": mock_scan,
             "delete": mock_delete,
             "publish": mock_publish,
+            "zrevrange": mock_zrevrange,
+            "pipeline": pipe,
         }
+
+
+@pytest.fixture
+async def fake_redis() -> AsyncGenerator[FakeAsyncRedis]:
+    # in-memory redis for tests that need real commands, e.g. sorted sets
+    client = FakeAsyncRedis()
+    with (
+        patch("app.core.redis.redis_client", client),
+        patch("app.core.alert_store.redis_client", client),
+        patch("app.services.autoclose.redis_client", client),
+        patch("app.services.dedup.redis_client", client),
+    ):
+        yield client
+    await client.aclose()
+
+
+@pytest.fixture(autouse=True)
+def clear_caches() -> Generator[None]:
+    # tests reuse the same earthquake data and mock the cached settings
+    seen_data.clear()
+    invalidate_all_settings()
+    yield
+    seen_data.clear()
+    invalidate_all_settings()
@@ -0,0 +1,138 @@
+from datetime import UTC, datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.core import alert_codec
+from app.models.earthquake import EarthquakeAlert
+from app.models.enums import AlertStatus, Location, SeverityLevel, TriState
+
+
+def make_alert(**overrides: object) -> EarthquakeAlert:
+    fields = {
+        "id": "abc-Hsinchu",
+        "source": "TREM-Lite",
+        "origin_time": datetime(2024, 5, 22, 10, 0, 0, 123456),
+        "location": Location.HSINCHU,
+        "severity_level": SeverityLevel.L2,
+        "status": AlertStatus.OPEN,
+        "has_damage": TriState.UNKNOWN,
+        "needs_command_center": TriState.TRUE,
+        "processing_duration": 0,
+    }
+    return EarthquakeAlert(**(fields | overrides))
+
+
+@pytest.mark.parametrize(
+    "alert",
+    [
+        make_alert(),
+        make_alert(
+            source="P_Alert",
+            location=Location.TAINAN,
+            origin_time=datetime(
+                2024,
+                5,
+                22,
+                10,
+                0,
+                tzinfo=timezone(timedelta(hours=8)),
+            ),
+            status=AlertStatus.PROCESSED,
+            processed_time=datetime(2024, 5, 22, 2, 5, tzinfo=UTC),
+            processing_duration=300,
+        ),
+        make_alert(id="測試", has_damage=TriState.FALSE),
+    ],
+)
+def test_binary_round_trip(alert: EarthquakeAlert) -> None:
+    raw = alert_codec.encode_alert(alert, alert_codec.AlertCodec.BINARY)
+    decoded = alert_codec.decode_alert(raw)
+
+    assert raw[0] == alert_codec.BINARY_V1
+    assert decoded == alert
+    # naive and aware times keep their timezone
+    assert decoded.origin_time.utcoffset() == alert.origin_time.utcoffset()
+    assert decoded.model_dump_json() == alert.model_dump_json()
+
+
+@pytest.mark.parametrize("trusted", [True, False])
+def test_binary_decodes_same_alert_trusted_or_not(trusted: bool) -> None:
+    alert = make_alert(
+        processed_time=datetime(2024, 5, 22, 10, 5),
+        processing_duration=3,
+    )
+    raw = alert_codec.encode_alert_binary(alert)
+
+    decoded = alert_codec.decode_alert(raw, trusted=trusted)
+
+    assert decoded == alert
+    assert decoded.model_fields_set == set(EarthquakeAlert.model_fields)
+    assert isinstance(decoded.severity_level, SeverityLevel)
+    assert isinstance(decoded.has_damage, TriState)
+    assert decoded.model_dump(by_alias=True) == alert.model_dump(by_alias=True)
+
+
+def test_trusted_alert_is_independent_model() -> None:
+    raw = alert_codec.encode_alert_binary(make_alert())
+    first = alert_codec.decode_alert(raw, trusted=True)
+    second = alert_codec.decode_alert(raw, trusted=True)
+
+    first.status = AlertStatus.AUTOCLOSED
+
+    assert second.status == AlertStatus.OPEN
+    assert first.model_copy(update={"id": "x"}).id == "x"
+
+
+@patch.object(
+    EarthquakeAlert,
+    "model_validate_json",
+    wraps=EarthquakeAlert.model_validate_json,
+)
+def test_legacy_json_is_always_validated(mock_validate: MagicMock) -> None:
+    alert = make_alert()
+
+    assert alert_codec.decode_alert(alert.model_dump_json(), trusted=True) == alert
+    mock_validate.assert_called_once()
+
+
+def test_binary_is_smaller_than_json() -> None:
+    alert = make_alert()
+
+    binary = alert_codec.encode_alert(alert, alert_codec.AlertCodec.BINARY)
+    json_raw = alert_codec.encode_alert(alert, alert_codec.AlertCodec.JSON)
+
+    assert len(binary) * 3 < len(json_raw)
+
+
+def test_decode_legacy_json() -> None:
+    alert = make_alert()
+
+    assert alert_codec.decode_alert(alert.model_dump_json().encode()) == alert
+    assert alert_codec.decode_alert(alert.model_dump_json()) == alert
+
+
+TRUNCATED = alert_codec.encode_alert_binary(make_alert())[:-1]
+
+
+@pytest.mark.parametrize("raw", [b"\x7fnope", b"\x01short", TRUNCATED, b""])
+@pytest.mark.parametrize("trusted", [True, False])
+def test_decode_rejects_malformed_values(raw: bytes, trusted: bool) -> None:
+    with pytest.raises(ValueError):
+        alert_codec.decode_alert(raw, trusted=trusted)
+
+
+def test_binary_layout_covers_every_enum_member() -> None:
+    # a member without a code is stored as JSON, see the next test
+    assert set(alert_codec.LOCATIONS) == set(Location)
+    assert set(alert_codec.STATUSES) == set(AlertStatus)
+
+
+@pytest.mark.parametrize("codes", ["_LOCATION_CODES", "_STATUS_CODES"])
+def test_unmapped_member_falls_back_to_json(codes: str) -> None:
+    alert = make_alert()
+    with patch.dict(getattr(alert_codec, codes), clear=True):
+        raw = alert_codec.encode_alert(alert, alert_codec.AlertCodec.BINARY)
+
+    assert raw.startswith(alert_codec.JSON_PREFIX)
+    assert alert_codec.decode_alert(raw) == alert
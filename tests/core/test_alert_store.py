@@ -0,0 +1,207 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+from fakeredis import FakeAsyncRedis
+
+from app.core import alert_codec, alert_store
+from app.models.enums import Location, SeverityLevel
+from tests.factories import make_alert
+
+
+async def test_alerts_read_back_in_any_encoding(fake_redis: FakeAsyncRedis) -> None:
+    binary = make_alert("1-Taipei")
+    legacy = make_alert(
+        "2-Taipei",
+        origin_time=binary.origin_time + timedelta(minutes=1),
+    )
+    await alert_store.save_alerts([binary, legacy])
+    # written by a release that stored alerts as JSON
+    await fake_redis.set(
+        alert_store.alert_key(legacy.source, legacy.location, legacy.id),
+        alert_codec.encode_alert(legacy, alert_codec.AlertCodec.JSON),
+    )
+
+    assert await alert_store.get_open_alerts() == [legacy, binary]
+
+
+def test_parse_alert_key() -> None:
+    key = alert_store.alert_key("P_Alert", Location.HSINCHU, "abc-Hsinchu")
+
+    assert key == "alert_P_Alert_Hsinchu_abc-Hsinchu"
+    assert alert_store.parse_alert_key(key) == ("P_Alert", "Hsinchu", "abc-Hsinchu")
+
+
+async def test_save_alerts_updates_indexes(fake_redis: FakeAsyncRedis) -> None:
+    older = make_alert("1-Taipei")
+    newer = make_alert("2-Taipei", origin_time=older.origin_time + timedelta(minutes=1))
+    other = make_alert(
+        "3-Tainan",
+        location=Location.TAINAN,
+        origin_time=older.origin_time + timedelta(seconds=30),
+    )
+
+    await alert_store.save_alerts([older, newer, other])
+
+    open_alerts = await alert_store.get_open_alerts()
+    assert [alert.id for alert in open_alerts] == ["2-Taipei", "3-Tainan", "1-Taipei"]
+
+    latest = await alert_store.get_latest_alerts(
+        [
+            ("TREM-Lite", Location.TAIPEI),
+            ("TREM-Lite", Location.HSINCHU),
+            ("TREM-Lite", Location.TAINAN),
+        ],
+    )
+    assert [alert.id if alert else None for alert in latest] == [
+        "2-Taipei",
+        None,
+        "3-Tainan",
+    ]
+
+
+async def test_remove_alerts_falls_back_to_previous_latest(
+    fake_redis: FakeAsyncRedis,
+) -> None:
+    older = make_alert("1-Taipei")
+    newer = make_alert("2-Taipei", origin_time=older.origin_time + timedelta(minutes=1))
+    await alert_store.save_alerts([older, newer])
+
+    await alert_store.remove_alerts(["alert_TREM-Lite_Taipei_2-Taipei"])
+
+    assert await fake_redis.exists("alert_TREM-Lite_Taipei_2-Taipei") == 0
+    [latest] = await alert_store.get_latest_alerts([("TREM-Lite", Location.TAIPEI)])
+    assert latest is not None
+    assert latest.id == "1-Taipei"
+    assert [alert.id for alert in await alert_store.get_open_alerts()] == ["1-Taipei"]
+
+
+async def test_get_open_alerts_prunes_stale_entries(fake_redis: FakeAsyncRedis) -> None:
+    await alert_store.save_alerts([make_alert("1-Taipei")])
+    await fake_redis.delete("alert_TREM-Lite_Taipei_1-Taipei")
+
+    assert await alert_store.get_open_alerts() == []
+    assert await fake_redis.zcard(alert_store.OPEN_ALERTS_INDEX) == 0
+
+
+async def test_rebuild_alert_index(fake_redis: FakeAsyncRedis) -> None:
+    alert = make_alert("1-Taipei")
+    await fake_redis.set("alert_TREM-Lite_Taipei_1-Taipei", alert.model_dump_json())
+
+    assert await alert_store.rebuild_alert_index() == 1
+
+    assert [a.id for a in await alert_store.get_open_alerts()] == ["1-Taipei"]
+
+
+async def test_remove_alerts_returns_keys_it_closed(fake_redis: FakeAsyncRedis) -> None:
+    await alert_store.save_alerts([make_alert("1-Taipei")])
+    key = "alert_TREM-Lite_Taipei_1-Taipei"
+
+    assert await alert_store.remove_alerts([key, "alert_TREM-Lite_Taipei_2"]) == [key]
+    assert await alert_store.remove_alerts([key]) == []
+
+
+async def test_get_open_alert_keys_before(fake_redis: FakeAsyncRedis) -> None:
+    older = make_alert("1-Taipei")
+    newer = make_alert("2-Taipei", origin_time=older.origin_time + timedelta(minutes=1))
+    await alert_store.save_alerts([newer, older])
+
+    keys = await alert_store.get_open_alert_keys_before(newer.origin_time, 10)
+
+    assert keys == ["alert_TREM-Lite_Taipei_1-Taipei"]
+    assert await alert_store.get_oldest_open_alert_time() == alert_store.to_score(
+        older.origin_time,
+    )
+
+
+async def test_query_open_alerts_pages_with_cursor(fake_redis: FakeAsyncRedis) -> None:
+    start = datetime(2024, 5, 22, 10, 0, 0)
+    alerts = [
+        make_alert(f"{i}-{location.value}", location, start + timedelta(minutes=i))
+        for i in range(3)
+        for location in (Location.TAIPEI, Location.TAINAN)
+    ]
+    await alert_store.save_alerts(alerts)
+
+    pages = []
+    cursor = None
+    with patch.object(alert_store, "ALERT_QUERY_SCAN_SIZE", 2):
+        while True:
+            page, cursor = await alert_store.query_open_alerts(limit=4, cursor=cursor)
+            pages.append([alert.id for alert in page])
+            if cursor is None:
+                break
+
+    # newest first, ties on origin time by location
+    assert pages == [
+        ["2-Tainan", "2-Taipei", "1-Tainan", "1-Taipei"],
+        ["0-Tainan", "0-Taipei"],
+    ]
+
+
+async def test_query_open_alerts_orders_ties_by_location_then_source(
+    fake_redis: FakeAsyncRedis,
+) -> None:
+    # every alert of one quake shares its origin time, and so its score
+    alerts = [
+        make_alert(f"1-{location.value}", location, source=source)
+        for location in (Location.TAIPEI, Location.HSINCHU, Location.TAINAN)
+        for source in ("TREM-Lite", "P_Alert", "CWA")
+    ]
+    await alert_store.save_alerts(alerts)
+
+    ids = []
+    cursor = None
+    with patch.object(alert_store, "ALERT_QUERY_SCAN_SIZE", 2):
+        while True:
+            page, cursor = await alert_store.query_open_alerts(limit=4, cursor=cursor)
+            ids.extend((alert.location, alert.source) for alert in page)
+            if cursor is None:
+                break
+
+    unpaged, _ = await alert_store.query_open_alerts()
+    expected = sorted((alert.location, alert.source) for alert in alerts)
+    assert ids == expected
+    assert [(alert.location, alert.source) for alert in unpaged] == expected
+
+
+async def test_query_open_alerts_filters(fake_redis: FakeAsyncRedis) -> None:
+    start = datetime(2024, 5, 22, 10, 0, 0)
+    severe = make_alert("2-Taipei", origin_time=start + timedelta(minutes=2))
+    severe.severity_level = SeverityLevel.L2
+    await alert_store.save_alerts(
+        [
+            make_alert("0-Taipei", origin_time=start),
+            make_alert("1-Tainan", Location.TAINAN, start + timedelta(minutes=1)),
+            make_alert("3-Taipei", origin_time=start, source="P_Alert"),
+            severe,
+        ],
+    )
+
+    async def ids(**filters: object) -> list[str]:
+        alerts, _ = await alert_store.query_open_alerts(**filters)
+        return [alert.id for alert in alerts]
+
+    assert await ids(location=Location.TAIPEI) == ["2-Taipei", "3-Taipei", "0-Taipei"]
+    assert await ids(source="P_Alert") == ["3-Taipei"]
+    assert await ids(source="TREM-Lite", location=Location.TAIPEI) == [
+        "2-Taipei",
+        "0-Taipei",
+    ]
+    assert await ids(severity=SeverityLevel.L2) == ["2-Taipei"]
+    assert await ids(severity=SeverityLevel.L1, location=Location.TAINAN) == [
+        "1-Tainan",
+    ]
+    assert await ids(since=start + timedelta(minutes=1)) == ["2-Taipei", "1-Tainan"]
+    assert await ids(until=start) == ["3-Taipei", "0-Taipei"]
+
+    await alert_store.remove_alerts(["alert_TREM-Lite_Taipei_2-Taipei"])
+    assert await ids(severity=SeverityLevel.L2) == []
+
+
+def test_decode_cursor_rejects_invalid_cursor() -> None:
+    cursor = alert_store.encode_cursor(1.5, "alert_TREM-Lite_Taipei_1")
+
+    assert alert_store.decode_cursor(cursor) == (1.5, "alert_TREM-Lite_Taipei_1")
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        alert_store.decode_cursor("not-a-cursor")
@@ -1,7 +1,11 @@
 from unittest.mock import AsyncMock, patch
 
+import fakeredis
 import pytest
+from fakeredis.aioredis import FakeAsyncRedisConnection
+from prometheus_client import REGISTRY
 from pydantic import BaseModel
+from redis.asyncio import Redis
 
 import app.core.redis as redis_module
 
@@ -54,14 +58,17 @@ async def test_get_alert_suppress_time_not_found(mock_get: AsyncMock) -> None:
 @pytest.mark.asyncio
 @patch("app.core.redis.redis_client.get", new_callable=AsyncMock)
 @patch("app.core.redis.redis_client.scan", new_callable=AsyncMock)
-async def test_get_data_by_prefix(mock_scan: AsyncMock, mock_get: AsyncMock) -> None:
+async def test_get_data_by_prefix_per_key(
+    mock_scan: AsyncMock,
+    mock_get: AsyncMock,
+) -> None:
     # Simulate scan returning one key then done
     mock_scan.side_effect = [(1, [b"test_1"]), (0, [])]
 
     data_json = '{"id": "1", "value": 42}'
     mock_get.return_value = data_json.encode("utf-8")
 
-    results = await redis_module.get_data_by_prefix("test", DummyModel)
+    results = await redis_module.get_data_by_prefix("test", DummyModel, bulk=False)
 
     assert len(results) == 1
     assert isinstance(results[0], DummyModel)
@@ -70,3 +77,146 @@ async def test_get_data_by_prefix(mock_scan: AsyncMock, mock_get: AsyncMock) ->
 
     assert mock_scan.call_count == 2
     mock_get.assert_awaited_with(b"test_1")
+
+
+@pytest.mark.asyncio
+@patch("app.core.redis.redis_client.mget", new_callable=AsyncMock)
+@patch("app.core.redis.redis_client.scan", new_callable=AsyncMock)
+async def test_get_data_by_prefix_bulk(
+    mock_scan: AsyncMock,
+    mock_mget: AsyncMock,
+) -> None:
+    mock_scan.side_effect = [(1, [b"test_1", b"test_2"]), (0, [b"test_3"])]
+    mock_mget.side_effect = [
+        [b'{"id": "1", "value": 1}', None],
+        [b"not json"],
+    ]
+
+    results = await redis_module.get_data_by_prefix("test", DummyModel, batch_size=2)
+
+    assert [result.id for result in results] == ["1"]
+    mock_scan.assert_any_await(cursor=0, match="test_*", count=2)
+    assert mock_mget.await_count == 2
+    mock_mget.assert_any_await([b"test_1", b"test_2"])
+
+
+@pytest.mark.asyncio
+@patch("app.core.redis.redis_client.mget", new_callable=AsyncMock)
+@patch("app.core.redis.redis_client.scan", new_callable=AsyncMock)
+async def test_get_data_by_prefix_skips_empty_pages(
+    mock_scan: AsyncMock,
+    mock_mget: AsyncMock,
+) -> None:
+    mock_scan.side_effect = [(5, []), (0, [])]
+
+    results = await redis_module.get_data_by_prefix("test", DummyModel)
+
+    assert results == []
+    mock_mget.assert_not_awaited()
+
+
+def test_create_redis_client_configures_pool() -> None:
+    client = redis_module.create_redis_client("test_config", max_connections=7)
+
+    pool = client.connection_pool
+    assert isinstance(pool, redis_module.InstrumentedConnectionPool)
+    assert pool.max_connections == 7
+    assert pool.timeout == redis_module.REDIS_POOL_TIMEOUT
+    kwargs = pool.connection_kwargs
+    assert kwargs["socket_timeout"] == redis_module.REDIS_SOCKET_TIMEOUT
+    assert kwargs["socket_connect_timeout"] == (
+        redis_module.REDIS_SOCKET_CONNECT_TIMEOUT
+    )
+    assert kwargs["health_check_interval"] == redis_module.REDIS_HEALTH_CHECK_INTERVAL
+    assert kwargs["retry"].get_retries() == redis_module.REDIS_RETRY_ATTEMPTS
+    assert (
+        REGISTRY.get_sample_value(
+            "redis_pool_max_connections",
+            {"pool": "test_config"},
+        )
+        == 7
+    )
+
+
+@pytest.mark.parametrize(
+    ("parser_class", "expected"),
+    [(redis_module._AsyncRESP2Parser, True), (None, False)],
+)
+def test_python_parser_is_only_forced_when_available(
+    parser_class: type | None,
+    expected: bool,
+) -> None:
+    with (
+        patch("app.core.redis.REDIS_USE_HIREDIS", False),
+        patch("app.core.redis._AsyncRESP2Parser", parser_class),
+    ):
+        client = redis_module.create_redis_client("test_parser")
+
+    kwargs = client.connection_pool.connection_kwargs
+    assert ("parser_class" in kwargs) is expected
+
+
+def test_pubsub_client_has_no_read_timeout() -> None:
+    kwargs = redis_module.pubsub_client.connection_pool.connection_kwargs
+    assert kwargs["socket_timeout"] is None
+
+
+@pytest.mark.asyncio
+async def test_instrumented_pool_observes_wait_and_usage() -> None:
+    pool = redis_module.InstrumentedConnectionPool(
+        "test_wait",
+        connection_class=FakeAsyncRedisConnection,
+        server=fakeredis.FakeServer(),
+        max_connections=2,
+    )
+    client = Redis(connection_pool=pool)
+
+    await client.set("key", 1)
+    assert await client.get("key") == b"1"
+
+    labels = {"pool": "test_wait"}
+    assert REGISTRY.get_sample_value("redis_pool_wait_seconds_count", labels) == 2
+    assert (
+        REGISTRY.get_sample_value(
+            "redis_pool_connections",
+            {**labels, "state": "idle"},
+        )
+        == 1
+    )
+    assert (
+        REGISTRY.get_sample_value(
+            "redis_pool_connections",
+            {**labels, "state": "in_use"},
+        )
+        == 0
+    )
+
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_close_redis_client_disconnects_pools() -> None:
+    server = fakeredis.FakeServer()
+    clients = [
+        Redis(
+            connection_pool=redis_module.InstrumentedConnectionPool(
+                name,
+                connection_class=FakeAsyncRedisConnection,
+                server=server,
+            ),
+        )
+        for name in ("test_close", "test_close_pubsub")
+    ]
+    connections = []
+    for client in clients:
+        await client.ping()
+        connections.extend(client.connection_pool._available_connections)
+
+    with (
+        patch("app.core.redis.redis_client", clients[0]),
+        patch("app.core.redis.pubsub_client", clients[1]),
+    ):
+        await redis_module.close_redis_client()
+
+    assert len(connections) == 2
+    assert not any(connection.is_connected for connection in connections)
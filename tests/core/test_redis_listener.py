@@ -1,15 +1,17 @@
 import json
 from collections.abc import AsyncGenerator
+from datetime import datetime
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
 from app.core import redis_listener
+from app.websockets.manager import AlertTiming
 
 
 @pytest.mark.asyncio
-@patch("app.websockets.manager.manager.broadcast", new_callable=AsyncMock)
-@patch("app.core.redis_listener.redis_client.pubsub")
+@patch("app.websockets.manager.manager.broadcast_alert", new_callable=AsyncMock)
+@patch("app.core.redis_listener.pubsub_client.pubsub")
 async def test_listen_to_alerts(
     mock_pubsub: MagicMock,
     mock_broadcast: AsyncMock,
@@ -34,8 +36,9 @@ async def test_listen_to_alerts(
     call_args = []
     count = 0
 
-    async def broadcast_side_effect(data: dict) -> None:
+    async def broadcast_side_effect(data: str, timing: AlertTiming | None) -> None:
         nonlocal count
+        assert timing is None
         call_args.append(data)
         count += 1
         if count >= 2:
@@ -47,5 +50,64 @@ async def test_listen_to_alerts(
         await redis_listener.listen_to_alerts()
 
     assert count == 2
-    assert {"alert": "earthquake detected"} in call_args
-    assert {"alert": "aftershock detected"} in call_args
+    assert json.dumps({"alert": "earthquake detected"}) in call_args
+    assert json.dumps({"alert": "aftershock detected"}) in call_args
+
+
+@pytest.mark.asyncio
+@patch("app.core.redis_listener.invalidate_setting")
+@patch("app.core.redis_listener.pubsub_client.pubsub")
+async def test_listen_to_settings(
+    mock_pubsub: MagicMock,
+    mock_invalidate: MagicMock,
+) -> None:
+    fake_pubsub = MagicMock()
+    mock_pubsub.return_value = fake_pubsub
+    fake_pubsub.subscribe = AsyncMock()
+
+    async def fake_listen() -> AsyncGenerator[dict]:
+        yield {"type": "subscribe", "data": 1}
+        yield {"type": "message", "data": b"ALERT_SUPPRESS_TIME"}
+
+    fake_pubsub.listen = fake_listen
+
+    await redis_listener.listen_to_settings()
+
+    fake_pubsub.subscribe.assert_awaited_once_with("settings")
+    mock_invalidate.assert_called_once_with(b"ALERT_SUPPRESS_TIME")
+
+
+def test_split_alert_timing_strips_ingest_time_from_v1_frame() -> None:
+    alert = json.dumps({"id": "abc", "originTime": "2026-10-18T08:00:00+08:00"})
+    published = {"type": "OPEN", "alert": alert}
+    message = json.dumps({**published, "ingestedAt": 1000.0})
+    origin = datetime.fromisoformat("2026-10-18T08:00:00+08:00").timestamp()
+
+    frame, timing = redis_listener.split_alert_timing(message.encode())
+
+    assert json.loads(frame) == published
+    assert timing == AlertTiming(1000.0, origin)
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        # autoclose notifications carry no ingest time
+        json.dumps({"type": "AUTOCLOSED", "alert": json.dumps({"id": "abc"})}),
+        json.dumps({"alert": "earthquake detected"}),
+        "not json",
+    ],
+)
+def test_split_alert_timing_forwards_messages_without_ingest_time(
+    message: str,
+) -> None:
+    assert redis_listener.split_alert_timing(message) == (message, None)
+
+
+def test_split_alert_timing_skips_naive_origin_time() -> None:
+    alert = json.dumps({"id": "abc", "originTime": "2026-10-18T08:00:00"})
+    message = json.dumps({"type": "OPEN", "alert": alert, "ingestedAt": 1000.0})
+
+    _, timing = redis_listener.split_alert_timing(message)
+
+    assert timing == AlertTiming(1000.0, None)
@@ -0,0 +1,45 @@
+"""Builders of the models shared by the tests, overridable per field."""
+
+import uuid
+from datetime import datetime
+
+from app.models.earthquake import EarthquakeAlert, EarthquakeData, ShakingArea
+from app.models.enums import AlertStatus, Location, SeverityLevel, TriState
+
+ORIGIN_TIME = datetime(2024, 5, 22, 10, 0, 0)
+
+
+def make_alert(
+    alert_id: str = "1-Taipei",
+    location: Location = Location.TAIPEI,
+    origin_time: datetime = ORIGIN_TIME,
+    **overrides: object,
+) -> EarthquakeAlert:
+    fields = {
+        "id": alert_id,
+        "source": "TREM-Lite",
+        "origin_time": origin_time,
+        "location": location,
+        "severity_level": SeverityLevel.L1,
+        "status": AlertStatus.OPEN,
+        "has_damage": TriState.UNKNOWN,
+        "needs_command_center": TriState.UNKNOWN,
+        "processing_duration": 0,
+    }
+    return EarthquakeAlert(**(fields | overrides))
+
+
+def make_data(**overrides: object) -> EarthquakeData:
+    fields = {
+        "id": uuid.uuid4(),
+        "source": "TREM-Lite",
+        "origin_time": ORIGIN_TIME,
+        "epicenter_location": "Hualien",
+        "magnitude_value": 5.0,
+        "focal_depth": 10.0,
+        "shaking_area": [
+            ShakingArea(county_name=Location.TAIPEI, area_intensity=2.0),
+            ShakingArea(county_name=Location.TAINAN, area_intensity=1.0),
+        ],
+    }
+    return EarthquakeData(**(fields | overrides))
@@ -1,15 +1,26 @@
 import json
-from datetime import datetime, timedelta
-from unittest.mock import AsyncMock, patch
+import time
+import tracemalloc
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
-import pytz
+from fakeredis import FakeAsyncRedis
 from httpx import AsyncClient
 
 from app.main import app
 from app.models.earthquake import EarthquakeAlert
-from app.models.enums import AlertStatus, Location, SeverityLevel, TriState
+from app.models.enums import (
+    AlertStatus,
+    ExportFormat,
+    Location,
+    SeverityLevel,
+    TriState,
+)
 from app.models.response import Response as APIResponse
+from app.routers.earthquake import export_earthquake_alerts
+from app.services.ingest import IngestMode, IngestQueue
+from tests.factories import make_alert
 
 
 @patch("app.routers.earthquake.process_earthquake_data", new_callable=AsyncMock)
@@ -35,7 +46,33 @@ async def test_create_earthquake(mock_process: AsyncMock) -> None:
 
 
 @pytest.mark.asyncio
-@patch("app.routers.earthquake.get_data_by_prefix", new_callable=AsyncMock)
+@patch("app.routers.earthquake.EARTHQUAKE_INGEST_MODE", IngestMode.QUEUE)
+async def test_create_earthquake_queued() -> None:
+    payload = {
+        "source": "test",
+        "origin_time": "2024-01-01T12:00:00Z",
+        "epicenter_location": "Taipei",
+        "magnitude_value": 5.5,
+        "focal_depth": 4.0,
+        "shaking_area": [],
+    }
+
+    with patch(
+        "app.routers.earthquake.ingest_queue",
+        IngestQueue(maxsize=1),
+    ) as queue:
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            accepted = await client.post("/api/earthquake/", json=payload)
+            rejected = await client.post("/api/earthquake/", json=payload)
+
+    assert accepted.status_code == 202
+    assert len(queue) == 1
+    assert rejected.status_code == 429
+    assert rejected.headers["Retry-After"] == "1"
+
+
+@pytest.mark.asyncio
+@patch("app.routers.earthquake.query_open_alerts", new_callable=AsyncMock)
 async def test_get_earthquake_alerts(mock_get_data: AsyncMock) -> None:
     mock_alerts = [
         EarthquakeAlert(
@@ -64,10 +101,13 @@ async def test_get_earthquake_alerts(mock_get_data: AsyncMock) -> None:
         ),
     ]
 
-    mock_get_data.return_value = mock_alerts
+    mock_get_data.return_value = (mock_alerts, "next")
 
     async with AsyncClient(app=app, base_url="http://test") as client:
-        response = await client.get("/api/earthquake/alerts")
+        response = await client.get(
+            "/api/earthquake/alerts",
+            params={"location": "Taipei", "severity": 1, "limit": 2},
+        )
 
     assert response.status_code == 200
     parsed = response.json()
@@ -76,13 +116,49 @@ async def test_get_earthquake_alerts(mock_get_data: AsyncMock) -> None:
     assert len(parsed["data"]) == 2
     assert parsed["data"][0]["id"] == "1"
     assert parsed["data"][0]["status"] == "OPEN"
-    mock_get_data.assert_awaited_once_with("alert", EarthquakeAlert)
+    assert parsed["next_cursor"] == "next"
+    mock_get_data.assert_awaited_once_with(
+        source=None,
+        location=Location.TAIPEI,
+        severity=SeverityLevel.L1,
+        since=None,
+        until=None,
+        limit=2,
+        cursor=None,
+    )
 
 
 @pytest.mark.asyncio
+@patch("app.routers.earthquake.query_open_alerts", new_callable=AsyncMock)
+async def test_get_earthquake_alerts_closed_status(mock_get_data: AsyncMock) -> None:
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.get(
+            "/api/earthquake/alerts",
+            params={"status": "PROCESSED"},
+        )
+
+    assert response.status_code == 200
+    assert response.json()["data"] == []
+    mock_get_data.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+@patch("app.routers.earthquake.query_open_alerts", new_callable=AsyncMock)
+async def test_get_earthquake_alerts_invalid_cursor(mock_get_data: AsyncMock) -> None:
+    mock_get_data.side_effect = ValueError("Invalid cursor: abc")
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.get("/api/earthquake/alerts", params={"cursor": "abc"})
+
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+@patch("app.routers.earthquake.remove_alerts", new_callable=AsyncMock)
 @patch("app.routers.earthquake.update_alert_metrics", autospec=True)
 async def test_process_earthquake_alert(
     mock_update_metrics: AsyncMock,
+    mock_remove_alerts: AsyncMock,
     mock_redis_methods: dict[str, AsyncMock],
 ) -> None:
     alert_id = "123"
@@ -114,87 +190,122 @@ async def test_process_earthquake_alert(
     assert parsed["message"] == "Processed alert 123 successfully"
 
     mock_update_metrics.assert_called_once()
-    mock_redis_methods["delete"].assert_awaited_once()
+    mock_remove_alerts.assert_awaited_once_with(["alert_TREM-Lite_Taipei_123"])
 
 
 @pytest.mark.asyncio
-@patch("app.routers.earthquake.get_data_by_prefix", new_callable=AsyncMock)
-@patch("app.routers.earthquake.update_alert_autoclose_metrics")
-async def test_autoclose_expired_alerts(
-    mock_update_metrics: AsyncMock,
-    mock_get_data: AsyncMock,
-    mock_redis_methods: dict[str, AsyncMock],
-) -> None:
-    taipei_tz = pytz.timezone("Asia/Taipei")
-    old_time = datetime.now(taipei_tz) - timedelta(hours=2)
-
-    mock_get_data.return_value = [
-        EarthquakeAlert(
-            id="1",
-            source="TREM-Lite",
-            origin_time=old_time,
-            location=Location.TAIPEI,
-            severity_level=SeverityLevel.L1,
-            status=AlertStatus.OPEN,
-            has_damage=TriState.UNKNOWN,
-            needs_command_center=TriState.UNKNOWN,
-            processed_time=old_time,
-            processing_duration=0,
-        ),
-    ]
+@patch("app.routers.earthquake.close_expired_alerts", new_callable=AsyncMock)
+async def test_autoclose_expired_alerts(mock_close_expired: AsyncMock) -> None:
+    mock_close_expired.return_value = [MagicMock()]
 
     async with AsyncClient(app=app, base_url="http://test") as client:
         response = await client.delete("/api/earthquake/alerts/autoclose")
 
     assert response.status_code == 200
     assert "Auto-closed 1 expired alerts" in response.json()["message"]
-    mock_update_metrics.assert_called_once()
-    mock_redis_methods["delete"].assert_awaited_once()
-    mock_redis_methods["publish"].assert_awaited_once()
+    mock_close_expired.assert_awaited_once()
 
 
 @pytest.mark.asyncio
-@patch("app.routers.earthquake.fetch_realtime_data", new_callable=AsyncMock)
-@patch("app.routers.earthquake.process_earthquake_data", new_callable=AsyncMock)
-async def test_get_realtime_earthquake_data(
-    mock_process: AsyncMock,
-    mock_fetch: AsyncMock,
-    mock_redis_methods: dict[str, AsyncMock],
-) -> None:
-    # Simulate real-time data with non-zero intensity
-    mock_fetch.return_value = [
-        {"name": "Taipei", "intensity_float": 2.5, "lastUpdate": None},
-        {"name": "Hsinchu", "intensity_float": 0.0, "lastUpdate": None},
-    ]
+async def test_get_realtime_earthquake_data() -> None:
+    snapshot = {
+        "message": "Realtime earthquake data fetched successfully",
+        "data": {"source": "TREM-Lite"},
+    }
+
+    with (
+        patch("app.routers.earthquake.get_realtime_snapshot", return_value=snapshot),
+        patch("app.services.realtime.fetch_realtime_data") as mock_fetch,
+    ):
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            response = await client.get("/api/earthquake/realtime")
+
+    assert response.status_code == 200
+    assert response.json() == snapshot
+    # the endpoint serves the poller snapshot without fetching upstream
+    mock_fetch.assert_not_called()
 
-    # Mock returned alerts from processing
-    mock_process.return_value = [
-        # Dummy alert with just minimal valid fields
-        type(
-            "DummyAlert",
-            (),
+
+async def store_alerts(client: FakeAsyncRedis, count: int) -> None:
+    raw = make_alert("0").model_dump_json()
+    for start in range(0, count, 10_000):
+        await client.mset(
             {
-                "model_dump_json": lambda self, **kwargs: json.dumps({"id": "abc"}),
-                "source": "TREM-Lite",
-                "location": type("Location", (), {"value": "Taipei"}),
-                "id": "abc",
+                f"alert_TREM-Lite_Taipei_{i}": raw.replace('"id":"0"', f'"id":"{i}"')
+                for i in range(start, min(start + 10_000, count))
             },
-        )(),
-    ]
+        )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("export_format", list(ExportFormat))
+async def test_export_earthquake_alerts(
+    fake_redis: FakeAsyncRedis,
+    export_format: ExportFormat,
+) -> None:
+    await store_alerts(fake_redis, 3)
 
     async with AsyncClient(app=app, base_url="http://test") as client:
-        response = await client.get("/api/earthquake/realtime")
+        response = await client.get(
+            "/api/earthquake/alerts/export",
+            params={"format": export_format.value},
+        )
 
     assert response.status_code == 200
-    body = response.json()
-    assert body["message"] == "Realtime earthquake data fetched successfully"
-    assert "data" in body
-    assert body["data"]["source"] == "TREM-Lite"
-    # assert len(body["data"]["shaking_area"]) > 0
-
-    # Ensure redis publish is called with expected structure
-    mock_redis_methods["publish"].assert_called()
-    args, _ = mock_redis_methods["publish"].call_args
-    assert args[0] == "alerts"
-    payload = json.loads(args[1])
-    assert payload["type"] == AlertStatus.OPEN
+    if export_format == ExportFormat.NDJSON:
+        alerts = [json.loads(line) for line in response.text.splitlines()]
+    else:
+        alerts = response.json()
+    assert sorted(alert["id"] for alert in alerts) == ["0", "1", "2"]
+    assert alerts[0]["originTime"] == "2024-05-22T10:00:00"
+
+
+@pytest.mark.asyncio
+async def test_export_empty_json_array(fake_redis: FakeAsyncRedis) -> None:
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.get(
+            "/api/earthquake/alerts/export",
+            params={"format": "json"},
+        )
+
+    assert response.json() == []
+
+
+@pytest.mark.asyncio
+async def test_export_streams_100k_alerts_in_bounded_memory(
+    fake_redis: FakeAsyncRedis,
+) -> None:
+    alert_count = 100_000
+    await store_alerts(fake_redis, alert_count)
+
+    scan = fake_redis.scan
+    scan_calls = 0
+
+    async def counted_scan(*args: object, **kwargs: object) -> object:
+        nonlocal scan_calls
+        scan_calls += 1
+        return await scan(*args, **kwargs)
+
+    exported = 0
+    exported_bytes = 0
+    scans_before_first_chunk = None
+    with patch.object(fake_redis, "scan", counted_scan):
+        response = await export_earthquake_alerts(ExportFormat.NDJSON)
+        tracemalloc.start()
+        start = time.perf_counter()
+        async for chunk in response.body_iterator:
+            if scans_before_first_chunk is None:
+                scans_before_first_chunk = scan_calls
+                time_to_first_chunk = time.perf_counter() - start
+            exported += chunk.count(b"\n")
+            exported_bytes += len(chunk)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    assert exported == alert_count
+    # the first chunk is sent after the first SCAN page, not after the scan
+    assert scans_before_first_chunk == 1
+    assert scan_calls > 1
+    assert time_to_first_chunk < 1
+    # only about one page is held at a time, not the 20 MB export
+    assert peak < exported_bytes / 5
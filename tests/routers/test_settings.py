@@ -16,15 +16,19 @@ def test_app() -> FastAPI:
 
 @pytest.mark.asyncio
 async def test_set_suppress_time(test_app: FastAPI) -> None:
-    with patch(
-        "app.routers.settings.redis_client.set",
-        new_callable=AsyncMock,
-    ) as mock_set:
+    with (
+        patch("app.core.redis.redis_client.set", new_callable=AsyncMock) as mock_set,
+        patch(
+            "app.core.redis.redis_client.publish",
+            new_callable=AsyncMock,
+        ) as mock_publish,
+    ):
         async with AsyncClient(app=test_app, base_url="http://test") as ac:
             payload = {"alert_suppress_time": 120}
             response = await ac.put("/api/settings/alert-suppress-time", json=payload)
 
         mock_set.assert_awaited_once_with("ALERT_SUPPRESS_TIME", "120")
+        mock_publish.assert_awaited_once_with("settings", "ALERT_SUPPRESS_TIME")
 
         assert response.status_code == 200
         assert response.json() == {
@@ -4,13 +4,19 @@ from unittest.mock import AsyncMock, MagicMock, patch
 import pytest
 from fastapi import WebSocketDisconnect
 
+from app.websockets.manager import WireFormat
+
 
 @pytest.fixture
 def mock_websocket_setup() -> dict[str, Any]:
     """Provides a mock websocket and connection manager."""
     mock_websocket = AsyncMock()
-    mock_manager = MagicMock(connect=AsyncMock(), disconnect=MagicMock())
-    return {"websocket": mock_websocket, "manager": mock_manager}
+    mock_client = MagicMock(wait_closed=AsyncMock(return_value=False))
+    mock_manager = MagicMock(
+        connect=AsyncMock(return_value=mock_client),
+        disconnect=MagicMock(),
+    )
+    return {"websocket": mock_websocket, "manager": mock_manager, "client": mock_client}
 
 
 class TestWebSocketHandler:
@@ -22,11 +28,9 @@ class TestWebSocketHandler:
         mock_websocket_setup: dict[str, Any],
     ) -> None:
         mocks = mock_websocket_setup
+        mock_wait = mocks["client"].wait_closed
+        mock_wait.side_effect = [False, Exception("Test completed")]
         with (
-            patch(
-                "asyncio.sleep",
-                side_effect=[None, Exception("Test completed")],
-            ) as mock_sleep,
             patch("app.websockets.alerts_ws.manager", mocks["manager"]),
             patch("app.websockets.alerts_ws.get_ping_interval", return_value=60),
         ):
@@ -35,10 +39,13 @@ class TestWebSocketHandler:
             with pytest.raises(Exception, match="Test completed"):
                 await alerts_websocket(mocks["websocket"])
 
-        mocks["manager"].connect.assert_called_once_with(mocks["websocket"])
+        mocks["manager"].connect.assert_called_once_with(
+            mocks["websocket"],
+            WireFormat.V1,
+        )
         mocks["websocket"].send_text.assert_called_with("ping")
         assert mocks["websocket"].send_text.call_count >= 1
-        mock_sleep.assert_called_with(60)
+        mock_wait.assert_called_with(60)
 
     @pytest.mark.asyncio
     async def test_custom_ping_interval(
@@ -46,11 +53,9 @@ class TestWebSocketHandler:
         mock_websocket_setup: dict[str, Any],
     ) -> None:
         mocks = mock_websocket_setup
+        mock_wait = mocks["client"].wait_closed
+        mock_wait.side_effect = [False, Exception("Test completed")]
         with (
-            patch(
-                "asyncio.sleep",
-                side_effect=[None, Exception("Test completed")],
-            ) as mock_sleep,
             patch("app.websockets.alerts_ws.manager", mocks["manager"]),
             patch("app.websockets.alerts_ws.get_ping_interval", return_value=5),
         ):
@@ -59,7 +64,7 @@ class TestWebSocketHandler:
             with pytest.raises(Exception, match="Test completed"):
                 await alerts_websocket(mocks["websocket"])
 
-        mock_sleep.assert_called_with(5)
+        mock_wait.assert_called_with(5)
 
     @pytest.mark.asyncio
     async def test_disconnect_handling(
@@ -76,7 +81,10 @@ class TestWebSocketHandler:
 
             await alerts_websocket(mocks["websocket"])
 
-        mocks["manager"].connect.assert_called_once_with(mocks["websocket"])
+        mocks["manager"].connect.assert_called_once_with(
+            mocks["websocket"],
+            WireFormat.V1,
+        )
         mocks["manager"].disconnect.assert_called_once_with(mocks["websocket"])
 
     @pytest.mark.asyncio
@@ -85,11 +93,9 @@ class TestWebSocketHandler:
         mock_websocket_setup: dict[str, Any],
     ) -> None:
         mocks = mock_websocket_setup
+        mock_wait = mocks["client"].wait_closed
+        mock_wait.side_effect = [False, False, False, Exception("Test completed")]
         with (
-            patch(
-                "asyncio.sleep",
-                side_effect=[None, None, None, Exception("Test completed")],
-            ) as mock_sleep,
             patch("app.websockets.alerts_ws.manager", mocks["manager"]),
             patch("app.websockets.alerts_ws.get_ping_interval", return_value=1),
         ):
@@ -100,7 +106,7 @@ class TestWebSocketHandler:
 
         assert mocks["websocket"].send_text.call_count == 4
         mocks["websocket"].send_text.assert_called_with("ping")
-        mock_sleep.assert_called_with(1)
+        mock_wait.assert_called_with(1)
 
     @pytest.mark.asyncio
     async def test_connect_called_before_ping(
@@ -110,8 +116,9 @@ class TestWebSocketHandler:
         mocks = mock_websocket_setup
         call_order = []
 
-        async def track_connect(ws: Any) -> None:
+        async def track_connect(ws: Any, wire_format: WireFormat) -> MagicMock:
             call_order.append("connect")
+            return mocks["client"]
 
         async def track_send_text(msg: str) -> None:
             call_order.append("send_text")
@@ -130,3 +137,41 @@ class TestWebSocketHandler:
                 await alerts_websocket(mocks["websocket"])
 
         assert call_order == ["connect", "send_text"]
+
+    @pytest.mark.asyncio
+    async def test_stops_pinging_closed_client(
+        self,
+        mock_websocket_setup: dict[str, Any],
+    ) -> None:
+        mocks = mock_websocket_setup
+        mocks["client"].wait_closed.side_effect = [False, True]
+        with (
+            patch("app.websockets.alerts_ws.manager", mocks["manager"]),
+            patch("app.websockets.alerts_ws.get_ping_interval", return_value=60),
+        ):
+            from app.websockets.alerts_ws import alerts_websocket
+
+            await alerts_websocket(mocks["websocket"])
+
+        assert mocks["websocket"].send_text.call_count == 2
+        mocks["manager"].disconnect.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_send_on_closed_socket_disconnects(
+        self,
+        mock_websocket_setup: dict[str, Any],
+    ) -> None:
+        mocks = mock_websocket_setup
+        # what starlette raises when sending after the socket was closed
+        mocks["websocket"].send_text.side_effect = RuntimeError(
+            'Cannot call "send" once a close message has been sent.',
+        )
+        with (
+            patch("app.websockets.alerts_ws.manager", mocks["manager"]),
+            patch("app.websockets.alerts_ws.get_ping_interval", return_value=60),
+        ):
+            from app.websockets.alerts_ws import alerts_websocket
+
+            await alerts_websocket(mocks["websocket"])
+
+        mocks["manager"].disconnect.assert_called_once_with(mocks["websocket"])
@@ -0,0 +1,113 @@
+import json
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from fakeredis import FakeAsyncRedis
+
+from app.core import alert_store
+from app.models.enums import AlertStatus
+from app.services import autoclose
+from tests.factories import make_alert
+
+NOW = alert_store.TAIPEI_TZ.localize(datetime(2024, 5, 22, 12, 0, 0))
+
+
+async def test_close_expired_alerts_only_closes_due_alerts(
+    fake_redis: FakeAsyncRedis,
+) -> None:
+    await alert_store.save_alerts(
+        [
+            make_alert("old", origin_time=NOW - timedelta(hours=2)),
+            make_alert("older", origin_time=NOW - timedelta(hours=3)),
+            make_alert("recent", origin_time=NOW - timedelta(minutes=30)),
+        ],
+    )
+    pubsub = fake_redis.pubsub()
+    await pubsub.subscribe("alerts")
+    await pubsub.get_message(timeout=0.1)  # subscribe confirmation
+
+    with patch.object(autoclose, "ALERT_AUTOCLOSE_BATCH_SIZE", 1):
+        closed = await autoclose.close_expired_alerts(NOW)
+
+    assert [alert.id for alert in closed] == ["older", "old"]
+    assert all(alert.status == AlertStatus.AUTOCLOSED for alert in closed)
+    assert [alert.id for alert in await alert_store.get_open_alerts()] == ["recent"]
+
+    published = []
+    while message := await pubsub.get_message(timeout=0.1):
+        published.append(json.loads(message["data"]))
+    assert [json.loads(message["alert"])["id"] for message in published] == [
+        "older",
+        "old",
+    ]
+    assert {message["type"] for message in published} == {AlertStatus.AUTOCLOSED}
+    await pubsub.aclose()
+
+
+async def test_close_expired_alerts_skips_alerts_closed_meanwhile(
+    fake_redis: FakeAsyncRedis,
+) -> None:
+    await alert_store.save_alerts(
+        [make_alert("old", origin_time=NOW - timedelta(hours=2))],
+    )
+    remove_alerts = alert_store.remove_alerts
+
+    async def remove_twice(keys: list[str]) -> list[str]:
+        # another replica closes the same alerts first
+        await remove_alerts(keys)
+        return await remove_alerts(keys)
+
+    with patch("app.services.autoclose.remove_alerts", remove_twice):
+        assert await autoclose.close_expired_alerts(NOW) == []
+
+
+async def test_autoclose_lease_is_held_by_one_replica(
+    fake_redis: FakeAsyncRedis,
+) -> None:
+    assert await autoclose.acquire_autoclose_lease()
+    # the holder renews its lease
+    assert await autoclose.acquire_autoclose_lease()
+
+    with patch.object(autoclose, "lease_token", "other-replica"):
+        assert not await autoclose.acquire_autoclose_lease()
+
+    await fake_redis.delete(autoclose.AUTOCLOSE_LEASE_KEY)
+    with patch.object(autoclose, "lease_token", "other-replica"):
+        assert await autoclose.acquire_autoclose_lease()
+
+
+async def test_autoclose_lease_renewal_does_not_overwrite_new_holder(
+    fake_redis: FakeAsyncRedis,
+) -> None:
+    assert await autoclose.acquire_autoclose_lease()
+
+    pipeline = fake_redis.pipeline
+
+    def racing_pipeline(*args: object, **kwargs: object) -> object:
+        pipe = pipeline(*args, **kwargs)
+        get = pipe.get
+
+        async def get_then_lose_lease(key: str) -> object:
+            holder = await get(key)
+            # the lease expires and another replica takes it before the renewal
+            await fake_redis.set(key, "other-replica")
+            return holder
+
+        pipe.get = get_then_lose_lease
+        return pipe
+
+    with patch.object(fake_redis, "pipeline", racing_pipeline):
+        assert not await autoclose.acquire_autoclose_lease()
+
+    assert await fake_redis.get(autoclose.AUTOCLOSE_LEASE_KEY) == b"other-replica"
+
+
+async def test_next_autoclose_delay(fake_redis: FakeAsyncRedis) -> None:
+    assert await autoclose.next_autoclose_delay() == autoclose.ALERT_AUTOCLOSE_MAX_WAIT
+
+    await alert_store.save_alerts([make_alert("1", origin_time=NOW)])
+    with patch(
+        "app.services.autoclose.time.time",
+        return_value=NOW.timestamp() + autoclose.ALERT_AUTOCLOSE_AFTER - 10,
+    ):
+        assert await autoclose.next_autoclose_delay() == 10
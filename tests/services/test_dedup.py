@@ -0,0 +1,156 @@
+import asyncio
+import uuid
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fakeredis import FakeAsyncRedis
+from prometheus_client import REGISTRY
+
+from app.models.earthquake import ShakingArea
+from app.models.enums import Location
+from app.services import dedup
+from app.services.earthquake import process_earthquake_batch, process_earthquake_data
+from tests.factories import make_data
+
+STRONGER_SHAKING = [ShakingArea(county_name=Location.TAIPEI, area_intensity=3.0)]
+
+
+def test_dedup_key_ignores_id_and_area_order() -> None:
+    data = make_data()
+    reordered = data.model_copy(
+        update={"id": uuid.uuid4(), "shaking_area": data.shaking_area[::-1]},
+    )
+
+    assert dedup.dedup_key(data) == dedup.dedup_key(reordered)
+    assert dedup.dedup_key(data) != dedup.dedup_key(
+        make_data(shaking_area=STRONGER_SHAKING),
+    )
+
+
+@pytest.mark.parametrize(
+    "revision",
+    [
+        {"magnitude_value": 6.0},
+        {"focal_depth": 30.0},
+        {"epicenter_location": "Yilan"},
+    ],
+)
+def test_dedup_key_changes_with_revised_fields(revision: dict) -> None:
+    data = make_data()
+
+    assert dedup.dedup_key(data) != dedup.dedup_key(data.model_copy(update=revision))
+
+
+async def test_magnitude_revision_is_not_a_duplicate(
+    fake_redis: FakeAsyncRedis,
+) -> None:
+    # same origin time and areas, only M>=5 makes the revision severe
+    assert not await dedup.is_duplicate(make_data(magnitude_value=4.5))
+    assert not await dedup.is_duplicate(make_data(magnitude_value=6.0))
+
+
+def hits(layer: str) -> float:
+    return (
+        REGISTRY.get_sample_value(
+            "earthquake_ingest_dedup_hits_total",
+            {"layer": layer},
+        )
+        or 0
+    )
+
+
+async def test_is_duplicate_checks_local_cache_then_redis(
+    fake_redis: FakeAsyncRedis,
+) -> None:
+    local_hits, redis_hits = hits("local"), hits("redis")
+
+    assert not await dedup.is_duplicate(make_data())
+    assert await dedup.is_duplicate(make_data())
+    assert hits("local") == local_hits + 1
+
+    # another replica ingested it, this one has not seen it yet
+    dedup.seen_data.clear()
+    assert await dedup.is_duplicate(make_data())
+    assert hits("redis") == redis_hits + 1
+    assert await fake_redis.ttl(f"dedup:earthquake:{dedup.dedup_key(make_data())}") > 0
+
+
+async def test_is_duplicate_falls_back_to_local_cache(
+    fake_redis: FakeAsyncRedis,
+) -> None:
+    with patch.object(fake_redis, "set", AsyncMock(side_effect=ConnectionError)):
+        assert not await dedup.is_duplicate(make_data())
+        assert await dedup.is_duplicate(make_data())
+
+
+async def test_process_earthquake_data_skips_duplicates(
+    fake_redis: FakeAsyncRedis,
+) -> None:
+    with (
+        patch(
+            "app.services.earthquake.generate_alerts",
+            new=AsyncMock(return_value=[]),
+        ) as mock_generate_alerts,
+        patch("app.services.earthquake.observe_earthquake_data") as mock_observe,
+    ):
+        await process_earthquake_data(make_data())
+        await process_earthquake_data(make_data())
+
+    mock_generate_alerts.assert_awaited_once()
+    mock_observe.assert_called_once()
+
+
+async def test_failed_processing_lets_retry_through(
+    fake_redis: FakeAsyncRedis,
+) -> None:
+    with patch(
+        "app.services.earthquake.generate_alerts",
+        new=AsyncMock(side_effect=[ConnectionError, []]),
+    ) as mock_generate_alerts:
+        with pytest.raises(ConnectionError):
+            await process_earthquake_data(make_data())
+        assert await fake_redis.keys("dedup:earthquake:*") == []
+
+        # the upstream retry is processed, not dropped as a duplicate
+        await process_earthquake_data(make_data())
+
+    assert mock_generate_alerts.await_count == 2
+
+
+async def test_failed_batch_lets_retries_through(fake_redis: FakeAsyncRedis) -> None:
+    batch = [make_data(), make_data(shaking_area=STRONGER_SHAKING)]
+    with (
+        patch(
+            "app.services.earthquake.generate_alerts",
+            new=AsyncMock(side_effect=ConnectionError),
+        ),
+        pytest.raises(ConnectionError),
+    ):
+        await process_earthquake_batch(batch)
+
+    assert not await dedup.is_duplicate(batch[0])
+    assert not await dedup.is_duplicate(batch[1])
+
+
+async def test_cancelled_batch_lets_retries_through(fake_redis: FakeAsyncRedis) -> None:
+    batch = [make_data(), make_data(shaking_area=STRONGER_SHAKING)]
+    started = asyncio.Event()
+
+    async def stalled_generate_alerts(*_: object) -> list:
+        started.set()
+        await asyncio.Event().wait()
+        return []
+
+    with patch(
+        "app.services.earthquake.generate_alerts",
+        new=stalled_generate_alerts,
+    ):
+        task = asyncio.create_task(process_earthquake_batch(batch))
+        await started.wait()
+        # e.g. an ingest worker stopped on shutdown
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    assert not await dedup.is_duplicate(batch[0])
+    assert not await dedup.is_duplicate(batch[1])
@@ -1,15 +1,17 @@
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
 from unittest.mock import AsyncMock, patch
 
 import pytest
 
-from app.models.earthquake import EarthquakeData, ShakingArea
-from app.models.enums import Location, SeverityLevel
+from app.models.earthquake import EarthquakeAlert, EarthquakeData, ShakingArea
+from app.models.enums import AlertStatus, Location, SeverityLevel, TriState
 from app.services.earthquake import (
     classify_severity,
     generate_alerts,
     generate_events,
+    merge_events,
+    process_earthquake_batch,
     process_earthquake_data,
 )
 
@@ -39,18 +41,53 @@ async def test_generate_alerts(sample_earthquake_data: EarthquakeData) -> None:
             new=AsyncMock(return_value=300),
         ),
         patch(
-            "app.services.earthquake.get_data_by_prefix",
-            new=AsyncMock(return_value=[]),
+            "app.services.earthquake.get_latest_alerts",
+            new=AsyncMock(side_effect=lambda pairs: [None] * len(pairs)),
         ),
         patch(
-            "app.services.earthquake.redis_client.set",
+            "app.services.earthquake.save_alerts",
             new=AsyncMock(),
-        ) as mock_redis_set,
+        ) as mock_save_alerts,
     ):
         alerts = await generate_alerts(events)
         assert alerts
         assert all(alert.severity_level != SeverityLevel.NA for alert in alerts)
-        assert mock_redis_set.await_count == len(alerts)
+        mock_save_alerts.assert_awaited_once_with(alerts)
+
+
+@pytest.mark.asyncio
+async def test_generate_alerts_suppressed_by_latest_alert(
+    sample_earthquake_data: EarthquakeData,
+) -> None:
+    events = generate_events(sample_earthquake_data)
+    taipei_alert = EarthquakeAlert(
+        **events[0].model_dump(),
+        status=AlertStatus.OPEN,
+        has_damage=TriState.UNKNOWN,
+        needs_command_center=TriState.UNKNOWN,
+        processing_duration=0,
+    )
+    latest_alerts = [
+        taipei_alert if event.location == Location.TAIPEI else None for event in events
+    ]
+    with (
+        patch(
+            "app.services.earthquake.get_alert_suppress_time",
+            new=AsyncMock(return_value=300),
+        ),
+        patch(
+            "app.services.earthquake.get_latest_alerts",
+            new=AsyncMock(return_value=latest_alerts),
+        ) as mock_get_latest_alerts,
+        patch("app.services.earthquake.save_alerts", new=AsyncMock()),
+    ):
+        alerts = await generate_alerts(events)
+
+    mock_get_latest_alerts.assert_awaited_once_with(
+        [(event.source, event.location) for event in events],
+    )
+    # magnitude 5.2 raises every location to L2 except the suppressed Taipei
+    assert {alert.location for alert in alerts} == set(Location) - {Location.TAIPEI}
 
 
 @pytest.mark.asyncio
@@ -64,15 +101,42 @@ async def test_process_earthquake_data(sample_earthquake_data: EarthquakeData) -
             new=AsyncMock(return_value=300),
         ),
         patch(
-            "app.services.earthquake.get_data_by_prefix",
-            new=AsyncMock(return_value=[]),
+            "app.services.earthquake.get_latest_alerts",
+            new=AsyncMock(side_effect=lambda pairs: [None] * len(pairs)),
         ),
-        patch("app.services.earthquake.redis_client.set", new=AsyncMock()),
+        patch("app.services.earthquake.save_alerts", new=AsyncMock()),
     ):
         alerts = await process_earthquake_data(sample_earthquake_data)
         assert isinstance(alerts, list)
 
 
+@pytest.mark.asyncio
+async def test_process_earthquake_data_times_stages(
+    sample_earthquake_data: EarthquakeData,
+) -> None:
+    with (
+        patch("app.utils.stage_timer.observe_pipeline_stage") as mock_observe,
+        patch(
+            "app.services.earthquake.get_alert_suppress_time",
+            new=AsyncMock(return_value=300),
+        ),
+        patch(
+            "app.services.earthquake.get_latest_alerts",
+            new=AsyncMock(side_effect=lambda pairs: [None] * len(pairs)),
+        ),
+        patch("app.services.earthquake.save_alerts", new=AsyncMock()),
+    ):
+        await process_earthquake_data(sample_earthquake_data)
+
+    assert [call.args[0] for call in mock_observe.call_args_list] == [
+        "dedup",
+        "observe_data",
+        "generate_events",
+        "suppression_lookup",
+        "save_alerts",
+    ]
+
+
 @pytest.mark.parametrize(
     ("magnitude", "intensity", "expected"),
     [
@@ -88,3 +152,52 @@ def test_classify_severity(
     expected: SeverityLevel,
 ) -> None:
     assert classify_severity(magnitude, intensity) == expected
+
+
+def test_merge_events_keeps_most_severe_latest_event(
+    sample_earthquake_data: EarthquakeData,
+) -> None:
+    later = sample_earthquake_data.model_copy(
+        update={
+            "id": uuid.uuid4(),
+            "origin_time": sample_earthquake_data.origin_time + timedelta(seconds=5),
+        },
+    )
+    weaker = later.model_copy(
+        update={
+            "id": uuid.uuid4(),
+            "origin_time": later.origin_time + timedelta(seconds=5),
+            "magnitude_value": 3.0,
+            "shaking_area": [],
+        },
+    )
+    other_source = weaker.model_copy(update={"source": "TREM-Lite"})
+
+    merged = merge_events(
+        generate_events(sample_earthquake_data)
+        + generate_events(later)
+        + generate_events(weaker)
+        + generate_events(other_source),
+    )
+
+    assert len(merged) == 2 * len(Location)
+    by_key = {(event.source, event.location): event for event in merged}
+    # the latest report is weaker, of the equally severe ones the later wins
+    assert by_key[("CWB", Location.TAIPEI)].id == f"{later.id}-Taipei"
+    assert by_key[("TREM-Lite", Location.TAIPEI)].severity_level == SeverityLevel.NA
+
+
+@pytest.mark.asyncio
+async def test_process_earthquake_batch(
+    sample_earthquake_data: EarthquakeData,
+) -> None:
+    duplicate = sample_earthquake_data.model_copy(update={"id": uuid.uuid4()})
+
+    with patch(
+        "app.services.earthquake.generate_alerts",
+        new=AsyncMock(return_value=[]),
+    ) as mock_generate_alerts:
+        await process_earthquake_batch([sample_earthquake_data, duplicate])
+
+    [events] = mock_generate_alerts.await_args.args
+    assert len(events) == len(Location)
@@ -0,0 +1,107 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.models.earthquake import EarthquakeData
+from app.services.ingest import IngestQueue
+from tests.factories import make_data
+
+
+def test_submit_rejects_when_full() -> None:
+    queue = IngestQueue(maxsize=2)
+
+    assert queue.submit(make_data())
+    assert queue.submit(make_data())
+    assert not queue.submit(make_data())
+    assert len(queue) == 2
+
+
+@pytest.mark.asyncio
+@patch("app.services.ingest.process_earthquake_batch", new_callable=AsyncMock)
+async def test_workers_drain_queue_in_micro_batches(mock_process: AsyncMock) -> None:
+    queue = IngestQueue(workers=1, batch_size=3, window_ms=20)
+    burst = [
+        make_data(source=source) for source in ("CWA", "TREM-Lite", "P-Alert", "CWA")
+    ]
+    for data in burst:
+        queue.submit(data)
+
+    queue.start()
+    await asyncio.wait_for(queue.queue.join(), 1)
+    await queue.stop()
+
+    batches = [call.args[0] for call in mock_process.await_args_list]
+    assert batches == [burst[:3], burst[3:]]
+
+
+@pytest.mark.asyncio
+@patch("app.services.ingest.process_earthquake_batch", new_callable=AsyncMock)
+async def test_worker_collects_items_arriving_within_window(
+    mock_process: AsyncMock,
+) -> None:
+    queue = IngestQueue(workers=1, batch_size=10, window_ms=200)
+    queue.start()
+
+    first, second = make_data(source="CWA"), make_data(source="TREM-Lite")
+    queue.submit(first)
+    await asyncio.sleep(0.01)
+    queue.submit(second)
+    await asyncio.wait_for(queue.queue.join(), 1)
+    await queue.stop()
+
+    mock_process.assert_awaited_once_with([first, second])
+
+
+@pytest.mark.asyncio
+@patch("app.services.ingest.process_earthquake_batch", new_callable=AsyncMock)
+async def test_worker_survives_failed_batch(mock_process: AsyncMock) -> None:
+    mock_process.side_effect = [RuntimeError("redis down"), []]
+    queue = IngestQueue(workers=1, batch_size=1, window_ms=0)
+    queue.start()
+
+    queue.submit(make_data())
+    queue.submit(make_data())
+    await asyncio.wait_for(queue.queue.join(), 1)
+    await queue.stop()
+
+    assert mock_process.await_count == 2
+
+
+@pytest.mark.asyncio
+@patch("app.services.ingest.process_earthquake_batch", new_callable=AsyncMock)
+async def test_stop_processes_queued_data_first(mock_process: AsyncMock) -> None:
+    queue = IngestQueue(workers=1, batch_size=1, window_ms=0)
+    burst = [make_data() for _ in range(3)]
+    for data in burst:
+        queue.submit(data)
+
+    queue.start()
+    await queue.stop()
+
+    assert [call.args[0] for call in mock_process.await_args_list] == [
+        [data] for data in burst
+    ]
+    assert len(queue) == 0
+
+
+@pytest.mark.asyncio
+@patch("app.services.ingest.process_earthquake_batch", new_callable=AsyncMock)
+async def test_stop_cancels_workers_after_drain_timeout(
+    mock_process: AsyncMock,
+) -> None:
+    async def stalled_process(batch: list[EarthquakeData]) -> list:
+        await asyncio.Event().wait()
+        return []
+
+    mock_process.side_effect = stalled_process
+    queue = IngestQueue(workers=1, batch_size=1, window_ms=0)
+    queue.submit(make_data())
+    queue.submit(make_data())
+    queue.start()
+    worker = queue.tasks[0]
+
+    await asyncio.wait_for(queue.stop(0.01), 1)
+
+    assert worker.cancelled()
+    mock_process.assert_awaited_once()
@@ -1,8 +1,10 @@
+import math
 from datetime import datetime
 from unittest.mock import MagicMock, patch
 from uuid import uuid4
 
 import pytest
+from prometheus_client import REGISTRY
 
 import app.services.metrics as metrics
 from app.models.earthquake import (
@@ -131,6 +133,31 @@ def test_observe_earthquake_data(sample_earthquake_data: EarthquakeData) -> None
         assert mock_intensity_set.call_count == len(sample_earthquake_data.shaking_area)
 
 
+def test_observe_earthquake_data_schedules_intensity_reset(
+    sample_earthquake_data: EarthquakeData,
+) -> None:
+    with patch.object(metrics, "intensity_reset_scheduler") as scheduler_mock:
+        metrics.observe_earthquake_data(sample_earthquake_data)
+
+    keys = [call.args[0] for call in scheduler_mock.schedule.call_args_list]
+    assert keys == [
+        (str(sample_earthquake_data.id), "CWB", area.county_name.value)
+        for area in sample_earthquake_data.shaking_area
+    ]
+
+    # the scheduled callback resets the area intensity to NaN
+    scheduler_mock.schedule.call_args.args[2]()
+    value = REGISTRY.get_sample_value(
+        "earthquake_intensity",
+        {
+            "id": str(sample_earthquake_data.id),
+            "source": "CWB",
+            "area": Location.TAINAN.value,
+        },
+    )
+    assert math.isnan(value)
+
+
 def test_observe_earthquake_events(sample_earthquake_event: EarthquakeEvent) -> None:
     with (
         patch.object(
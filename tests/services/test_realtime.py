@@ -0,0 +1,178 @@
+import json
+import time
+from collections.abc import Generator
+from datetime import datetime
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app.models.enums import AlertStatus, Location
+from app.services import realtime
+
+
+@pytest.fixture(autouse=True)
+def clear_emitted_area_states() -> Generator[None]:
+    realtime.emitted_area_states.clear()
+    yield
+    realtime.emitted_area_states.clear()
+
+
+def noop_ticks() -> float:
+    return REGISTRY.get_sample_value("realtime_noop_ticks_total") or 0.0
+
+
+def test_build_realtime_data_without_shaking() -> None:
+    area_statuses = [{"name": "Taipei", "intensity_float": 0.0, "lastUpdate": None}]
+
+    assert realtime.build_realtime_data(area_statuses) is None
+
+
+def test_build_realtime_data_uses_latest_update() -> None:
+    area_statuses = [
+        {
+            "name": "Taipei",
+            "intensity_float": 2.5,
+            "lastUpdate": datetime(2024, 5, 22, 2, 0, 0),
+        },
+        {
+            "name": "Hsinchu",
+            "intensity_float": 0.0,
+            "lastUpdate": datetime(2024, 5, 22, 2, 0, 5),
+        },
+    ]
+
+    data = realtime.build_realtime_data(area_statuses)
+
+    assert data is not None
+    assert data.source == "TREM-Lite"
+    # naive update times are UTC
+    assert data.origin_time.isoformat() == "2024-05-22T10:00:05+08:00"
+    assert [area.county_name for area in data.shaking_area] == [
+        Location.TAIPEI,
+        Location.HSINCHU,
+    ]
+
+
+@pytest.mark.asyncio
+@patch("app.services.realtime.fetch_realtime_data", new_callable=AsyncMock)
+@patch("app.services.realtime.process_earthquake_data", new_callable=AsyncMock)
+async def test_poll_realtime_data_publishes_alerts_and_updates_snapshot(
+    mock_process: AsyncMock,
+    mock_fetch: AsyncMock,
+    mock_redis_methods: dict[str, AsyncMock],
+) -> None:
+    mock_fetch.return_value = [
+        {"name": "Taipei", "intensity_float": 2.5, "lastUpdate": None},
+        {"name": "Hsinchu", "intensity_float": 0.0, "lastUpdate": None},
+    ]
+    alert = AsyncMock()
+    alert.model_dump_json = lambda **kwargs: json.dumps({"id": "abc"})
+    mock_process.return_value = [alert]
+
+    snapshot = await realtime.poll_realtime_data()
+
+    assert realtime.get_realtime_snapshot() is snapshot
+    assert snapshot["message"] == "Realtime earthquake data fetched successfully"
+    assert snapshot["data"].source == "TREM-Lite"
+
+    args, _ = mock_redis_methods["publish"].call_args
+    assert args[0] == "alerts"
+    published = json.loads(args[1])
+    assert published["type"] == AlertStatus.OPEN
+    assert published["ingestedAt"] == pytest.approx(time.time(), abs=5)
+
+    # shaking stopped, the snapshot is reset without generating alerts
+    mock_fetch.return_value = [
+        {"name": "Taipei", "intensity_float": 0.0, "lastUpdate": None},
+    ]
+    assert await realtime.poll_realtime_data() == realtime.NO_REALTIME_DATA
+    mock_process.assert_awaited_once()
+    assert realtime.emitted_area_states == {}
+
+
+@pytest.mark.parametrize(
+    ("previous", "current", "changed"),
+    [
+        (None, (0.5, 0), True),
+        ((2.0, 2), (2.3, 2), False),
+        ((2.0, 2), (2.6, 2), True),
+        # the intensity level changed
+        ((2.4, 2), (2.6, 3), True),
+        # the alert severity threshold was crossed
+        ((2.9, 2), (3.1, 2), True),
+        ((2.0, 2), (1.7, 2), False),
+    ],
+)
+def test_area_state_changed(
+    previous: tuple[float, int] | None,
+    current: tuple[float, int],
+    changed: bool,
+) -> None:
+    assert realtime.area_state_changed(previous, current) is changed
+
+
+@pytest.mark.asyncio
+@patch("app.services.realtime.fetch_realtime_data", new_callable=AsyncMock)
+@patch("app.services.realtime.process_earthquake_data", new_callable=AsyncMock)
+async def test_poll_realtime_data_only_processes_changed_areas(
+    mock_process: AsyncMock,
+    mock_fetch: AsyncMock,
+) -> None:
+    mock_process.return_value = []
+    mock_fetch.return_value = [
+        {"name": "Taipei", "intensity_float": 2.0, "intensity": 2, "lastUpdate": None},
+        {"name": "Hsinchu", "intensity_float": 1.0, "intensity": 1, "lastUpdate": None},
+    ]
+
+    await realtime.poll_realtime_data()
+    data = mock_process.await_args.args[0]
+    assert [area.county_name for area in data.shaking_area] == [
+        Location.TAIPEI,
+        Location.HSINCHU,
+    ]
+
+    # a sustained shake is not processed again
+    skipped = noop_ticks()
+    snapshot = await realtime.poll_realtime_data()
+    assert mock_process.await_count == 1
+    assert noop_ticks() == skipped + 1
+    # the snapshot still shows every area
+    assert len(snapshot["data"].shaking_area) == 2
+
+    mock_fetch.return_value[1]["intensity_float"] = 3.2
+    mock_fetch.return_value[1]["intensity"] = 3
+    await realtime.poll_realtime_data()
+    data = mock_process.await_args.args[0]
+    assert mock_process.await_count == 2
+    assert [area.county_name for area in data.shaking_area] == [Location.HSINCHU]
+
+
+@pytest.mark.asyncio
+@patch("app.services.realtime.fetch_realtime_data", new_callable=AsyncMock)
+@patch("app.services.realtime.process_earthquake_data", new_callable=AsyncMock)
+async def test_poll_realtime_data_retries_areas_that_failed(
+    mock_process: AsyncMock,
+    mock_fetch: AsyncMock,
+) -> None:
+    mock_fetch.return_value = [
+        {"name": "Taipei", "intensity_float": 2.0, "intensity": 2, "lastUpdate": None},
+    ]
+    mock_process.side_effect = [RuntimeError("redis down"), []]
+
+    with pytest.raises(RuntimeError):
+        await realtime.poll_realtime_data()
+    await realtime.poll_realtime_data()
+
+    assert mock_process.await_count == 2
+
+
+def test_next_poll_delay_keeps_interval_with_jitter() -> None:
+    interval = realtime.CONFIG["interval"] / 1000
+    jitter = realtime.REALTIME_POLL_JITTER * interval
+
+    for _ in range(100):
+        delay = realtime.next_poll_delay(0.25)
+        assert interval - 0.25 - jitter <= delay <= interval - 0.25 + jitter
+
+    assert realtime.next_poll_delay(interval * 2) == 0
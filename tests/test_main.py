@@ -1,7 +1,9 @@
+import asyncio
 from unittest.mock import AsyncMock, patch
 
 from fastapi.testclient import TestClient
 
+from app.main import app, lifespan
 from app.models.response import Response as APIResponse
 
 
@@ -39,3 +41,27 @@ def test_health_check_unhealthy(
         "message": "Some services are unhealthy",
         "data": {"redis": "unhealthy"},
     }
+
+
+async def test_lifespan_starts_and_closes_clients() -> None:
+    async def run_forever() -> None:
+        await asyncio.Event().wait()
+
+    with (
+        patch("app.main.start_redis_client", new_callable=AsyncMock) as start_redis,
+        patch("app.main.close_redis_client", new_callable=AsyncMock) as close_redis,
+        patch("app.main.start_http_client", new_callable=AsyncMock),
+        patch("app.main.close_http_client", new_callable=AsyncMock) as close_http,
+        patch("app.main.rebuild_alert_index", new_callable=AsyncMock) as rebuild,
+        patch("app.main.listen_to_alerts", run_forever),
+        patch("app.main.listen_to_settings", run_forever),
+        patch("app.main.run_realtime_poller", run_forever),
+        patch("app.main.run_autoclose_scheduler", run_forever),
+    ):
+        async with lifespan(app):
+            start_redis.assert_awaited_once()
+            rebuild.assert_awaited_once()
+            close_redis.assert_not_awaited()
+
+        close_http.assert_awaited_once()
+        close_redis.assert_awaited_once()
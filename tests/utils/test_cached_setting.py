@@ -0,0 +1,78 @@
+from collections.abc import Generator
+from unittest.mock import patch
+
+import pytest
+from fakeredis import FakeAsyncRedis
+
+from app.utils.cached_setting import CachedSetting, cached_settings, invalidate_setting
+
+
+@pytest.fixture
+def setting(fake_redis: FakeAsyncRedis) -> Generator[CachedSetting[int]]:
+    setting = CachedSetting(fake_redis, "TEST_SETTING", int, 10, ttl_seconds=30)
+    yield setting
+    cached_settings.pop("TEST_SETTING")
+
+
+async def test_get_caches_value(
+    fake_redis: FakeAsyncRedis,
+    setting: CachedSetting[int],
+) -> None:
+    assert await setting.get() == 10
+
+    # changed behind the cache's back, served from memory until invalidated
+    await fake_redis.set("TEST_SETTING", "20")
+    assert await setting.get() == 10
+
+    invalidate_setting(b"TEST_SETTING")
+    assert await setting.get() == 20
+
+
+async def test_invalidation_during_read_is_not_overwritten(
+    fake_redis: FakeAsyncRedis,
+    setting: CachedSetting[int],
+) -> None:
+    await fake_redis.set("TEST_SETTING", "20")
+    get = fake_redis.get
+
+    async def racing_get(key: str) -> bytes | None:
+        stale = await get(key)
+        # the value changes and is invalidated while the read is in flight
+        await fake_redis.set("TEST_SETTING", "30")
+        invalidate_setting(b"TEST_SETTING")
+        return stale
+
+    with patch.object(fake_redis, "get", racing_get):
+        assert await setting.get() == 20
+
+    assert await setting.get() == 30
+
+
+async def test_cached_value_expires(
+    fake_redis: FakeAsyncRedis,
+    setting: CachedSetting[int],
+) -> None:
+    with patch("app.utils.cached_setting.time.monotonic", return_value=100):
+        assert await setting.get() == 10
+    await fake_redis.set("TEST_SETTING", "20")
+
+    with patch("app.utils.cached_setting.time.monotonic", return_value=131):
+        assert await setting.get() == 20
+
+
+async def test_set_stores_and_publishes_key(
+    fake_redis: FakeAsyncRedis,
+    setting: CachedSetting[int],
+) -> None:
+    assert await setting.get() == 10
+    pubsub = fake_redis.pubsub()
+    await pubsub.subscribe("settings")
+    await pubsub.get_message(timeout=0.1)  # subscribe confirmation
+
+    await setting.set(30)
+
+    assert await setting.get() == 30
+    assert await fake_redis.get("TEST_SETTING") == b"30"
+    message = await pubsub.get_message(timeout=0.1)
+    assert message["data"] == b"TEST_SETTING"
+    await pubsub.aclose()
@@ -0,0 +1,54 @@
+import asyncio
+import time
+from unittest.mock import MagicMock
+
+from app.utils.expiry_scheduler import ExpiryScheduler
+
+
+def test_run_expired_only_runs_due_callbacks() -> None:
+    scheduler = ExpiryScheduler()
+    soon, later = MagicMock(), MagicMock()
+
+    scheduler.schedule("soon", 1, soon)
+    scheduler.schedule("later", 10, later)
+
+    assert scheduler.run_expired(time.monotonic() + 5) == 1
+    soon.assert_called_once()
+    later.assert_not_called()
+    assert len(scheduler) == 1
+
+
+def test_reschedule_coalesces_same_key() -> None:
+    scheduler = ExpiryScheduler()
+    first, second = MagicMock(), MagicMock()
+
+    scheduler.schedule("area", 1, first)
+    scheduler.schedule("area", 10, second)
+
+    assert len(scheduler) == 1
+    assert scheduler.run_expired(time.monotonic() + 5) == 0
+    assert scheduler.run_expired(time.monotonic() + 15) == 1
+    first.assert_not_called()
+    second.assert_called_once()
+
+
+def test_failing_callback_does_not_stop_others() -> None:
+    scheduler = ExpiryScheduler()
+    callback = MagicMock()
+
+    scheduler.schedule("broken", 0, MagicMock(side_effect=ValueError))
+    scheduler.schedule("ok", 0, callback)
+    scheduler.run_expired(time.monotonic() + 1)
+
+    callback.assert_called_once()
+    assert len(scheduler) == 0
+
+
+async def test_timer_fires_on_event_loop() -> None:
+    scheduler = ExpiryScheduler()
+    fired = asyncio.Event()
+
+    scheduler.schedule("area", 0.01, fired.set)
+
+    await asyncio.wait_for(fired.wait(), timeout=1)
+    assert len(scheduler) == 0
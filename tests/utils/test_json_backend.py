@@ -0,0 +1,42 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+from app.models.enums import AlertStatus
+from app.utils.json_backend import JsonBackend, get_codec, resolve_backend
+
+INSTALLED = [
+    backend
+    for backend in (JsonBackend.ORJSON, JsonBackend.MSGSPEC, JsonBackend.STDLIB)
+    if resolve_backend(backend) == backend
+]
+
+
+@pytest.mark.parametrize("backend", INSTALLED)
+def test_backends_encode_like_send_json(backend: JsonBackend) -> None:
+    loads, dumps = get_codec(backend)
+    message = {"type": AlertStatus.OPEN, "alert": "臺北", "values": [1, 2.5, None]}
+
+    encoded = dumps(message)
+
+    assert encoded == json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+    assert loads(encoded) == loads(encoded.encode("utf-8")) == message
+
+
+@pytest.mark.parametrize("backend", INSTALLED)
+def test_backends_raise_value_error_on_malformed_input(backend: JsonBackend) -> None:
+    loads, _ = get_codec(backend)
+
+    with pytest.raises(ValueError):
+        loads(b'{"station": ')
+
+
+def test_missing_backend_falls_back_to_stdlib() -> None:
+    with (
+        patch("app.utils.json_backend.orjson", None),
+        patch("app.utils.json_backend.msgspec", None),
+    ):
+        assert resolve_backend(JsonBackend.AUTO) == JsonBackend.STDLIB
+        assert resolve_backend(JsonBackend.ORJSON) == JsonBackend.STDLIB
+        assert resolve_backend(JsonBackend.MSGSPEC) == JsonBackend.STDLIB
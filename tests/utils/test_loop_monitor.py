@@ -0,0 +1,23 @@
+import asyncio
+import contextlib
+import time
+from unittest.mock import patch
+
+from app.utils.loop_monitor import run_loop_lag_monitor
+
+
+async def test_loop_lag_monitor_records_blocked_loop() -> None:
+    with patch("app.utils.loop_monitor.observe_event_loop_lag") as mock_observe:
+        monitor = asyncio.create_task(run_loop_lag_monitor(interval=0.01))
+        await asyncio.sleep(0)
+        # hold the loop well past the monitor's wake up
+        time.sleep(0.05)  # noqa: ASYNC251
+        await asyncio.sleep(0.02)
+        monitor.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await monitor
+
+    lags = [call.args[0] for call in mock_observe.call_args_list]
+    assert lags
+    assert max(lags) >= 0.03
+    assert min(lags) >= 0
@@ -0,0 +1,42 @@
+from unittest.mock import patch
+
+from prometheus_client import REGISTRY, generate_latest
+
+from app.utils.managed_gauge import ManagedGauge
+
+
+def get_evictions(metric: str) -> float:
+    return (
+        REGISTRY.get_sample_value("metric_label_evictions_total", {"metric": metric})
+        or 0
+    )
+
+
+def test_evicts_least_recently_used_over_cap() -> None:
+    gauge = ManagedGauge("test_managed_lru", "LRU test", ["id"], max_series=2)
+
+    gauge.labels(id="1").set(1)
+    gauge.labels(id="2").set(2)
+    gauge.labels(id="1").set(3)  # refresh id 1, id 2 is now the oldest
+    gauge.labels(id="3").set(4)
+
+    assert len(gauge) == 2
+    assert REGISTRY.get_sample_value("test_managed_lru", {"id": "1"}) == 3
+    assert REGISTRY.get_sample_value("test_managed_lru", {"id": "2"}) is None
+    assert REGISTRY.get_sample_value("test_managed_lru", {"id": "3"}) == 4
+    assert get_evictions("test_managed_lru") == 1
+
+
+def test_evicts_expired_label_sets_on_scrape() -> None:
+    gauge = ManagedGauge("test_managed_ttl", "TTL test", ["id"], ttl_seconds=60)
+
+    with patch("app.utils.managed_gauge.time.monotonic", return_value=1000):
+        gauge.labels(id="1").set(1)
+        assert REGISTRY.get_sample_value("test_managed_ttl", {"id": "1"}) == 1
+
+    with patch("app.utils.managed_gauge.time.monotonic", return_value=1061):
+        generate_latest(REGISTRY)
+
+    assert len(gauge) == 0
+    assert REGISTRY.get_sample_value("test_managed_ttl", {"id": "1"}) is None
+    assert get_evictions("test_managed_ttl") == 1
@@ -1,26 +1,42 @@
+import json
 import time
-from unittest.mock import AsyncMock, patch
+from collections.abc import Iterator
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
 
+import httpx
+import numpy as np
 import pytest
 
 from app.utils import realtime_data_handler as rdh
+from app.utils.server_selector import ServerSelector
+from app.utils.station_aggregates import AreaStations
+
+
+@pytest.fixture(autouse=True)
+def station_info_state(tmp_path: Path) -> Iterator[None]:
+    with patch.object(rdh, "STATION_INFO_CACHE_FILE", tmp_path / "station_info.json"):
+        yield
+    rdh.station_info = None
+    rdh.station_info_hash = None
+    rdh.station_info_etag = None
+    rdh.station_info_last_modified = None
+    rdh.station_info_refresh = None
 
 
 @pytest.mark.asyncio
-@patch("app.utils.realtime_data_handler.httpx.AsyncClient")
-async def test_fetch_data_success(mock_async_client_class: AsyncMock) -> None:
+@patch("app.utils.realtime_data_handler.get_http_client")
+async def test_fetch_data_success(mock_get_http_client: AsyncMock) -> None:
     # Create a mock response object
     mock_response = AsyncMock()
     mock_response.status_code = 200
     mock_response.raise_for_status = AsyncMock()  # no exception thrown
     mock_response.json = AsyncMock(return_value={"data": "ok"})
 
-    # Create a mock client instance whose get() returns the mock_response
+    # Create a mock shared client whose get() returns the mock_response
     mock_client_instance = AsyncMock()
     mock_client_instance.get.return_value = mock_response
-
-    # Setup context manager __aenter__ to return the mock client instance
-    mock_async_client_class.return_value.__aenter__.return_value = mock_client_instance
+    mock_get_http_client.return_value = mock_client_instance
 
     # Call the function
     response = await rdh.fetch_data("https://example.com", timeout_ms=1000)
@@ -33,6 +49,49 @@ async def test_fetch_data_success(mock_async_client_class: AsyncMock) -> None:
     assert json_data == {"data": "ok"}
 
 
+@pytest.mark.asyncio
+async def test_fetch_data_reuses_shared_client() -> None:
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json={"data": "ok"})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    with patch("app.utils.realtime_data_handler.http_client", client):
+        await rdh.fetch_data("https://example.com/a")
+        await rdh.fetch_data("https://example.com/b")
+        assert rdh.get_http_client() is client
+    await client.aclose()
+
+    assert [request.url.path for request in requests] == ["/a", "/b"]
+    assert requests[0].headers["Cache-Control"] == "no-cache"
+
+
+@pytest.mark.asyncio
+async def test_http_client_lifecycle() -> None:
+    with patch("app.utils.realtime_data_handler.http_client", None):
+        await rdh.start_http_client()
+        client = rdh.http_client
+        assert client is not None
+        assert rdh.get_http_client() is client
+
+        await rdh.close_http_client()
+        assert client.is_closed
+        assert rdh.http_client is None
+
+
+@pytest.mark.parametrize("http2_available", [True, False])
+def test_http_client_uses_http2_only_when_available(http2_available: bool) -> None:
+    with (
+        patch.object(rdh, "HTTP2_AVAILABLE", http2_available),
+        patch("app.utils.realtime_data_handler.httpx.AsyncClient") as mock_client,
+    ):
+        rdh.create_http_client()
+
+    assert mock_client.call_args.kwargs["http2"] is http2_available
+
+
 @pytest.mark.asyncio
 @patch("app.utils.realtime_data_handler.fetch_data")
 async def test_get_station_info_with_fresh_cache(mock_fetch_data: AsyncMock) -> None:
@@ -54,3 +113,260 @@ async def test_get_station_info_fetch_none(mock_fetch_data: AsyncMock) -> None:
 
     result = await rdh.get_station_info()
     assert result is None
+
+
+STATION_INFO = {
+    "1001": {"info": [{"code": 999}, {"code": 106, "lat": 25.0, "lon": 121.5}]},
+    "1002": {"info": [{"code": 500, "lat": 23.0, "lon": 120.0}]},
+    "1003": {"info": []},
+}
+
+
+def test_build_station_area_index_keeps_target_area_stations() -> None:
+    index = rdh.build_station_area_index(STATION_INFO)
+
+    assert list(index) == ["1001"]
+    area, latest_info = index["1001"]
+    assert area["code"] == 106
+    assert latest_info == {"code": 106, "lat": 25.0, "lon": 121.5}
+
+
+def station_response(status_code: int = 200, **headers: str) -> httpx.Response:
+    content = json.dumps(STATION_INFO).encode() if status_code == 200 else b""
+    return httpx.Response(status_code, content=content, headers=headers)
+
+
+@pytest.mark.asyncio
+@patch("app.utils.realtime_data_handler.build_station_area_index")
+@patch("app.utils.realtime_data_handler.fetch_data")
+async def test_refresh_station_info_rebuilds_index_only_on_change(
+    mock_fetch_data: AsyncMock,
+    mock_build_index: MagicMock,
+) -> None:
+    mock_build_index.return_value = {}
+    # no validators, so the unchanged document is downloaded again
+    mock_fetch_data.side_effect = [station_response(), station_response()]
+
+    for _ in range(2):
+        assert await rdh.refresh_station_info() == STATION_INFO
+
+    mock_build_index.assert_called_once_with(STATION_INFO)
+
+
+@pytest.mark.asyncio
+@patch("app.utils.realtime_data_handler.fetch_data")
+async def test_refresh_station_info_sends_validators(
+    mock_fetch_data: AsyncMock,
+) -> None:
+    last_modified = "Sat, 17 Oct 2026 00:00:00 GMT"
+    mock_fetch_data.side_effect = [
+        station_response(ETag='"v1"', **{"Last-Modified": last_modified}),
+        station_response(304),
+    ]
+
+    assert await rdh.refresh_station_info() == STATION_INFO
+    assert await rdh.refresh_station_info() == STATION_INFO
+
+    first, second = mock_fetch_data.await_args_list
+    assert first.args[2] == {}
+    assert second.args[2] == {
+        "If-None-Match": '"v1"',
+        "If-Modified-Since": last_modified,
+    }
+    assert rdh.station_info_etag == '"v1"'
+
+
+@pytest.mark.asyncio
+async def test_refresh_station_info_accepts_not_modified_response() -> None:
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return station_response(ETag='"v1"')
+
+    hosts = ["api-1.example.com", "api-2.example.com"]
+    selector = ServerSelector(hosts)
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    with (
+        patch("app.utils.realtime_data_handler.http_client", client),
+        patch.dict(rdh.server_selectors, {"api": selector}),
+    ):
+        assert await rdh.refresh_station_info() == STATION_INFO
+        rdh.last_station_info_fetch = 0
+        assert await rdh.refresh_station_info() == STATION_INFO
+    await client.aclose()
+
+    # one request per refresh, the 304 is not failed over to the other host
+    assert len(requests) == 2
+    assert rdh.last_station_info_fetch > 0
+    assert all(selector.get_stats(host).error_rate == 0 for host in hosts)
+
+
+@pytest.mark.asyncio
+@patch("app.utils.realtime_data_handler.fetch_data")
+async def test_station_info_cache_round_trip(mock_fetch_data: AsyncMock) -> None:
+    mock_fetch_data.return_value = station_response(ETag='"v1"')
+    await rdh.refresh_station_info()
+    content_hash = rdh.station_info_hash
+
+    # a restarted process starts from the cache file
+    rdh.station_info = None
+    rdh.station_info_hash = None
+    rdh.station_info_etag = None
+    assert await rdh.load_station_info_cache()
+
+    assert rdh.station_info == STATION_INFO
+    assert rdh.station_info_hash == content_hash
+    assert rdh.station_info_etag == '"v1"'
+    assert list(rdh.station_area_index) == ["1001"]
+
+
+@pytest.mark.asyncio
+async def test_load_station_info_cache_ignores_corrupt_file() -> None:
+    rdh.STATION_INFO_CACHE_FILE.write_bytes(b'{"stations": ')
+
+    assert not await rdh.load_station_info_cache()
+    assert rdh.station_info is None
+
+
+@pytest.mark.asyncio
+@patch("app.utils.realtime_data_handler.refresh_station_info")
+async def test_get_station_info_cold_start_refreshes_in_background(
+    mock_refresh: AsyncMock,
+) -> None:
+    rdh.set_station_info(STATION_INFO, None)
+    rdh.save_station_info_cache(json.dumps(STATION_INFO).encode())
+    rdh.station_info = None
+    rdh.last_station_info_fetch = 0
+
+    assert await rdh.get_station_info() == STATION_INFO
+    await rdh.station_info_refresh
+    mock_refresh.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+@patch(
+    "app.utils.realtime_data_handler.REALTIME_AREA_AGGREGATION",
+    rdh.AreaAggregation.LAST_STATION,
+)
+async def test_process_target_area_data_skips_other_stations() -> None:
+    rdh.station_info = STATION_INFO
+    rdh.station_area_index = rdh.build_station_area_index(STATION_INFO)
+    rdh.last_station_info_fetch = time.time() * 1000
+    data = {
+        "time": 1,
+        "station": {
+            "1001": {"pga": 1.5, "i": 2.345, "I": 2},
+            "1002": {"pga": 9.9, "i": 5.0, "I": 5},
+        },
+    }
+
+    result = await rdh.process_target_area_data(data)
+
+    assert result is not None
+    [area] = result["updatedAreas"]
+    assert area["code"] == 106
+    assert area["stationId"] == "1001"
+    assert area["intensityFloat"] == "2.35"
+    assert area["location"] == {"lat": 25.0, "lon": 121.5}
+    assert rdh.area_status[106]["pga"] == 1.5
+
+
+@pytest.mark.asyncio
+@patch(
+    "app.utils.realtime_data_handler.REALTIME_AREA_AGGREGATION",
+    rdh.AreaAggregation.VECTORIZED,
+)
+async def test_process_target_area_data_aggregates_area_stations() -> None:
+    station_info = {
+        str(n): {"info": [{"code": 106 if n < 5 else 402}]} for n in range(8)
+    }
+    rdh.station_info = station_info
+    rdh.station_area_index = rdh.build_station_area_index(station_info)
+    rdh.area_stations = AreaStations(rdh.station_area_index, [106, 402, 710, 301])
+    rdh.last_station_info_fetch = time.time() * 1000
+    data = {
+        "time": 1,
+        "station": {
+            # a single noisy station in Taipei
+            **{str(n): {"pga": 1.0, "i": 1.0, "I": 1} for n in range(4)},
+            "4": {"pga": 30.0, "i": 5.0, "I": 5},
+            "5": {"pga": 2.0, "i": 2.0, "I": 2},
+            "6": {"pga": 3.0, "i": 3.0, "I": 3},
+            "9999": {"pga": 99.0, "i": 7.0, "I": 7},
+        },
+    }
+
+    result = await rdh.process_target_area_data(data)
+
+    assert result is not None
+    taipei, taichung = result["updatedAreas"]
+    assert taipei["code"] == 106
+    assert taipei["stationCount"] == 5
+    assert taipei["intensityMax"] == "5.00"
+    assert taichung["code"] == 402
+    assert taichung["stationCount"] == 2
+
+    status = rdh.area_status[106]
+    assert status["pga"] == 30.0
+    assert status["intensity_float"] == pytest.approx(
+        np.percentile([1, 1, 1, 1, 5], 90),
+    )
+    assert status["intensity_mean"] == pytest.approx(1.8)
+    assert rdh.area_status[402]["intensity_float"] == pytest.approx(2.9)
+    assert rdh.area_status[402]["intensity"] == 3
+
+
+def test_area_stations_match_numpy_percentile() -> None:
+    rng = np.random.default_rng(0)
+    area_codes = [106, 402, 710, 301]
+    index = {str(n): ({"code": area_codes[n % 3]}, {}) for n in range(300)}
+    intensities = rng.uniform(0, 7, size=300)
+    rts = {
+        str(n): {"pga": n, "i": float(intensity), "I": int(intensity)}
+        for n, intensity in enumerate(intensities)
+        # some stations do not report in this tick
+        if n % 7
+    }
+
+    aggregates = AreaStations(index, area_codes).aggregate(rts, 75)
+
+    assert list(aggregates) == [106, 402, 710]
+    for position, code in enumerate(area_codes[:3]):
+        reported = [rts[str(n)]["i"] for n in range(position, 300, 3) if str(n) in rts]
+        aggregate = aggregates[code]
+        assert aggregate["station_count"] == len(reported)
+        assert aggregate["intensity_float"] == pytest.approx(
+            np.percentile(reported, 75),
+        )
+        assert aggregate["intensity_max"] == pytest.approx(max(reported))
+        assert aggregate["intensity_mean"] == pytest.approx(np.mean(reported))
+
+
+def test_area_stations_without_readings() -> None:
+    index = {"1": ({"code": 106}, {})}
+
+    assert AreaStations(index, [106]).aggregate({"2": {"i": 1.0}}, 90) == {}
+    assert AreaStations({}, [106]).aggregate({}, 90) == {}
+
+
+@pytest.mark.asyncio
+@patch("app.utils.realtime_data_handler.process_target_area_data")
+@patch("app.utils.realtime_data_handler.fetch_data")
+async def test_fetch_realtime_data_fails_over_to_next_server(
+    mock_fetch_data: AsyncMock,
+    mock_process: AsyncMock,
+) -> None:
+    response = httpx.Response(200, json={"station": {}})
+    # the first two load balancers do not respond
+    mock_fetch_data.side_effect = [None, None, response]
+
+    statuses = await rdh.fetch_realtime_data()
+
+    assert mock_fetch_data.await_count == 3
+    urls = [call.args[0] for call in mock_fetch_data.await_args_list]
+    assert len(set(urls)) == 3
+    mock_process.assert_awaited_once_with({"station": {}})
+    assert len(statuses) == len(rdh.CONFIG["targetAreas"])
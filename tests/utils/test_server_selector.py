@@ -0,0 +1,136 @@
+import asyncio
+import time
+from unittest.mock import patch
+
+import httpx
+import pytest
+from prometheus_client import REGISTRY
+
+from app.utils import realtime_data_handler as rdh
+from app.utils.server_selector import ServerSelector
+
+HOSTS = ["lb-1.test", "lb-2.test", "lb-3.test"]
+
+
+def stand_in_servers(
+    delays: dict[str, float],
+    failing: tuple[str, ...] = (),
+) -> httpx.AsyncClient:
+    """Client whose requests are answered locally, after a delay per host."""
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(delays.get(request.url.host, 0))
+        if request.url.host in failing:
+            return httpx.Response(500)
+        return httpx.Response(200, json={"host": request.url.host})
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+async def fetch_host(client: httpx.AsyncClient, selector: ServerSelector) -> str | None:
+    with patch("app.utils.realtime_data_handler.http_client", client):
+        response = await selector.request(
+            lambda server: rdh.fetch_data(f"https://{server}/api/v2/trem/rts", 2000),
+        )
+    return response.json()["host"] if response else None
+
+
+def prefer(selector: ServerSelector, host: str, latency: float) -> None:
+    for _ in range(30):
+        selector.record(host, latency, ok=True)
+
+
+def test_ranked_prefers_fast_and_healthy_hosts() -> None:
+    selector = ServerSelector(HOSTS)
+    selector.record("lb-1.test", 0.05, ok=True)
+    selector.record("lb-2.test", 0.01, ok=True)
+    selector.record("lb-3.test", 0.01, ok=False)
+
+    assert selector.ranked() == ["lb-2.test", "lb-1.test", "lb-3.test"]
+
+
+def test_ranked_tries_hosts_without_samples_first() -> None:
+    selector = ServerSelector(HOSTS)
+    selector.record("lb-1.test", 0.01, ok=True)
+
+    assert selector.ranked()[-1] == "lb-1.test"
+
+
+def test_stale_stats_are_dropped() -> None:
+    selector = ServerSelector(HOSTS)
+    selector.record("lb-1.test", 0.01, ok=False)
+
+    with patch("app.utils.server_selector.UPSTREAM_STATS_TTL", -1):
+        assert selector.get_stats("lb-1.test").error_rate == 0
+
+
+def test_hedge_delay_is_latency_p95() -> None:
+    selector = ServerSelector(HOSTS)
+    assert selector.hedge_delay("lb-1.test") == 0.5
+
+    for n in range(100):
+        selector.record("lb-1.test", n / 1000, ok=True)
+
+    assert selector.hedge_delay("lb-1.test") == pytest.approx(0.095)
+
+
+@pytest.mark.asyncio
+async def test_request_hedges_to_second_host_when_first_is_slow() -> None:
+    selector = ServerSelector(HOSTS[:2])
+    prefer(selector, "lb-1.test", 0.02)
+    prefer(selector, "lb-2.test", 0.03)
+    client = stand_in_servers({"lb-1.test": 1.0, "lb-2.test": 0.01})
+    hedged = (
+        REGISTRY.get_sample_value(
+            "upstream_hedged_requests_total",
+            {"host": "lb-1.test"},
+        )
+        or 0.0
+    )
+
+    start = time.monotonic()
+    assert await fetch_host(client, selector) == "lb-2.test"
+    await client.aclose()
+
+    assert time.monotonic() - start < 0.5
+    assert (
+        REGISTRY.get_sample_value(
+            "upstream_hedged_requests_total",
+            {"host": "lb-1.test"},
+        )
+        == hedged + 1
+    )
+    # the slow host lost the race and is ranked lower
+    assert selector.stats["lb-1.test"].error_rate > 0
+    assert selector.ranked()[0] == "lb-2.test"
+
+
+@pytest.mark.asyncio
+async def test_request_fails_over_to_next_host() -> None:
+    selector = ServerSelector(HOSTS)
+    prefer(selector, "lb-1.test", 0.01)
+    prefer(selector, "lb-2.test", 0.02)
+    prefer(selector, "lb-3.test", 0.03)
+    client = stand_in_servers({}, failing=("lb-1.test",))
+
+    assert await fetch_host(client, selector) == "lb-2.test"
+    await client.aclose()
+
+    assert (
+        REGISTRY.get_sample_value(
+            "upstream_request_seconds_count",
+            {"host": "lb-1.test", "outcome": "error"},
+        )
+        >= 1
+    )
+
+
+@pytest.mark.asyncio
+async def test_request_returns_none_when_every_host_fails() -> None:
+    selector = ServerSelector(HOSTS)
+    client = stand_in_servers({}, failing=tuple(HOSTS))
+
+    assert await fetch_host(client, selector) is None
+    await client.aclose()
+
+    assert all(selector.stats[host].error_rate > 0 for host in HOSTS)
@@ -0,0 +1,46 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.utils.stage_timer import time_stage, timed_stage
+
+
+@patch("app.utils.stage_timer.observe_pipeline_stage")
+def test_time_stage_records_block_duration(mock_observe: MagicMock) -> None:
+    with (
+        patch("app.utils.stage_timer.time.perf_counter", side_effect=[1.0, 1.25]),
+        time_stage("dedup"),
+    ):
+        pass
+
+    mock_observe.assert_called_once_with("dedup", 0.25)
+
+
+@patch("app.utils.stage_timer.observe_pipeline_stage")
+def test_time_stage_records_failing_block(mock_observe: MagicMock) -> None:
+    with pytest.raises(RuntimeError), time_stage("save_alerts"):
+        raise RuntimeError
+
+    mock_observe.assert_called_once()
+    assert mock_observe.call_args.args[0] == "save_alerts"
+
+
+@patch("app.utils.stage_timer.observe_pipeline_stage")
+async def test_timed_stage_wraps_plain_and_async_functions(
+    mock_observe: MagicMock,
+) -> None:
+    @timed_stage("generate_events")
+    def generate(value: int) -> int:
+        return value + 1
+
+    @timed_stage("publish")
+    async def publish(value: int) -> int:
+        return value * 2
+
+    assert generate(1) == 2
+    assert await publish(2) == 4
+    assert generate.__name__ == "generate"
+    assert [call.args[0] for call in mock_observe.call_args_list] == [
+        "generate_events",
+        "publish",
+    ]
@@ -0,0 +1,49 @@
+from unittest.mock import patch
+
+from app.utils.ttl_cache import TTLSet
+
+
+def test_members_expire_after_ttl() -> None:
+    cache = TTLSet(ttl_seconds=10, max_entries=10)
+    with patch("app.utils.ttl_cache.time.monotonic", return_value=100):
+        cache.add("a")
+        assert "a" in cache
+
+    with patch("app.utils.ttl_cache.time.monotonic", return_value=110):
+        assert "a" not in cache
+        assert len(cache) == 0
+
+
+def test_discard_removes_member() -> None:
+    cache = TTLSet(ttl_seconds=10, max_entries=10)
+    cache.add("a")
+
+    cache.discard("a")
+    cache.discard("missing")
+
+    assert "a" not in cache
+
+
+def test_oldest_members_are_dropped_when_full() -> None:
+    cache = TTLSet(ttl_seconds=10, max_entries=2)
+    for key in ("a", "b", "c"):
+        cache.add(key)
+
+    assert "a" not in cache
+    assert "b" in cache
+    assert "c" in cache
+
+
+def test_readding_refreshes_member() -> None:
+    cache = TTLSet(ttl_seconds=10, max_entries=2)
+    with patch("app.utils.ttl_cache.time.monotonic", return_value=100):
+        cache.add("a")
+        cache.add("b")
+    with patch("app.utils.ttl_cache.time.monotonic", return_value=105):
+        cache.add("a")
+        cache.add("c")
+
+        # b became the oldest member when a was added again
+        assert "b" not in cache
+    with patch("app.utils.ttl_cache.time.monotonic", return_value=112):
+        assert "a" in cache
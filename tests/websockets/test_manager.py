@@ -1,8 +1,16 @@
-from unittest.mock import AsyncMock, MagicMock
+import asyncio
+import json
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
-from app.websockets.manager import WebSocketManager
+from app.websockets.manager import (
+    AlertTiming,
+    SlowConsumerPolicy,
+    WebSocketManager,
+    WireFormat,
+)
 
 
 @pytest.mark.asyncio
@@ -16,14 +24,18 @@ async def test_connect_adds_websocket_to_connections() -> None:
     assert mock_ws in manager.connections
 
 
-def test_disconnect_removes_websocket_from_connections() -> None:
-    mock_ws = MagicMock()
+@pytest.mark.asyncio
+async def test_disconnect_removes_websocket_from_connections() -> None:
+    mock_ws = AsyncMock()
     manager = WebSocketManager()
-    manager.connections.append(mock_ws)
+    await manager.connect(mock_ws)
+    writer = manager.connections[mock_ws].writer
 
     manager.disconnect(mock_ws)
+    await asyncio.sleep(0)
 
     assert mock_ws not in manager.connections
+    assert writer.cancelled()
 
 
 def test_disconnect_does_nothing_if_not_connected() -> None:
@@ -41,10 +53,149 @@ async def test_broadcast_sends_message_to_all_connections() -> None:
     mock_ws_2 = AsyncMock()
 
     manager = WebSocketManager()
-    manager.connections = [mock_ws_1, mock_ws_2]
+    await manager.connect(mock_ws_1)
+    await manager.connect(mock_ws_2)
 
     message = {"event": "earthquake", "magnitude": 5.2}
     await manager.broadcast(message)
+    for client in manager.connections.values():
+        await client.queue.join()
+
+    frame = '{"event":"earthquake","magnitude":5.2}'
+    mock_ws_1.send_text.assert_awaited_once_with(frame)
+    mock_ws_2.send_text.assert_awaited_once_with(frame)
+
+
+@pytest.mark.asyncio
+async def test_broadcast_alert_sends_frame_per_wire_format() -> None:
+    v1_ws = AsyncMock()
+    v2_ws = AsyncMock()
+
+    manager = WebSocketManager()
+    await manager.connect(v1_ws)
+    await manager.connect(v2_ws, WireFormat.V2)
+
+    alert = {"id": "1", "location": "Taipei"}
+    published = json.dumps({"type": "OPEN", "alert": json.dumps(alert)})
+    await manager.broadcast_alert(published.encode("utf-8"))
+    for client in manager.connections.values():
+        await client.queue.join()
+
+    v1_ws.send_text.assert_awaited_once_with(published)
+    [v2_frame] = v2_ws.send_text.await_args.args
+    assert json.loads(v2_frame) == {"type": "OPEN", "alert": alert}
+
+
+@pytest.mark.asyncio
+@patch("app.websockets.manager.observe_alert_origin_delivery")
+@patch("app.websockets.manager.observe_alert_delivery")
+async def test_broadcast_alert_records_delivery_once_sent(
+    mock_delivery: MagicMock,
+    mock_origin_delivery: MagicMock,
+) -> None:
+    release = asyncio.Event()
+
+    async def slow_send(message: str) -> None:
+        await release.wait()
+
+    slow_ws = AsyncMock()
+    slow_ws.send_text.side_effect = slow_send
+    broken_ws = AsyncMock()
+    broken_ws.send_text.side_effect = RuntimeError("connection reset")
+
+    manager = WebSocketManager()
+    await manager.connect(slow_ws)
+    await manager.connect(broken_ws)
+
+    now = time.time()
+    await manager.broadcast_alert('{"type":"OPEN"}', AlertTiming(now - 1, now - 5))
+    await asyncio.sleep(0)
+    # queued is not delivered yet
+    mock_delivery.assert_not_called()
+
+    release.set()
+    await manager.connections[slow_ws].queue.join()
+
+    # only the client that was sent the alert is measured
+    [[delivery]] = [call.args for call in mock_delivery.call_args_list]
+    [[origin_delivery]] = [call.args for call in mock_origin_delivery.call_args_list]
+    assert delivery >= 1
+    assert origin_delivery == pytest.approx(delivery + 4)
+
+
+@pytest.mark.asyncio
+async def test_failed_send_only_drops_that_client() -> None:
+    broken_ws = AsyncMock()
+    broken_ws.send_text.side_effect = RuntimeError("connection reset")
+    healthy_ws = AsyncMock()
+
+    manager = WebSocketManager()
+    await manager.connect(broken_ws)
+    await manager.connect(healthy_ws)
+
+    await manager.broadcast({"n": 1})
+    await asyncio.sleep(0)
+    await manager.broadcast({"n": 2})
+    await manager.connections[healthy_ws].queue.join()
+
+    assert broken_ws not in manager.connections
+    assert healthy_ws.send_text.await_count == 2
+
 
-    mock_ws_1.send_json.assert_awaited_once_with(message)
-    mock_ws_2.send_json.assert_awaited_once_with(message)
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("policy", "expected"),
+    [
+        (SlowConsumerPolicy.DROP_OLDEST, ['{"n":0}', '{"n":2}', '{"n":3}']),
+        (SlowConsumerPolicy.COALESCE, ['{"n":0}', '{"n":3}']),
+    ],
+)
+async def test_slow_consumer_policies_keep_queue_bounded(
+    policy: SlowConsumerPolicy,
+    expected: list[str],
+) -> None:
+    release = asyncio.Event()
+    sent = []
+
+    async def slow_send(message: str) -> None:
+        sent.append(message)
+        await release.wait()
+
+    slow_ws = AsyncMock()
+    slow_ws.send_text.side_effect = slow_send
+
+    manager = WebSocketManager(queue_size=2, policy=policy)
+    await manager.connect(slow_ws)
+
+    # the writer takes message 0 and blocks on it, the rest stays queued
+    await manager.broadcast({"n": 0})
+    await asyncio.sleep(0)
+    for n in range(1, 4):
+        await manager.broadcast({"n": n})
+
+    release.set()
+    await manager.connections[slow_ws].queue.join()
+    assert sent == expected
+
+
+@pytest.mark.asyncio
+async def test_slow_consumer_disconnect_policy() -> None:
+    async def stalled_send(message: str) -> None:
+        await asyncio.Event().wait()
+
+    slow_ws = AsyncMock()
+    slow_ws.send_text.side_effect = stalled_send
+
+    manager = WebSocketManager(queue_size=1, policy=SlowConsumerPolicy.DISCONNECT)
+    client = await manager.connect(slow_ws)
+
+    await manager.broadcast({"n": 0})
+    await asyncio.sleep(0)
+    await manager.broadcast({"n": 1})
+    await manager.broadcast({"n": 2})
+    await asyncio.sleep(0)
+
+    assert slow_ws not in manager.connections
+    slow_ws.close.assert_awaited_once_with(code=1013)
+    # the endpoint's ping loop is woken up and exits
+    assert await client.wait_closed(0)